@@ -49,6 +49,16 @@ CONSTANCE_BACKEND = 'constance.backends.database.DatabaseBackend'
 CONSTANCE_CONFIG = {
     'AWEI_THRESHOLD': (-0.11, 'AWEI threshold value for detecting water body', float),
     'WATER_BODY_MIN_PIXEL': (100, 'Minimum pixels to consider as water body', int),
+    'TASK_LOG_LEVEL': (
+        20, 'Minimum level of task logs to store (10 debug, 20 info, 30 warning, 40 error)', int
+    ),
+    'TASK_LOG_BUFFER_SIZE': (100, 'Number of task logs buffered before writing them', int),
+    'TASK_LOG_FLUSH_INTERVAL': (
+        5.0, 'Maximum seconds task logs are buffered before writing them', float
+    ),
+    'TASK_LOG_RETENTION_MONTHS': (
+        12, 'Number of months task logs are kept, 0 to keep them forever', int
+    ),
 }
 
 
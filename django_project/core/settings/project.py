@@ -5,6 +5,7 @@ Adjust these values as needed but don't commit passwords etc. to any public
 repository!
 """
 import os  # noqa
+import tempfile
 from celery.schedules import crontab
 
 from .contrib import *  # noqa
@@ -29,6 +30,71 @@ DEBUG = TEMPLATE_DEBUG = False
 # Extra installed apps
 INSTALLED_APPS = INSTALLED_APPS + ('core', 'project')
 
+# Disk cache of rendered map tiles, trimmed to TILE_CACHE_MAX_SIZE bytes at
+# most once every TILE_CACHE_EVICT_INTERVAL seconds
+TILE_CACHE_DIR = os.environ.get('TILE_CACHE_DIR', '/home/web/tile_cache')
+TILE_CACHE_MAX_SIZE = int(os.environ.get('TILE_CACHE_MAX_SIZE', 1024 * 1024 * 1024))
+TILE_CACHE_EVICT_INTERVAL = int(os.environ.get('TILE_CACHE_EVICT_INTERVAL', 300))
+
+# Seconds clients should wait before polling the status of a running task
+TASK_STATUS_RETRY_AFTER = int(os.environ.get('TASK_STATUS_RETRY_AFTER', 5))
+
+# Maximum number of pixels of a clip download, 4 bytes each
+CLIP_MAX_PIXELS = int(os.environ.get('CLIP_MAX_PIXELS', 4096 * 4096))
+
+# Compression of NetCDF exports: zlib, or zstd when netCDF-C supports it
+NETCDF_COMPRESSION = os.environ.get('NETCDF_COMPRESSION', 'zlib')
+NETCDF_COMPLEVEL = int(os.environ.get('NETCDF_COMPLEVEL', 4))
+
+# Quick-look PNG exports: maximum size and thumbnail sizes in pixels
+QUICKLOOK_MAX_SIZE = int(os.environ.get('QUICKLOOK_MAX_SIZE', 2048))
+QUICKLOOK_THUMBNAIL_SIZES = [
+    int(size) for size in os.environ.get('QUICKLOOK_THUMBNAIL_SIZES', '').split(',') if size
+]
+
+# Scratch space of analysis working directories, in a directory per host.
+# SCRATCH_MAX_SIZE is the disk budget of a worker in bytes, 0 for unlimited.
+# Jobs estimated at most SCRATCH_TMPFS_JOB_SIZE bytes are placed on
+# SCRATCH_TMPFS_DIR, e.g. /dev/shm, while it holds less than
+# SCRATCH_TMPFS_MAX_SIZE bytes. Directories of other hosts untouched for
+# SCRATCH_ORPHAN_AGE seconds, e.g. of recreated containers, are removed.
+SCRATCH_DIR = os.environ.get(
+    'SCRATCH_DIR', os.path.join(tempfile.gettempdir(), 'sansa-scratch')
+)
+SCRATCH_MAX_SIZE = int(os.environ.get('SCRATCH_MAX_SIZE', 0))
+SCRATCH_TMPFS_DIR = os.environ.get('SCRATCH_TMPFS_DIR', '')
+SCRATCH_TMPFS_JOB_SIZE = int(os.environ.get('SCRATCH_TMPFS_JOB_SIZE', 64 * 1024 * 1024))
+SCRATCH_TMPFS_MAX_SIZE = int(os.environ.get('SCRATCH_TMPFS_MAX_SIZE', 512 * 1024 * 1024))
+SCRATCH_ORPHAN_AGE = int(os.environ.get('SCRATCH_ORPHAN_AGE', 24 * 60 * 60))
+
+# Zarr data cubes of crawlers
+DATACUBE_DIR = os.environ.get('DATACUBE_DIR', os.path.join(MEDIA_ROOT, 'datacubes'))
+
+# S3-compatible bucket of task outputs, e.g. on AWS S3 or MinIO. Outputs are
+# kept in MEDIA_ROOT when no bucket is set. Credentials are read from the
+# AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY environment variables; GDAL
+# reads the outputs with the same variables, plus AWS_S3_ENDPOINT for MinIO.
+OUTPUT_STORAGE_BUCKET = os.environ.get('OUTPUT_STORAGE_BUCKET', '')
+OUTPUT_STORAGE_ENDPOINT_URL = os.environ.get('OUTPUT_STORAGE_ENDPOINT_URL') or None
+OUTPUT_STORAGE_URL_EXPIRE = int(os.environ.get('OUTPUT_STORAGE_URL_EXPIRE', 3600))
+OUTPUT_UPLOAD_CHUNK_SIZE = int(os.environ.get('OUTPUT_UPLOAD_CHUNK_SIZE', 16 * 1024 * 1024))
+OUTPUT_UPLOAD_CONCURRENCY = int(os.environ.get('OUTPUT_UPLOAD_CONCURRENCY', 8))
+
+# Scene search and pre-screening. Scenes up to STAC_MAX_CLOUD_COVER percent
+# cloudy over the whole tile are found. When PRESCREEN_MIN_CLEAR_FRACTION is
+# above 0, scenes up to PRESCREEN_MAX_CLOUD_COVER percent are found instead,
+# and those with less than PRESCREEN_MIN_CLEAR_FRACTION of the AOI clear in a
+# low resolution read of at most PRESCREEN_MAX_SIZE pixels of the SCL or
+# QA_PIXEL band are skipped. The composite masks the same clouds and shadows.
+STAC_MAX_CLOUD_COVER = float(os.environ.get('STAC_MAX_CLOUD_COVER', 20))
+PRESCREEN_MAX_CLOUD_COVER = float(os.environ.get('PRESCREEN_MAX_CLOUD_COVER', 60))
+PRESCREEN_MIN_CLEAR_FRACTION = float(os.environ.get('PRESCREEN_MIN_CLEAR_FRACTION', 0.5))
+PRESCREEN_MAX_SIZE = int(os.environ.get('PRESCREEN_MAX_SIZE', 256))
+PRESCREEN_WORKERS = int(os.environ.get('PRESCREEN_WORKERS', 8))
+
+# Release recorded with the stage metrics of analysis tasks
+RELEASE = os.environ.get('RELEASE', 'dev')
+
 # Celery Beat
 CELERY_BEAT_SCHEDULE = {
     'update_stored_data_monthly': {
@@ -38,5 +104,9 @@ CELERY_BEAT_SCHEDULE = {
                             day_of_week='*',
                             day_of_month='1',
                             month_of_year='*')
+    },
+    'manage_task_log_partitions_daily': {
+        'task': 'manage_task_log_partitions',
+        'schedule': crontab(minute='30', hour='0')
     }
 }
@@ -17,9 +17,11 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from project.api_views.metrics import MetricsAPIView
 
 urlpatterns = [
     path('api/', include('project.urls')),
+    path('metrics', MetricsAPIView.as_view(), name='metrics'),
 ]
 
 if settings.DEBUG:
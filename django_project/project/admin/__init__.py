@@ -2,3 +2,4 @@ from project.admin.dataset import *
 from project.admin.monitor import *
 from project.admin.provider import *
 from project.admin.logs import *
+from project.admin.pollution import *
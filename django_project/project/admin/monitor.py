@@ -1,6 +1,8 @@
+import logging
 from leaflet.admin import LeafletGeoAdmin
 from django.contrib import admin
 from django.contrib import messages
+from django.utils.html import format_html, format_html_join
 
 from project.models.monitor import (
     MonitoringIndicator,
@@ -13,6 +15,10 @@ from project.models.monitor import (
     CrawlProgress,
     Province
 )
+from project.models.batch import AnalysisBatch
+from project.models.datacube import DataCube
+from project.models.logs import TaskLog
+from project.models.summary import TaskOutputSummary
 from project.tasks.store_data import update_stored_data
 
 
@@ -53,14 +59,110 @@ class TaskOutputInline(admin.TabularInline):
     show_change_link = True
 
 
+class StageMetricsReleaseFilter(admin.SimpleListFilter):
+    title = 'release'
+    parameter_name = 'release'
+
+    def lookups(self, request, model_admin):
+        releases = AnalysisTask.objects.exclude(stage_metrics={}).values_list(
+            'stage_metrics__release', flat=True
+        ).distinct()
+        return [(release, release) for release in releases if release]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(stage_metrics__release=self.value())
+        return queryset
+
+
 @admin.register(AnalysisTask)
 class AnalysisTaskAdmin(admin.ModelAdmin):
-    list_display = ('task_name', 'status', 'created_by', 'created_at', 'started_at', 'completed_at')
-    list_filter = ('status', 'created_at', 'started_at', 'completed_at')
+    list_display = (
+        'task_name', 'status', 'created_by', 'created_at', 'started_at', 'completed_at',
+        'duration'
+    )
+    list_filter = (
+        'status', 'profile', StageMetricsReleaseFilter, 'created_at', 'started_at', 'completed_at'
+    )
     search_fields = ('task_name', 'created_by__username', 'uuid', 'celery_task_id')
-    readonly_fields = ('uuid', 'started_at', 'created_at', 'completed_at')
+    readonly_fields = (
+        'uuid', 'started_at', 'created_at', 'completed_at', 'stage_metrics_table', 'logs'
+    )
+    exclude = ('stage_metrics', )
     inlines = [TaskOutputInline]
     ordering = ('-created_at', )
+    max_logs = 500
+
+    @admin.display(description='Duration (s)')
+    def duration(self, obj):
+        if not obj.started_at or not obj.completed_at:
+            return '-'
+        return f"{(obj.completed_at - obj.started_at).total_seconds():.1f}"
+
+    @admin.display(description='Stage metrics')
+    def stage_metrics_table(self, obj):
+        stages = (obj.stage_metrics or {}).get('stages')
+        if not stages:
+            return '-'
+        return format_html(
+            '<p>Release: {}</p><table><tr><th>Stage</th><th>Calls</th><th>Wall time (s)</th>'
+            '<th>Read (MB)</th><th>Peak RSS (MB)</th><th>Dask tasks</th></tr>{}</table>',
+            obj.stage_metrics.get('release', '-'),
+            format_html_join(
+                '', '<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>',
+                (
+                    (
+                        name,
+                        entry['calls'],
+                        f"{entry['wall_time']:.1f}",
+                        f"{entry['read_bytes'] / 1024 ** 2:.1f}",
+                        f"{entry['peak_rss'] / 1024 ** 2:.0f}",
+                        entry['dask_tasks'],
+                    )
+                    for name, entry in sorted(
+                        stages.items(), key=lambda item: -item[1]['wall_time']
+                    )
+                )
+            )
+        )
+
+    @admin.display(description='Logs')
+    def logs(self, obj):
+        if not obj.pk:
+            return '-'
+        logs = TaskLog.objects.for_object(obj).order_by('timestamp').values_list(
+            'timestamp', 'level', 'log'
+        )[:self.max_logs]
+        return format_html(
+            '<div style="max-height: 400px; overflow: auto;">{}</div>',
+            format_html_join(
+                '', '<div>{} {} {}</div>',
+                (
+                    (timestamp.strftime('%Y-%m-%d %H:%M:%S'), logging.getLevelName(level), log)
+                    for timestamp, level, log in logs
+                )
+            )
+        )
+
+
+@admin.register(AnalysisBatch)
+class AnalysisBatchAdmin(admin.ModelAdmin):
+    list_display = ('uuid', 'batch_type', 'created_by', 'created_at')
+    list_filter = ('batch_type', 'created_at')
+    search_fields = ('uuid', 'created_by__username')
+    readonly_fields = ('uuid', 'created_at', 'celery_group_id')
+    raw_id_fields = ('tasks', )
+    ordering = ('-created_at', )
+
+
+class TaskOutputSummaryInline(admin.StackedInline):
+    model = TaskOutputSummary
+    extra = 0
+    can_delete = False
+    readonly_fields = (
+        'pixel_count', 'valid_count', 'valid_fraction', 'mean', 'std', 'min', 'max',
+        'p5', 'p50', 'p95', 'water_area_km2', 'created_at'
+    )
 
 
 @admin.register(TaskOutput)
@@ -69,6 +171,7 @@ class TaskOutputAdmin(LeafletGeoAdmin):
     list_filter = ('monitoring_type', 'created_by')
     search_fields = ('task__task_name', 'monitoring_type__name', 'created_by__username')
     readonly_fields = ('created_at', )
+    inlines = [TaskOutputSummaryInline]
     ordering = ('-created_at', )
 
 
@@ -81,8 +184,8 @@ def run_crawler(modeladmin, request, queryset):
 
 @admin.register(Crawler)
 class CrawlerAdmin(LeafletGeoAdmin):
-    list_display = ('name', 'description', 'image_type', 'created_at', 'created_by')
-    list_filter = ('image_type', 'created_at')
+    list_display = ('name', 'description', 'image_type', 'output_mode', 'created_at', 'created_by')
+    list_filter = ('image_type', 'output_mode', 'created_at')
     search_fields = ('name', 'description')
     readonly_fields = ('updated_by', 'created_by')
     actions = [run_crawler]
@@ -94,6 +197,15 @@ class CrawlerAdmin(LeafletGeoAdmin):
         obj.save(validate=False)
 
 
+@admin.register(DataCube)
+class DataCubeAdmin(admin.ModelAdmin):
+    list_display = ('crawler', 'path', 'resolution', 'width', 'height', 'start_date', 'updated_at')
+    readonly_fields = (
+        'path', 'crs', 'resolution', 'origin_x', 'origin_y', 'width', 'height',
+        'start_date', 'bbox', 'created_at', 'updated_at'
+    )
+
+
 @admin.register(CrawlProgress)
 class CrawlProgressAdmin(admin.ModelAdmin):
     list_display = (
@@ -0,0 +1,13 @@
+from leaflet.admin import LeafletGeoAdmin
+from django.contrib import admin
+
+from project.models.pollution import PollutionStatistic
+
+
+@admin.register(PollutionStatistic)
+class PollutionStatisticAdmin(LeafletGeoAdmin):
+    list_display = ('task', 'source_type', 'source_id', 'monitoring_type', 'observation_date',
+                    'pixel_count', 'mean')
+    list_filter = ('source_type', 'monitoring_type', 'observation_date')
+    search_fields = ('source_id', 'task__task_name')
+    list_select_related = ('task', 'monitoring_type')
@@ -1,4 +1,8 @@
 from project.api_views.analysis import *
 from project.api_views.water_extent import *
 from project.api_views.dataset import *
-from project.api_views.task_output import *
\ No newline at end of file
+from project.api_views.task_output import *
+from project.api_views.pollution import *
+from project.api_views.time_series import *
+from project.api_views.batch import *
+from project.api_views.metrics import *
@@ -1,7 +1,11 @@
+import hashlib
 import json
+import logging
 from urllib.parse import urlencode
+from django.conf import settings
+from django.db.models import Prefetch
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from django.contrib.gis.geos import Polygon
 from django.urls import reverse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets
@@ -16,11 +20,13 @@ from celery.result import AsyncResult
 from rest_framework import permissions
 from rest_framework.response import Response
 from rest_framework import status
-from project.utils.calculations.analysis import Analysis
-from project.models.monitor import MonitoringIndicatorType, AnalysisTask, TaskOutput
+from project.models.monitor import (
+    ACTIVE_STATUSES, MonitoringIndicatorType, AnalysisTask, Status, TaskOutput
+)
 from project.tasks.analysis import run_analysis_task, run_analysis
-from project.serializers.monitoring import AnalysisTaskStatusSerializer
-from project.api_views.base import BasePaginationClass
+from project.serializers.monitoring import AnalysisTaskSerializer, AnalysisTaskStatusSerializer
+from project.api_views.base import BaseCursorPaginationClass
+from project.utils.coverage import coverage_index, uncovered_requests
 
 
 class WaterAnalysisAPIView(APIView):
@@ -52,9 +58,12 @@ class WaterAnalysisAPIView(APIView):
         export_cog = data.get("export_cog", True)
         auto_detect_water = data.get("auto_detect_water", True)
         output_mask_id = data.get("output_mask_id")
+        # Profile the analysis, the profiles are attached as diagnostic outputs.
+        # A profiled request runs the analysis instead of reusing outputs.
+        profile = bool(data.get("profile", False))
         mask_path = None
         if output_mask_id:
-            mask_path = get_object_or_404(TaskOutput, id=output_mask_id).file.path
+            mask_path = get_object_or_404(TaskOutput, id=output_mask_id).file_path
         calc_types = data.get("calc_types", MonitoringIndicatorType.Type.values)
         for calc_type in calc_types:
             if calc_type not in MonitoringIndicatorType.Type.values:
@@ -79,15 +88,10 @@ class WaterAnalysisAPIView(APIView):
             "auto_detect_water": auto_detect_water,
             "mask_path": mask_path
         }
-        normalized_parameters = json.loads(json.dumps(parameters, sort_keys=True))
-
-        # Check for existing TaskOutput
-        existing_outputs = TaskOutput.objects.filter(
-            monitoring_type__name__in=calc_types,
-            bbox__intersects=Polygon.from_bbox(bbox),
-            observation_date__gte=start_date,
-            observation_date__lte=end_date,
-        )
+        # One NetCDF file with all months and indices instead of one per month
+        if export_nc and data.get("export_nc_combined", False):
+            parameters["export_nc_combined"] = True
+
         output_url = request.build_absolute_uri(reverse('task-output-list'))
         query_params = {
             'monitoring_type__name__in': ','.join(calc_types),
@@ -96,58 +100,91 @@ class WaterAnalysisAPIView(APIView):
             'bbox': ','.join([str(coord) for coord in bbox]),
         }
         absolute_url = f"{output_url}?{urlencode(query_params)}"
-        if existing_outputs.exists():
+
+        # Reuse stored outputs and only schedule what they do not cover
+        index = coverage_index(bbox, start_date, end_date, calc_types, resolution)
+        reused = [
+            {key: entry[key] for key in ['calc_type', 'month', 'coverage', 'output_ids']}
+            for entry in index if entry['output_ids']
+        ]
+        pieces = uncovered_requests(index, start_date, end_date)
+        if profile:
+            reused = []
+            pieces = [
+                {"bbox": bbox, "calc_types": calc_types,
+                 "start_date": start_date, "end_date": end_date}
+            ]
+        if not pieces:
             return Response({
                 "status": "ready",
                 "output_url": absolute_url,
-                "task_uuid": None
+                "task_uuid": None,
+                "reused": reused,
+                "scheduled": [],
             })
 
-        task = AnalysisTask.objects.filter(
-            parameters=normalized_parameters
-        ).order_by('-created_at').first()
-
-        if task:
-            return Response(
-                {"message": {
-                    "task_uuid": task.uuid
-                }},
-                status=status.HTTP_200_OK,
-            )
-        else:
-            task = AnalysisTask.objects.create(
-                parameters=normalized_parameters,
-                task_name=f"Water Analysis {self.request.user.username}",
-                created_by=self.request.user,
+        scheduled = []
+        created_tasks = []
+        for piece in pieces:
+            piece_parameters = {**parameters, **piece}
+            task_parameters = json.loads(json.dumps(piece_parameters, sort_keys=True))
+            defaults = {
+                "task_name": f"Water Analysis {self.request.user.username}",
+                "created_by": self.request.user,
+                "profile": profile,
+            }
+            task, created = AnalysisTask.objects.get_or_create_for_parameters(
+                task_parameters, defaults=defaults
             )
-        parameters.update({"task_id": task.uuid.hex})
+            if profile and not created:
+                if task.status == Status.PENDING and not task.profile:
+                    task.profile = True
+                    task.save(update_fields=['profile'])
+                elif task.status not in ACTIVE_STATUSES:
+                    # Finished tasks are run again, running ones are not profiled
+                    task, created = AnalysisTask.objects.create_for_parameters(
+                        task_parameters, defaults=defaults
+                    )
+            scheduled.append({"task_uuid": task.uuid, "profile": task.profile, **piece})
+            if created:
+                created_tasks.append((task, piece_parameters))
 
-        try:
-            result = run_analysis_task.delay(**parameters)
+        for index, (task, piece_parameters) in enumerate(created_tasks):
+            piece_parameters.update({"task_id": task.uuid.hex})
+            try:
+                result = run_analysis_task.delay(**piece_parameters)
+            except Exception as e:
+                # Tasks that were never dispatched would stay pending forever
+                for pending_task, _ in created_tasks[index:]:
+                    pending_task.add_log(f"Failed scheduling the analysis: {e}", logging.ERROR)
+                    pending_task.failed()
+                return Response(
+                    {"error": str(e)},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
             task.refresh_from_db()
             task.celery_task_id = result.id
             task.save()
 
-            return Response(
-                {
-                    "status": "processing",
-                    "output_url": absolute_url,
-                    "task_uuid": task.uuid
-                },
-                status=status.HTTP_200_OK,
-            )
-
-        except Exception as e:
-            task.failed()
-            return Response(
-                {"error": str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        return Response(
+            {
+                "status": "processing",
+                "output_url": absolute_url,
+                "task_uuid": scheduled[0]["task_uuid"],
+                "reused": reused,
+                "scheduled": scheduled,
+            },
+            status=status.HTTP_200_OK,
+        )
 
 
 class AnalysisTaskStatusAPIView(APIView):
     """
     API View to check the status of a Celery task.
+
+    Without ``detail``, the status is served from the cache with an ETag,
+    and a ``Retry-After`` header while the task is pending or running, so
+    clients poll with ``If-None-Match`` at that interval.
     """
     authentication_classes = [
         TokenAuthentication,
@@ -156,20 +193,48 @@ class AnalysisTaskStatusAPIView(APIView):
     ]
     permission_classes = [permissions.IsAuthenticated]
 
+    @staticmethod
+    def get_etag(entry):
+        value = f"{entry['status']}|{entry['updated_at']}"
+        return '"{}"'.format(hashlib.md5(value.encode('utf-8')).hexdigest())
+
     def get(self, request, task_uuid):
         detail = request.GET.get('detail', 'false').lower() in ['true', '1']
-        task = get_object_or_404(AnalysisTask, uuid=task_uuid)
-        serializer = AnalysisTaskStatusSerializer(task, context={'request': request})
         if detail:
-            response = serializer.data
-        else:
-            response = {'status': serializer.data['status']}
-        return Response(response, status=status.HTTP_200_OK)
+            task = get_object_or_404(
+                AnalysisTask.objects.prefetch_related(
+                    Prefetch(
+                        'task_outputs',
+                        queryset=TaskOutput.objects.select_related('monitoring_type', 'summary')
+                    )
+                ),
+                uuid=task_uuid
+            )
+            serializer = AnalysisTaskStatusSerializer(task, context={'request': request})
+            return Response(serializer.data, status=status.HTTP_200_OK)
+
+        entry = AnalysisTask.get_cached_status(task_uuid)
+        if entry is None:
+            raise Http404
+        etag = self.get_etag(entry)
+        headers = {'ETag': etag}
+        if entry['status'] in [Status.PENDING, Status.RUNNING]:
+            headers['Retry-After'] = str(settings.TASK_STATUS_RETRY_AFTER)
+
+        if request.headers.get('If-None-Match') == etag:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(
+            {'status': entry['status']},
+            status=status.HTTP_200_OK,
+            headers=headers
+        )
 
 
 class AnalysisTaskListAPIView(viewsets.ReadOnlyModelViewSet):
     """
     API View list AnalysisTask.
+
+    Pass ``include_outputs=false`` to leave out the nested task outputs.
     """
     authentication_classes = [
         TokenAuthentication,
@@ -179,11 +244,27 @@ class AnalysisTaskListAPIView(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     serializer_class = AnalysisTaskStatusSerializer
-    pagination_class = BasePaginationClass
+    pagination_class = BaseCursorPaginationClass
     filter_backends = [DjangoFilterBackend]
 
+    def include_outputs(self):
+        value = self.request.GET.get('include_outputs', 'true').lower()
+        return value not in ['false', '0']
+
+    def get_serializer_class(self):
+        if not self.include_outputs():
+            return AnalysisTaskSerializer
+        return self.serializer_class
+
     def get_queryset(self):
         queryset = AnalysisTask.objects.all()
+        if self.include_outputs():
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    'task_outputs',
+                    queryset=TaskOutput.objects.select_related('monitoring_type', 'summary')
+                )
+            )
         if not self.request.user.is_superuser:
-            return AnalysisTask.objects.filter(created_by=self.request.user)
+            return queryset.filter(created_by=self.request.user)
         return queryset
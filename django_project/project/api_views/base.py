@@ -1,7 +1,20 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class BasePaginationClass(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+class BaseCursorPaginationClass(CursorPagination):
+    """
+    Keyset pagination on ``created_at``.
+
+    Avoids the ``COUNT(*)`` and offset scans of page number pagination
+    on tables that grow with every crawl.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-created_at'
@@ -0,0 +1,285 @@
+import json
+from celery import group as celery_group
+from django.contrib.gis.geos import GEOSGeometry
+from django.contrib.gis.geos.error import GEOSException
+from django.db import IntegrityError, transaction
+from django.shortcuts import get_object_or_404
+from rest_framework import permissions, status
+from rest_framework.authentication import (
+    TokenAuthentication,
+    BasicAuthentication,
+    SessionAuthentication,
+)
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from project.models.batch import AnalysisBatch
+from project.models.monitor import (
+    AnalysisTask,
+    MonitoringIndicatorType,
+    Status,
+    TaskOutput,
+    hash_parameters,
+)
+from project.tasks.batch import fail_tasks, run_analysis_group_task
+from project.tasks.water_extent import compute_water_extent_task
+from project.utils.batch import group_nearby, union_bbox
+from project.utils.clip import geometry_from_params
+
+MAX_BATCH_SIZE = 500
+
+
+class BatchAnalysisAPIView(APIView):
+    """
+    Submit water analysis or water extent tasks for many areas at once.
+
+    The areas are given as ``bboxes``, GeoJSON ``geometries`` (their
+    envelope is analysed) and/or ``water_bodies`` (ids of AWEI TaskOutputs
+    of detected water bodies), and share the date range and the other
+    parameters of the single area endpoints. ``type`` is ``analysis``
+    (default) or ``water_extent``.
+
+    Areas with an existing task are not submitted again. Nearby areas are
+    grouped so the scenes of a group are searched once, and all groups are
+    dispatched as one Celery group.
+
+    Only the scene search is shared: every area runs as its own task, in
+    parallel on the workers, and loads the scenes under its bbox itself, so
+    scenes under several areas of a group are read once per area.
+    """
+    authentication_classes = [
+        TokenAuthentication,
+        BasicAuthentication,
+        SessionAuthentication,
+    ]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @staticmethod
+    def get_bboxes(data):
+        bboxes = []
+        for bbox in data.get('bboxes') or []:
+            if isinstance(bbox, str):
+                bbox = bbox.split(',')
+            bboxes.append([float(coord) for coord in bbox])
+        for geometry in data.get('geometries') or []:
+            geometry = geometry_from_params({'geometry': geometry})
+            bboxes.append(list(GEOSGeometry(json.dumps(geometry)).extent))
+
+        water_bodies = [int(water_body) for water_body in data.get('water_bodies') or []]
+        if water_bodies:
+            extents = dict(
+                (output.pk, list(output.bbox.extent)) for output in TaskOutput.objects.filter(
+                    pk__in=water_bodies,
+                    monitoring_type__name__iexact='AWEI',
+                    bbox__isnull=False
+                ).only('bbox')
+            )
+            missing = [water_body for water_body in water_bodies if water_body not in extents]
+            if missing:
+                raise ValueError(f"Water bodies not found: {missing}")
+            bboxes.extend(extents[water_body] for water_body in water_bodies)
+
+        for bbox in bboxes:
+            if len(bbox) != 4 or bbox[0] >= bbox[2] or bbox[1] >= bbox[3]:
+                raise ValueError(f"Invalid bbox {bbox}.")
+        return bboxes
+
+    @staticmethod
+    def get_shared_parameters(data, batch_type):
+        start_date = data.get("start_date")
+        end_date = data.get("end_date")
+        if not start_date or not end_date:
+            raise ValueError("start_date and end_date are required fields.")
+
+        if batch_type == AnalysisBatch.BatchType.WATER_EXTENT:
+            return {
+                "spatial_resolution": int(data.get("spatial_resolution", 30)),
+                "start_date": start_date,
+                "end_date": end_date,
+                "input_type": data.get("input_type", "Landsat"),
+            }
+
+        calc_types = data.get("calc_types", MonitoringIndicatorType.Type.values)
+        for calc_type in calc_types:
+            if calc_type not in MonitoringIndicatorType.Type.values:
+                raise ValueError(
+                    f"{calc_type} is not one of available calculation type: "
+                    f"{MonitoringIndicatorType.Type.values}."
+                )
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "resolution": data.get("resolution", 20),
+            "export_plot": data.get("export_plot", False),
+            "export_nc": data.get("export_nc", False),
+            "export_cog": data.get("export_cog", True),
+            "calc_types": calc_types,
+            "auto_detect_water": data.get("auto_detect_water", True),
+            "mask_path": None
+        }
+
+    def get_or_create_tasks(self, parameters_list, task_name):
+        """
+        Return the task of every parameters, creating the missing ones.
+
+        Existing tasks are found with one query on the parameters hash and
+        new tasks are inserted with one bulk insert.
+
+        :return: Tuple of the tasks, in the order of ``parameters_list``,
+            and the list of created tasks.
+        """
+        hashes = [hash_parameters(parameters) for parameters in parameters_list]
+        tasks = {
+            task.parameters_hash: task
+            for task in AnalysisTask.objects.filter(
+                parameters_hash__in=set(hashes)
+            ).order_by('parameters_hash', '-created_at').distinct('parameters_hash')
+        }
+
+        new_tasks = {}
+        for parameters_hash, parameters in zip(hashes, parameters_list):
+            if parameters_hash not in tasks and parameters_hash not in new_tasks:
+                new_tasks[parameters_hash] = AnalysisTask(
+                    task_name=task_name,
+                    parameters=parameters,
+                    parameters_hash=parameters_hash,
+                    created_by=self.request.user,
+                )
+        created = list(new_tasks.values())
+        try:
+            with transaction.atomic():
+                AnalysisTask.objects.bulk_create(created)
+        except IntegrityError:
+            # Created meanwhile by another request, resolve one by one
+            created = []
+            for parameters_hash, task in new_tasks.items():
+                task, is_created = AnalysisTask.objects.get_or_create_for_parameters(
+                    task.parameters, defaults={
+                        'task_name': task_name,
+                        'created_by': self.request.user,
+                    }
+                )
+                new_tasks[parameters_hash] = task
+                if is_created:
+                    created.append(task)
+        tasks.update(new_tasks)
+        return [tasks[parameters_hash] for parameters_hash in hashes], created
+
+    @staticmethod
+    def get_signatures(batch_type, created, shared_parameters):
+        """Return the Celery signatures of the created tasks, with their tasks."""
+        if batch_type == AnalysisBatch.BatchType.WATER_EXTENT:
+            return [
+                (
+                    compute_water_extent_task.si(task_id=str(task.uuid), **task.parameters),
+                    [task]
+                )
+                for task in created
+            ]
+
+        signatures = []
+        for indices in group_nearby([task.parameters['bbox'] for task in created]):
+            group_tasks = [created[i] for i in indices]
+            signatures.append((
+                run_analysis_group_task.si(
+                    task_ids=[str(task.uuid) for task in group_tasks],
+                    bbox=union_bbox([task.parameters['bbox'] for task in group_tasks]),
+                    start_date=shared_parameters['start_date'],
+                    end_date=shared_parameters['end_date'],
+                ),
+                group_tasks
+            ))
+        return signatures
+
+    def post(self, request):
+        data = request.data
+        batch_type = data.get('type', AnalysisBatch.BatchType.ANALYSIS)
+        if batch_type not in AnalysisBatch.BatchType.values:
+            return Response(
+                {"error": f"type must be one of {AnalysisBatch.BatchType.values}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            shared_parameters = self.get_shared_parameters(data, batch_type)
+            bboxes = self.get_bboxes(data)
+        except (ValueError, TypeError, AttributeError, KeyError, GEOSException) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not bboxes:
+            return Response(
+                {"error": "bboxes, geometries or water_bodies are required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(bboxes) > MAX_BATCH_SIZE:
+            return Response(
+                {"error": f"A batch can have at most {MAX_BATCH_SIZE} areas."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if batch_type == AnalysisBatch.BatchType.WATER_EXTENT:
+            task_name = f"Water Extent - {request.user.username}"
+        else:
+            task_name = f"Water Analysis {request.user.username}"
+        parameters_list = [
+            json.loads(json.dumps({**shared_parameters, "bbox": bbox}, sort_keys=True))
+            for bbox in bboxes
+        ]
+        tasks, created = self.get_or_create_tasks(parameters_list, task_name)
+
+        batch = AnalysisBatch.objects.create(
+            batch_type=batch_type,
+            parameters=shared_parameters,
+            created_by=request.user,
+        )
+        batch.tasks.add(*{task.uuid: task for task in tasks}.values())
+
+        if created:
+            signatures = self.get_signatures(batch_type, created, shared_parameters)
+            try:
+                result = celery_group(
+                    [signature for signature, _ in signatures]
+                ).apply_async()
+            except Exception as e:
+                fail_tasks(created, f"Failed scheduling the analysis: {e}")
+                return Response(
+                    {"error": str(e)},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
+
+            batch.celery_group_id = result.id
+            batch.save(update_fields=['celery_group_id'])
+            for (_, group_tasks), task_result in zip(signatures, result.results):
+                for task in group_tasks:
+                    task.celery_task_id = task_result.id
+            AnalysisTask.objects.bulk_update(created, ['celery_task_id'])
+
+        return Response(
+            {
+                "batch_uuid": batch.uuid,
+                "total": len(set(task.uuid for task in tasks)),
+                "created": len(created),
+                "reused": len(set(task.uuid for task in tasks)) - len(created),
+                "tasks": [task.uuid for task in tasks],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class BatchAnalysisStatusAPIView(APIView):
+    """
+    Aggregated progress of the tasks of a batch.
+    """
+    authentication_classes = [
+        TokenAuthentication,
+        BasicAuthentication,
+        SessionAuthentication,
+    ]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, batch_uuid):
+        batch = get_object_or_404(AnalysisBatch, uuid=batch_uuid)
+        return Response({
+            "batch_uuid": batch.uuid,
+            "type": batch.batch_type,
+            "parameters": batch.parameters,
+            "created_at": batch.created_at,
+            **batch.progress(),
+        })
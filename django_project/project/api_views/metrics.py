@@ -0,0 +1,44 @@
+from datetime import timedelta
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import permissions, status
+from rest_framework.authentication import (
+    TokenAuthentication,
+    BasicAuthentication,
+    SessionAuthentication,
+)
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from project.models.monitor import AnalysisTask
+from project.utils.instrumentation import metrics_text
+
+METRICS_WINDOW_DAYS = 30
+
+
+class MetricsAPIView(APIView):
+    """
+    Histograms of the stage metrics of the analysis tasks completed in the
+    last ``days`` days (default 30), in the Prometheus text format.
+    """
+    authentication_classes = [
+        TokenAuthentication,
+        BasicAuthentication,
+        SessionAuthentication,
+    ]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            days = int(request.GET.get('days', METRICS_WINDOW_DAYS))
+        except ValueError:
+            return Response(
+                {"error": "days must be an integer."}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        stage_metrics = AnalysisTask.objects.filter(
+            completed_at__gte=timezone.now() - timedelta(days=days)
+        ).exclude(stage_metrics={}).values_list('stage_metrics', flat=True)
+        return HttpResponse(
+            metrics_text(stage_metrics.iterator()),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
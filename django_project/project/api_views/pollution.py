@@ -0,0 +1,138 @@
+import json
+from urllib.parse import urlencode
+from django.urls import reverse
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import viewsets
+from rest_framework.views import APIView
+from rest_framework.authentication import (
+    TokenAuthentication,
+    BasicAuthentication,
+    SessionAuthentication,
+)
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework import status
+from project.models.monitor import MonitoringIndicatorType, AnalysisTask
+from project.models.pollution import PollutionStatistic
+from project.tasks.pollution import run_pollution_analysis_task
+from project.serializers.pollution import PollutionStatisticSerializer
+from project.filters.pollution import PollutionStatisticFilter
+from project.api_views.base import BasePaginationClass
+
+
+class PollutionAnalysisAPIView(APIView):
+    """
+    API to compute pollution statistics for point and non-point sources
+    across stored NDTI/NDCI outputs asynchronously.
+    """
+    authentication_classes = [
+        TokenAuthentication,
+        BasicAuthentication,
+        SessionAuthentication,
+    ]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        data = request.data
+
+        start_date = data.get("start_date")
+        end_date = data.get("end_date")
+        point_sources = data.get("point_sources")
+        non_point_sources = data.get("non_point_sources")
+
+        if not start_date or not end_date:
+            return Response(
+                {"error": "start_date and end_date are required fields."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not point_sources and not non_point_sources:
+            return Response(
+                {"error": "point_sources or non_point_sources is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        for collection in (point_sources, non_point_sources):
+            if collection and (
+                not isinstance(collection, dict) or
+                not isinstance(collection.get("features"), list)
+            ):
+                return Response(
+                    {"error": "Sources must be GeoJSON FeatureCollections."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        calc_types = data.get(
+            "calc_types",
+            [MonitoringIndicatorType.Type.NDTI, MonitoringIndicatorType.Type.NDCI]
+        )
+        for calc_type in calc_types:
+            if calc_type not in MonitoringIndicatorType.Type.values:
+                return Response(
+                    {
+                        "error":
+                        f"{calc_type} is not one of available calculation type: "
+                        f"{MonitoringIndicatorType.Type.values}."
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        parameters = {
+            "start_date": start_date,
+            "end_date": end_date,
+            "point_sources": point_sources,
+            "non_point_sources": non_point_sources,
+            "calc_types": calc_types,
+        }
+        normalized_parameters = json.loads(json.dumps(parameters, sort_keys=True))
+        task = AnalysisTask.objects.create(
+            parameters=normalized_parameters,
+            task_name=f"Pollution Analysis {request.user.username}",
+            created_by=request.user,
+        )
+        parameters.update({"task_id": str(task.uuid)})
+
+        output_url = request.build_absolute_uri(reverse('pollution-statistic-list'))
+        absolute_url = f"{output_url}?{urlencode({'task__uuid': str(task.uuid)})}"
+        try:
+            result = run_pollution_analysis_task.delay(**parameters)
+            task.refresh_from_db()
+            task.celery_task_id = result.id
+            task.save()
+
+            return Response(
+                {
+                    "status": "processing",
+                    "output_url": absolute_url,
+                    "task_uuid": task.uuid
+                },
+                status=status.HTTP_200_OK,
+            )
+
+        except Exception as e:
+            task.failed()
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+class PollutionStatisticViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    API View list PollutionStatistic.
+    """
+    authentication_classes = [
+        TokenAuthentication,
+        BasicAuthentication,
+        SessionAuthentication,
+    ]
+    permission_classes = [permissions.IsAuthenticated]
+
+    serializer_class = PollutionStatisticSerializer
+    pagination_class = BasePaginationClass
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = PollutionStatisticFilter
+
+    def get_queryset(self):
+        queryset = PollutionStatistic.objects.select_related('monitoring_type')
+        if not self.request.user.is_superuser:
+            return queryset.filter(task__created_by=self.request.user)
+        return queryset
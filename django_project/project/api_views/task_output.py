@@ -1,4 +1,12 @@
-from rest_framework import viewsets
+import os
+import rasterio
+from shapely.errors import ShapelyError
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import viewsets, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.authentication import (
     TokenAuthentication,
     BasicAuthentication,
@@ -9,7 +17,27 @@ from django_filters.rest_framework import DjangoFilterBackend
 from project.models.monitor import TaskOutput
 from project.serializers.monitoring import TaskOutputSerializer
 from project.filters.task_output import TaskOutputFilter
-from project.api_views.base import BasePaginationClass
+from project.api_views.base import BaseCursorPaginationClass
+from project.utils.clip import (
+    CLIP_FORMATS,
+    clip_file,
+    clip_raster,
+    geometry_from_params,
+)
+from project.utils.calculations.quicklook import COLORMAPS
+from project.utils.tiles import (
+    MAX_ZOOM,
+    TILE_FORMATS,
+    TileCache,
+    get_style,
+    render_tile,
+)
+
+tile_cache = TileCache(
+    settings.TILE_CACHE_DIR,
+    settings.TILE_CACHE_MAX_SIZE,
+    evict_interval=settings.TILE_CACHE_EVICT_INTERVAL,
+)
 
 
 class TaskOutputViewSet(viewsets.ReadOnlyModelViewSet):
@@ -20,8 +48,145 @@ class TaskOutputViewSet(viewsets.ReadOnlyModelViewSet):
     ]
     permission_classes = [permissions.IsAuthenticated]
 
-    queryset = TaskOutput.objects.all().order_by('-created_at')
+    queryset = TaskOutput.objects.select_related(
+        'monitoring_type', 'summary'
+    ).order_by('-created_at')
     serializer_class = TaskOutputSerializer
-    pagination_class = BasePaginationClass
+    pagination_class = BaseCursorPaginationClass
     filter_backends = [DjangoFilterBackend]
     filterset_class = TaskOutputFilter
+
+
+class TaskOutputTileView(APIView):
+    """
+    Render an XYZ map tile of a COG TaskOutput.
+
+    The colour map and value range default to the style of the index type,
+    and can be overridden with ``colormap`` (``BrBG``, ``Blues`` or
+    ``viridis``), ``vmin`` and ``vmax``.
+    Rendered tiles are cached on disk.
+    """
+    authentication_classes = [
+        TokenAuthentication,
+        BasicAuthentication,
+        SessionAuthentication,
+    ]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk, z, x, y, image_format):
+        if image_format not in TILE_FORMATS:
+            return Response(
+                {"error": f"Tile format must be one of {list(TILE_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if z > MAX_ZOOM or x >= 2 ** z or y >= 2 ** z:
+            return Response(
+                {"error": "Invalid tile coordinates."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        output = get_object_or_404(
+            TaskOutput.objects.select_related('monitoring_type'), pk=pk
+        )
+        if not output.file.name.lower().endswith('.tif'):
+            return Response(
+                {"error": "Tiles are only available for GeoTIFF outputs."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        colormap, vmin, vmax = get_style(output.monitoring_type.name)
+        colormap = request.GET.get('colormap', colormap)
+        if colormap not in COLORMAPS:
+            return Response(
+                {"error": f"Unknown colormap {colormap}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            vmin = float(request.GET.get('vmin', vmin))
+            vmax = float(request.GET.get('vmax', vmax))
+        except ValueError:
+            return Response(
+                {"error": "vmin and vmax must be numbers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        key = (
+            str(output.pk),
+            f'{colormap}_{vmin:g}_{vmax:g}',
+            str(z),
+            str(x),
+            f'{y}.{image_format}',
+        )
+        content = tile_cache.get(key)
+        if content is None:
+            with rasterio.open(output.file_path) as src:
+                content = render_tile(src, z, x, y, colormap, vmin, vmax, image_format)
+            tile_cache.set(key, content)
+
+        response = HttpResponse(content, content_type=TILE_FORMATS[image_format][1])
+        response['Cache-Control'] = 'private, max-age=86400'
+        return response
+
+
+class TaskOutputClipView(APIView):
+    """
+    Download the part of a GeoTIFF TaskOutput inside a bbox or geometry.
+
+    GET takes ``bbox=minx,miny,maxx,maxy``; POST takes a JSON body with
+    ``bbox`` or a GeoJSON ``geometry``, both in EPSG:4326. ``format`` is
+    ``tif`` (default) or ``nc``, and ``resolution`` an optional pixel size
+    in units of the output CRS, served from overviews when coarser.
+    Clips of more than ``CLIP_MAX_PIXELS`` pixels are rejected; the clip is
+    written to a temporary file that is streamed back.
+    """
+    authentication_classes = [
+        TokenAuthentication,
+        BasicAuthentication,
+        SessionAuthentication,
+    ]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        return self.clip(pk, request.GET)
+
+    def post(self, request, pk):
+        return self.clip(pk, request.data)
+
+    def clip(self, pk, params):
+        output = get_object_or_404(TaskOutput.objects.select_related('monitoring_type'), pk=pk)
+        if not output.file.name.lower().endswith('.tif'):
+            return Response(
+                {"error": "Clipping is only available for GeoTIFF outputs."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        output_format = params.get('format', 'tif')
+        if output_format not in CLIP_FORMATS:
+            return Response(
+                {"error": f"format must be one of {list(CLIP_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            geometry = geometry_from_params(params)
+            resolution = params.get('resolution')
+            resolution = float(resolution) if resolution else None
+            if resolution is not None and resolution <= 0:
+                raise ValueError("resolution must be positive.")
+            with rasterio.open(output.file_path) as src:
+                data, transform, nodata = clip_raster(
+                    src, geometry, resolution=resolution, max_pixels=settings.CLIP_MAX_PIXELS
+                )
+                crs = src.crs
+        except (ValueError, TypeError, AttributeError, ShapelyError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        clip = clip_file(
+            data, transform, crs, nodata, output_format, name=output.monitoring_type.name
+        )
+
+        filename = os.path.splitext(os.path.basename(output.file.name))[0]
+        return FileResponse(
+            clip,
+            as_attachment=True,
+            filename=f"{filename}_clip.{output_format}",
+            content_type=CLIP_FORMATS[output_format],
+        )
@@ -0,0 +1,81 @@
+import json
+from datetime import date
+from django.contrib.gis.geos import GEOSGeometry
+from django.contrib.gis.geos.error import GEOSException
+from rest_framework import permissions, status
+from rest_framework.authentication import (
+    TokenAuthentication,
+    BasicAuthentication,
+    SessionAuthentication,
+)
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from project.utils.clip import geometry_from_params
+from project.utils.time_series import build_time_series, water_body_geometry
+
+DEFAULT_TIME_SERIES_TYPES = ['AWEI', 'NDCI']
+
+
+class TimeSeriesAPIView(APIView):
+    """
+    Monthly statistics of a water body or area from stored TaskOutputs.
+
+    The area is given by ``water_body`` (id of an AWEI TaskOutput of a
+    detected water body), ``bbox`` or a GeoJSON ``geometry`` in EPSG:4326.
+    ``calc_types`` defaults to AWEI and NDCI, ``start_date`` and
+    ``end_date`` are optional. No analysis is started; months without
+    stored outputs are listed in ``missing``.
+    """
+    authentication_classes = [
+        TokenAuthentication,
+        BasicAuthentication,
+        SessionAuthentication,
+    ]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return self.time_series(request.GET)
+
+    def post(self, request):
+        return self.time_series(request.data)
+
+    @staticmethod
+    def get_geometry(params):
+        water_body = params.get('water_body')
+        if water_body:
+            geometry = water_body_geometry(int(water_body))
+            if geometry is None:
+                raise ValueError(f"Water body {water_body} not found.")
+            return geometry
+        return GEOSGeometry(json.dumps(geometry_from_params(params)), srid=4326)
+
+    @staticmethod
+    def get_calc_types(params):
+        calc_types = params.get('calc_types') or DEFAULT_TIME_SERIES_TYPES
+        if isinstance(calc_types, str):
+            calc_types = calc_types.split(',')
+        return [calc_type.strip().upper() for calc_type in calc_types if calc_type.strip()]
+
+    def time_series(self, params):
+        try:
+            geometry = self.get_geometry(params)
+            if geometry.area == 0:
+                raise ValueError("Geometry must have an area.")
+            start_date = params.get('start_date')
+            end_date = params.get('end_date')
+            if start_date:
+                start_date = date.fromisoformat(start_date)
+            if end_date:
+                end_date = date.fromisoformat(end_date)
+        except (ValueError, TypeError, AttributeError, GEOSException) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        calc_types = self.get_calc_types(params)
+        result = build_time_series(geometry, calc_types, start_date, end_date)
+        return Response({
+            'bbox': list(geometry.extent),
+            'calc_types': calc_types,
+            'start_date': start_date.isoformat() if start_date else None,
+            'end_date': end_date.isoformat() if end_date else None,
+            **result,
+        })
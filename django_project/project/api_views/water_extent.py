@@ -41,6 +41,8 @@ class BaseTaskStatusView(APIView):
             # Only inject known extra fields if present
             if "area_km2" in result.result:
                 response["area_km2"] = result.result["area_km2"]
+            if "monthly_area_km2" in result.result:
+                response["monthly_area_km2"] = result.result["monthly_area_km2"]
 
         return Response(response, status=status.HTTP_200_OK)
 
@@ -94,17 +96,12 @@ class AWEIWaterExtentView(APIView):
         normalized_parameters = json.loads(json.dumps(parameters, sort_keys=True))
 
         # Check if task with same parameters already exists
-        try:
-            task, created = AnalysisTask.objects.get_or_create(
-                parameters=normalized_parameters,
-                defaults={
-                    "task_name": f"Water Extent - {request.user.username}",
-                    "created_by": request.user,
-                })
-        except AnalysisTask.MultipleObjectsReturned:
-            task = AnalysisTask.objects.filter(
-                parameters=normalized_parameters).order_by('-created_at').first()
-            created = False
+        task, created = AnalysisTask.objects.get_or_create_for_parameters(
+            normalized_parameters,
+            defaults={
+                "task_name": f"Water Extent - {request.user.username}",
+                "created_by": request.user,
+            })
 
         if not created:
             return Response(
@@ -7,4 +7,7 @@ class ProjectConfig(AppConfig):
 
     def ready(self):
         """App ready handler."""
-        from project.tasks.store_data import update_stored_data  # noqa
\ No newline at end of file
+        from project.tasks.store_data import update_stored_data  # noqa
+        from project.tasks.task_log import manage_task_log_partitions  # noqa
+        from project.tasks.batch import run_analysis_group_task  # noqa
+        from project.tasks.scratch import reclaim_scratch_space  # noqa
@@ -0,0 +1,11 @@
+import django_filters
+from project.models.pollution import PollutionStatistic
+
+
+class PollutionStatisticFilter(django_filters.FilterSet):
+    from_date = django_filters.DateFilter(field_name="observation_date", lookup_expr="gte")
+    to_date = django_filters.DateFilter(field_name="observation_date", lookup_expr="lte")
+
+    class Meta:
+        model = PollutionStatistic
+        fields = ['task__uuid', 'source_type', 'source_id', 'monitoring_type__name']
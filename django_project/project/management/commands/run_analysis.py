@@ -3,7 +3,6 @@ from pystac_client import Client
 from django.utils import timezone
 import pandas as pd
 
-import matplotlib.pyplot as plt
 from odc.stac import configure_rio, stac_load
 from project.utils.calculations.analysis import Analysis
 from project.models import AnalysisTask
@@ -0,0 +1,74 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from project.utils.benchmarks.suite import (
+    CASES,
+    DEFAULT_SIZES,
+    REGRESSION_THRESHOLD,
+    SIZES,
+    compare,
+    run_benchmarks,
+)
+
+
+class Command(BaseCommand):
+    help = "Time the raster analysis hot paths on synthetic scenes, offline"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes",
+                            nargs="+",
+                            choices=list(SIZES),
+                            default=list(DEFAULT_SIZES),
+                            help="Sizes of the synthetic scenes")
+        parser.add_argument("--cases",
+                            nargs="+",
+                            choices=list(CASES),
+                            help="Cases to run, all by default")
+        parser.add_argument("--repeat",
+                            type=int,
+                            default=3,
+                            help="Runs of every case")
+        parser.add_argument("--directory",
+                            help="Directory of the synthetic inputs, temporary by default")
+        parser.add_argument("--output",
+                            help="Path of the JSON report")
+        parser.add_argument("--compare",
+                            help="Path of a JSON report to compare with, e.g. of the base commit")
+        parser.add_argument("--threshold",
+                            type=float,
+                            default=REGRESSION_THRESHOLD,
+                            help="Ratio of the median times reported as a regression")
+
+    def handle(self, *args, **options):
+        report = run_benchmarks(
+            sizes=options["sizes"],
+            cases=options["cases"],
+            repeat=options["repeat"],
+            directory=options["directory"],
+        )
+
+        for result in report["results"]:
+            self.stdout.write(
+                f"{result['case']:<32} {result['size']:<8} "
+                f"min {result['min']:.3f}s median {result['median']:.3f}s"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report saved: {options['output']}"))
+
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                baseline = json.load(f)
+            self.stdout.write(f"Compared with {baseline.get('commit') or options['compare']}")
+            rows = compare(report, baseline, options["threshold"])
+            for row in rows:
+                line = (
+                    f"{row['case']:<32} {row['size']:<8} "
+                    f"{row['baseline']:.3f}s -> {row['median']:.3f}s x{row['ratio']}"
+                )
+                self.stdout.write(self.style.ERROR(line) if row["regression"] else line)
+            regressions = [row for row in rows if row["regression"]]
+            if regressions:
+                raise CommandError(f"{len(regressions)} cases are slower than the baseline")
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from project.utils.scratch import reclaim_orphans, scratch_usage
+
+
+class Command(BaseCommand):
+    help = "Report the usage of the scratch space of this worker"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reclaim",
+                            action="store_true",
+                            help="Remove the directories of dead processes and stale hosts first")
+
+    def handle(self, *args, **options):
+        if options["reclaim"]:
+            removed = reclaim_orphans()
+            self.stdout.write(self.style.NOTICE(f"Reclaimed {len(removed)} directories"))
+
+        for usage in scratch_usage():
+            budget = f"{usage['budget'] / 1024 ** 2:.1f} MB" if usage['budget'] else "unlimited"
+            self.stdout.write(
+                f"{usage['path']}: {usage['directories']} directories "
+                f"({usage['orphans']} orphaned), "
+                f"{usage['size'] / 1024 ** 2:.1f} MB used, "
+                f"{usage['reserved'] / 1024 ** 2:.1f} MB reserved, "
+                f"{usage['free'] / 1024 ** 2:.1f} MB free, budget {budget}"
+            )
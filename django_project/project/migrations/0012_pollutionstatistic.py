@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-18 22:11
+
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0011_crawlprogress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PollutionStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_type', models.CharField(choices=[('point', 'Point'), ('non_point', 'Non-point')], max_length=20)),
+                ('source_id', models.CharField(max_length=100)),
+                ('geometry', django.contrib.gis.db.models.fields.GeometryField(blank=True, null=True, srid=4326)),
+                ('observation_date', models.DateField()),
+                ('raster_count', models.IntegerField(default=0)),
+                ('pixel_count', models.IntegerField(default=0)),
+                ('mean', models.FloatField(blank=True, null=True)),
+                ('min', models.FloatField(blank=True, null=True)),
+                ('max', models.FloatField(blank=True, null=True)),
+                ('std', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('monitoring_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='project.monitoringindicatortype')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pollution_statistics', to='project.analysistask')),
+            ],
+            options={
+                'ordering': ['source_type', 'source_id', 'observation_date'],
+                'indexes': [models.Index(fields=['task', 'source_type', 'source_id', 'observation_date'], name='project_pol_task_id_092b94_idx'), models.Index(fields=['monitoring_type', 'observation_date'], name='project_pol_monitor_7f701b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.7 on 2026-10-18 22:13
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import migrations, models
+
+ACTIVE_STATUSES = ['pending', 'running']
+
+
+def backfill_parameters_hash(apps, schema_editor):
+    """
+    Hash the parameters of existing tasks.
+
+    When several active tasks share the same parameters, only the newest keeps
+    the hash so the unique constraint can be created; lookups return the newest
+    task anyway.
+    """
+    AnalysisTask = apps.get_model('project', 'AnalysisTask')
+    active_hashes = set()
+    batch = []
+    tasks = AnalysisTask.objects.exclude(parameters={}).order_by('-created_at')
+    for task in tasks.iterator(chunk_size=1000):
+        if not task.parameters:
+            continue
+        canonical = json.dumps(
+            task.parameters, sort_keys=True, separators=(',', ':'), default=str
+        )
+        parameters_hash = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+        if task.status in ACTIVE_STATUSES:
+            if parameters_hash in active_hashes:
+                continue
+            active_hashes.add(parameters_hash)
+        task.parameters_hash = parameters_hash
+        batch.append(task)
+        if len(batch) >= 1000:
+            AnalysisTask.objects.bulk_update(batch, ['parameters_hash'])
+            batch = []
+    if batch:
+        AnalysisTask.objects.bulk_update(batch, ['parameters_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0012_pollutionstatistic'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysistask',
+            name='parameters_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='SHA-256 of the canonical parameters, used for deduplication', max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_parameters_hash, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='analysistask',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('parameters_hash',), name='unique_active_analysis_task_parameters'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-18 22:17
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0013_analysistask_parameters_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='monitoringindicatortype',
+            index=models.Index(fields=['name'], name='indicator_type_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monitoringindicatortype',
+            index=models.Index(django.db.models.functions.text.Upper('name'), name='indicator_type_upper_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskoutput',
+            index=models.Index(fields=['monitoring_type', 'observation_date'], name='taskoutput_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskoutput',
+            index=models.Index(fields=['task', 'monitoring_type', '-created_at'], name='taskoutput_task_type_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 22:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0014_task_output_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tasklog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
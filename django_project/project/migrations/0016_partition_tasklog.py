@@ -0,0 +1,84 @@
+# Generated by Django 5.1.7 on 2026-10-18 22:22
+
+from datetime import date
+
+from django.db import migrations, models
+from django.utils import timezone
+
+PARTITIONS_AHEAD = 2
+
+
+def month_start(value, months=0):
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_task_log(apps, schema_editor):
+    """
+    Recreate the TaskLog table partitioned by month of timestamp, with one
+    partition per month of existing logs and a default partition.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('ALTER TABLE project_tasklog RENAME TO project_tasklog_old')
+        cursor.execute(
+            'ALTER TABLE project_tasklog_old '
+            'RENAME CONSTRAINT project_tasklog_pkey TO project_tasklog_old_pkey'
+        )
+        cursor.execute(
+            """
+            CREATE TABLE project_tasklog (
+                uuid uuid NOT NULL,
+                log text NOT NULL,
+                level integer NOT NULL,
+                "timestamp" timestamp with time zone NOT NULL,
+                content_type_id integer NOT NULL
+                    REFERENCES django_content_type (id) DEFERRABLE INITIALLY DEFERRED,
+                object_id varchar(36) NOT NULL,
+                PRIMARY KEY (uuid, "timestamp")
+            ) PARTITION BY RANGE ("timestamp")
+            """
+        )
+        cursor.execute('CREATE TABLE project_tasklog_default PARTITION OF project_tasklog DEFAULT')
+
+        cursor.execute('SELECT min("timestamp") FROM project_tasklog_old')
+        first = cursor.fetchone()[0]
+        today = timezone.now().date()
+        month = month_start(first.date() if first else today)
+        last = month_start(today, PARTITIONS_AHEAD)
+        while month <= last:
+            cursor.execute(
+                f'CREATE TABLE project_tasklog_p{month.year}_{month.month:02d} '
+                f'PARTITION OF project_tasklog FOR VALUES FROM (%s) TO (%s)',
+                [month, month_start(month, 1)]
+            )
+            month = month_start(month, 1)
+
+        cursor.execute(
+            'INSERT INTO project_tasklog (uuid, log, level, "timestamp", content_type_id, object_id) '
+            'SELECT uuid, log, level, "timestamp", content_type_id, object_id '
+            'FROM project_tasklog_old'
+        )
+        cursor.execute('DROP TABLE project_tasklog_old')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('project', '0015_tasklog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='tasklog',
+            name='project_tas_content_b8874f_idx',
+        ),
+        migrations.RunPython(partition_task_log, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='tasklog',
+            index=models.Index(fields=['content_type', 'object_id', 'timestamp'], name='tasklog_object_timestamp_idx'),
+        ),
+    ]
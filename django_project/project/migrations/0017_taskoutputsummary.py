@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-18 22:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0016_partition_tasklog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskOutputSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pixel_count', models.BigIntegerField(default=0)),
+                ('valid_count', models.BigIntegerField(default=0)),
+                ('valid_fraction', models.FloatField(default=0)),
+                ('mean', models.FloatField(blank=True, null=True)),
+                ('std', models.FloatField(blank=True, null=True)),
+                ('min', models.FloatField(blank=True, null=True)),
+                ('max', models.FloatField(blank=True, null=True)),
+                ('p5', models.FloatField(blank=True, null=True)),
+                ('p50', models.FloatField(blank=True, null=True)),
+                ('p95', models.FloatField(blank=True, null=True)),
+                ('water_area_km2', models.FloatField(blank=True, help_text='Area of AWEI pixels above the water threshold', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('output', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='project.taskoutput')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['mean'], name='project_tas_mean_7243b9_idx'), models.Index(fields=['water_area_km2'], name='project_tas_water_a_9896fc_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-18 22:34
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0017_taskoutputsummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisBatch',
+            fields=[
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('batch_type', models.CharField(choices=[('analysis', 'Analysis'), ('water_extent', 'Water Extent')], default='analysis', max_length=20)),
+                ('parameters', models.JSONField(default=dict, help_text='Parameters shared by all tasks of the batch')),
+                ('celery_group_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('tasks', models.ManyToManyField(blank=True, related_name='batches', to='project.analysistask')),
+            ],
+            options={
+                'verbose_name_plural': 'Analysis batches',
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.7 on 2026-10-18 22:38
+
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+import project.models.monitor
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0018_analysisbatch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crawler',
+            name='output_mode',
+            field=models.CharField(choices=[('cog', 'COG per water body'), ('zarr', 'Zarr data cube')], default='cog', help_text='Store monthly outputs as COG files or in a Zarr data cube', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='taskoutput',
+            name='file',
+            field=models.FileField(blank=True, upload_to=project.models.monitor.output_layer_dir_path),
+        ),
+        migrations.CreateModel(
+            name='DataCube',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(help_text='Path of the Zarr store', max_length=512)),
+                ('crs', models.CharField(default='EPSG:6933', max_length=32)),
+                ('resolution', models.FloatField()),
+                ('origin_x', models.FloatField(help_text='Left edge of the grid in the cube CRS')),
+                ('origin_y', models.FloatField(help_text='Top edge of the grid in the cube CRS')),
+                ('width', models.IntegerField()),
+                ('height', models.IntegerField()),
+                ('start_date', models.DateField(help_text='Month of the first time step')),
+                ('bbox', django.contrib.gis.db.models.fields.PolygonField(srid=4326)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('crawler', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='datacube', to='project.crawler')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='taskoutput',
+            name='datacube',
+            field=models.ForeignKey(blank=True, help_text='Data cube holding the output, at the observation date', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='outputs', to='project.datacube'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-18 22:45
+
+import project.models.monitor
+import project.utils.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0019_datacube'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='taskoutput',
+            name='file',
+            field=models.FileField(blank=True, storage=project.utils.storage.output_storage, upload_to=project.models.monitor.output_layer_dir_path),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 22:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0020_task_output_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysistask',
+            name='stage_metrics',
+            field=models.JSONField(blank=True, default=dict, help_text='Wall time, bytes read, peak RSS and dask tasks per stage of the analysis'),
+        ),
+    ]
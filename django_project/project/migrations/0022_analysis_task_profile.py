@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 22:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0021_analysis_task_stage_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysistask',
+            name='profile',
+            field=models.BooleanField(default=False, help_text='Profile the analysis and attach the profiles as diagnostic outputs'),
+        ),
+    ]
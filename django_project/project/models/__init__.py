@@ -12,3 +12,7 @@ from project.models.monitor import (
 )
 from project.models.logs import (APIUsageLog, DataIngestionLog, ErrorLog, UserActivityLog, TaskLog)
 from project.models.external_data_source import ExternalDataSource
+from project.models.pollution import PollutionStatistic
+from project.models.summary import TaskOutputSummary
+from project.models.batch import AnalysisBatch
+from project.models.datacube import DataCube
@@ -0,0 +1,72 @@
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.contrib.gis.db import models
+from django.utils.translation import gettext_lazy as _
+
+from project.models.monitor import AnalysisTask, Status
+
+User = get_user_model()
+
+
+class AnalysisBatch(models.Model):
+    """
+    Group of analysis or water extent tasks submitted in one request.
+    """
+
+    class BatchType(models.TextChoices):
+        ANALYSIS = 'analysis', _('Analysis')
+        WATER_EXTENT = 'water_extent', _('Water Extent')
+
+    uuid = models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True)
+    batch_type = models.CharField(
+        max_length=20,
+        choices=BatchType.choices,
+        default=BatchType.ANALYSIS
+    )
+    parameters = models.JSONField(
+        default=dict,
+        help_text="Parameters shared by all tasks of the batch"
+    )
+    tasks = models.ManyToManyField(AnalysisTask, related_name='batches', blank=True)
+    celery_group_id = models.CharField(max_length=255, null=True, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = 'Analysis batches'
+
+    def __str__(self):
+        return f"{self.get_batch_type_display()} batch {self.uuid}"
+
+    def progress(self):
+        """
+        Return the status counts of the tasks of the batch, with the tasks.
+        """
+        tasks = list(self.tasks.values('uuid', 'status', 'parameters__bbox'))
+        counts = {choice: 0 for choice in Status.values}
+        for task in tasks:
+            counts[task['status']] += 1
+
+        total = len(tasks)
+        finished = counts[Status.COMPLETED] + counts[Status.FAILED]
+        if finished < total:
+            batch_status = Status.RUNNING if finished or counts[Status.RUNNING] else Status.PENDING
+        elif counts[Status.FAILED]:
+            batch_status = Status.FAILED
+        else:
+            batch_status = Status.COMPLETED
+        return {
+            'status': batch_status,
+            'total': total,
+            'progress': round(finished / total, 4) if total else 1.0,
+            **counts,
+            'tasks': [
+                {
+                    'task_uuid': task['uuid'],
+                    'status': task['status'],
+                    'bbox': task['parameters__bbox'],
+                }
+                for task in tasks
+            ],
+        }
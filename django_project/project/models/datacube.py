@@ -0,0 +1,63 @@
+import os
+
+from django.conf import settings
+from django.contrib.gis.db import models
+from django.contrib.gis.geos import Polygon
+
+from project.models.monitor import Crawler
+
+
+class DataCube(models.Model):
+    """
+    Chunked Zarr store with the monthly indices of a crawler.
+
+    The store covers the crawler bbox on a fixed grid in ``crs``, with one
+    array per index of shape (time, y, x). The time axis is monthly and
+    starts at ``start_date``.
+    """
+
+    crawler = models.OneToOneField(
+        Crawler,
+        related_name='datacube',
+        on_delete=models.CASCADE
+    )
+    path = models.CharField(max_length=512, help_text="Path of the Zarr store")
+    crs = models.CharField(max_length=32, default='EPSG:6933')
+    resolution = models.FloatField()
+    origin_x = models.FloatField(help_text="Left edge of the grid in the cube CRS")
+    origin_y = models.FloatField(help_text="Top edge of the grid in the cube CRS")
+    width = models.IntegerField()
+    height = models.IntegerField()
+    start_date = models.DateField(help_text="Month of the first time step")
+    bbox = models.PolygonField(srid=4326)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Data cube of {self.crawler}"
+
+    @classmethod
+    def get_or_create_for_crawler(cls, crawler):
+        """Return the data cube of a crawler, creating its grid on first use."""
+        from project.utils.datacube import TIME_ORIGINS, cube_grid
+
+        try:
+            return crawler.datacube
+        except cls.DoesNotExist:
+            pass
+        bbox = crawler.bbox.extent
+        origin_x, origin_y, width, height = cube_grid(bbox, crawler.resolution)
+        cube, _ = cls.objects.get_or_create(
+            crawler=crawler,
+            defaults={
+                'path': os.path.join(settings.DATACUBE_DIR, f'crawler_{crawler.pk}.zarr'),
+                'resolution': crawler.resolution,
+                'origin_x': origin_x,
+                'origin_y': origin_y,
+                'width': width,
+                'height': height,
+                'start_date': TIME_ORIGINS[crawler.image_type],
+                'bbox': Polygon.from_bbox(bbox),
+            }
+        )
+        return cube
@@ -7,6 +7,7 @@ from project.models.monitor import ScheduledTask
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -66,21 +67,51 @@ class ErrorLog(models.Model):
         return f"Error {self.id} - {self.module_name}"
 
 
+class TaskLogQuerySet(models.QuerySet):
+
+    def for_object(self, obj):
+        """
+        Return the logs of ``obj``.
+
+        Logs cannot be older than the object, so its creation time bounds the
+        monthly partitions that are scanned.
+        """
+        queryset = self.filter(
+            content_type=ContentType.objects.get_for_model(obj),
+            object_id=str(obj.pk),
+        )
+        created_at = getattr(obj, 'created_at', None) or getattr(obj, 'started_at', None)
+        if created_at:
+            queryset = queryset.filter(timestamp__gte=created_at)
+        return queryset
+
+
 class TaskLog(models.Model):
+    """
+    Log of a task, stored in a table partitioned by month of ``timestamp``.
+
+    Partitions are created ahead and dropped after TASK_LOG_RETENTION_MONTHS
+    by the ``manage_task_log_partitions`` task.
+    """
     uuid = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     log = models.TextField()
     level = models.IntegerField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.CharField(max_length=36, null=False, blank=False)
     content_object = GenericForeignKey("content_type", "object_id")
 
+    objects = TaskLogQuerySet.as_manager()
+
     def __str__(self):
         return self.log
 
     class Meta:
         indexes = [
-            models.Index(fields=["content_type", "object_id"]),
+            models.Index(
+                fields=["content_type", "object_id", "timestamp"],
+                name="tasklog_object_timestamp_idx"
+            ),
         ]
 
 
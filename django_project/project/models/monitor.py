@@ -1,15 +1,24 @@
+import hashlib
+import json
 import logging
 import uuid
+from contextlib import contextmanager
 
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.contrib.gis.geos import Polygon
-from django.db.models import F
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Upper
 from django.contrib.gis.db import models
 
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from project.models.dataset import Dataset
+from project.utils.storage import gdal_path, output_storage
+
+logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
@@ -34,6 +43,9 @@ class MonitoringIndicatorType(models.Model):
         SABI = 'SABI', _('SABI')
         CDOM = 'CDOM', _('CDOM')
 
+    # Type of the diagnostic outputs of a task, e.g. profiles; not an index
+    DIAGNOSTIC = 'PROFILE'
+
     name = models.TextField(null=False, blank=False)
     description = models.TextField(null=True, blank=True)
 
@@ -44,9 +56,28 @@ class MonitoringIndicatorType(models.Model):
         max_length=25,
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['name'], name='indicator_type_name_idx'),
+            # name__iexact is compiled to UPPER(name) = UPPER(value)
+            models.Index(Upper('name'), name='indicator_type_upper_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
+    @classmethod
+    def diagnostic(cls):
+        """Return the type of diagnostic outputs, creating it when missing."""
+        indicator_type, _ = cls.objects.get_or_create(
+            monitoring_indicator_type=cls.DIAGNOSTIC,
+            defaults={
+                'name': cls.DIAGNOSTIC,
+                'description': 'Diagnostic output of a task, e.g. a profile',
+            }
+        )
+        return indicator_type
+
 
 class MonitoringIndicator(models.Model):
     """
@@ -95,6 +126,56 @@ class ScheduledTask(models.Model):
         return self.task_name
 
 
+ACTIVE_STATUSES = [Status.PENDING, Status.RUNNING]
+TASK_STATUS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def hash_parameters(parameters):
+    """Return a canonical SHA-256 hash of task parameters."""
+    canonical = json.dumps(parameters, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class AnalysisTaskQuerySet(models.QuerySet):
+
+    def get_or_create_for_parameters(self, parameters, defaults=None):
+        """
+        Return the latest task with the same parameters, or create one.
+
+        Lookup goes through the indexed parameters hash. A concurrent insert
+        of the same parameters is rejected by the unique constraint on active
+        tasks, in which case the task created by the other request is returned.
+        """
+        parameters_hash = hash_parameters(parameters)
+        task = self.filter(parameters_hash=parameters_hash).order_by('-created_at').first()
+        if task:
+            return task, False
+        return self.create_for_parameters(parameters, defaults)
+
+    def create_for_parameters(self, parameters, defaults=None):
+        """
+        Create a task, e.g. to run finished parameters again, unless one with
+        the same parameters is pending or running.
+
+        :return: Tuple of the task and whether it was created; the active
+            task when there is one.
+        """
+        parameters_hash = hash_parameters(parameters)
+        try:
+            with transaction.atomic():
+                task = self.create(
+                    parameters=json.loads(json.dumps(parameters, sort_keys=True)),
+                    parameters_hash=parameters_hash,
+                    **(defaults or {})
+                )
+            return task, True
+        except IntegrityError:
+            task = self.filter(parameters_hash=parameters_hash).order_by('-created_at').first()
+            if task is None:
+                raise
+            return task, False
+
+
 class AnalysisTask(models.Model):
     """
     Tracks analysis tasks.
@@ -107,11 +188,39 @@ class AnalysisTask(models.Model):
                               max_length=25,
                               default=Status.PENDING)
     parameters = models.JSONField(default=dict)
+    parameters_hash = models.CharField(
+        max_length=64,
+        null=True,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text="SHA-256 of the canonical parameters, used for deduplication"
+    )
     started_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     celery_task_id = models.UUIDField(null=True, blank=True)
+    profile = models.BooleanField(
+        default=False,
+        help_text="Profile the analysis and attach the profiles as diagnostic outputs"
+    )
+    stage_metrics = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Wall time, bytes read, peak RSS and dask tasks per stage of the analysis"
+    )
+
+    objects = AnalysisTaskQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['parameters_hash'],
+                condition=Q(status__in=ACTIVE_STATUSES),
+                name='unique_active_analysis_task_parameters',
+            ),
+        ]
 
     def __str__(self):
         return self.task_name
@@ -120,20 +229,87 @@ class AnalysisTask(models.Model):
         self.status = Status.RUNNING
         self.started_at = timezone.now()
         self.save()
+        self.cache_status()
 
     def complete(self):
         self.status = Status.COMPLETED
         self.completed_at = timezone.now()
         self.save()
+        self.cache_status()
 
     def failed(self):
         self.status = Status.FAILED
         self.completed_at = timezone.now()
         self.save()
+        self.cache_status()
+
+    @staticmethod
+    def status_cache_key(task_uuid):
+        return f'analysis-task-status:{task_uuid}'
+
+    def status_entry(self):
+        """Return the status of the task with the time it last changed."""
+        updated_at = self.completed_at or self.started_at or self.created_at
+        return {
+            'status': self.status,
+            'updated_at': updated_at.isoformat() if updated_at else None,
+        }
+
+    def cache_status(self):
+        """
+        Store the status in the cache, so status polling does not hit the database.
+        """
+        try:
+            cache.set(
+                self.status_cache_key(self.uuid),
+                self.status_entry(),
+                TASK_STATUS_CACHE_TIMEOUT
+            )
+        except Exception as e:
+            logger.warning(f"Failed caching status of task {self.uuid}: {e}")
+
+    @classmethod
+    def get_cached_status(cls, task_uuid):
+        """
+        Return the cached status entry of a task, loading it from the database
+        on a cache miss. Returns None when the task does not exist.
+        """
+        try:
+            entry = cache.get(cls.status_cache_key(task_uuid))
+        except Exception as e:
+            logger.warning(f"Failed reading cached status of task {task_uuid}: {e}")
+            entry = None
+        if entry is None:
+            task = cls.objects.filter(uuid=task_uuid).only(
+                'status', 'started_at', 'completed_at', 'created_at'
+            ).first()
+            if task is None:
+                return None
+            task.cache_status()
+            entry = task.status_entry()
+        return entry
+
+    def add_stage_metrics(self, metrics):
+        """
+        Add the :class:`~project.utils.instrumentation.StageMetrics` of a run
+        to the stored ones, a task can run several analyses.
+        """
+        from project.utils.instrumentation import StageMetrics
+
+        merged = StageMetrics()
+        merged.merge(self.stage_metrics or {})
+        merged.merge(metrics.to_dict())
+        self.stage_metrics = merged.to_dict()
+        self.save(update_fields=['stage_metrics'])
 
     def add_log(self, log, level=logging.INFO):
         from project.models.logs import TaskLog
 
+        log_buffer = getattr(self, '_log_buffer', None)
+        if log_buffer is not None:
+            log_buffer.add(log, level)
+            return
+
         task_log = TaskLog(
             content_object=self,
             log=log,
@@ -141,6 +317,25 @@ class AnalysisTask(models.Model):
         )
         task_log.save()
 
+    @contextmanager
+    def buffered_logs(self, **kwargs):
+        """
+        Buffer :meth:`add_log` calls and write them in batches.
+
+        Buffered logs are written when the block exits, also on errors.
+        Keyword arguments are passed to :class:`~project.utils.task_log.TaskLogBuffer`.
+        """
+        from project.utils.task_log import TaskLogBuffer
+
+        previous = getattr(self, '_log_buffer', None)
+        self._log_buffer = TaskLogBuffer(self, **kwargs)
+        try:
+            yield self._log_buffer
+        finally:
+            log_buffer = self._log_buffer
+            self._log_buffer = previous
+            log_buffer.flush()
+
 
 def output_layer_dir_path(instance, filename):
     """Return upload directory path for Output Layer."""
@@ -161,7 +356,15 @@ class TaskOutput(models.Model):
         MONTHLY = 'monthly', _('Monthly')
 
     task = models.ForeignKey(AnalysisTask, related_name='task_outputs', on_delete=models.CASCADE)
-    file = models.FileField(upload_to=output_layer_dir_path)
+    file = models.FileField(upload_to=output_layer_dir_path, storage=output_storage, blank=True)
+    datacube = models.ForeignKey(
+        'project.DataCube',
+        related_name='outputs',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        help_text="Data cube holding the output, at the observation date"
+    )
     size = models.BigIntegerField(default=0)
     monitoring_type = models.ForeignKey(MonitoringIndicatorType, on_delete=models.CASCADE)
     period = models.CharField(
@@ -174,10 +377,27 @@ class TaskOutput(models.Model):
         null=True,
         blank=True
     )
-    bbox = models.PolygonField(null=True, blank=True, srid=4326)
+    bbox = models.PolygonField(null=True, blank=True, srid=4326, spatial_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['monitoring_type', 'observation_date'],
+                name='taskoutput_type_date_idx'
+            ),
+            models.Index(
+                fields=['task', 'monitoring_type', '-created_at'],
+                name='taskoutput_task_type_idx'
+            ),
+        ]
+
+    @property
+    def file_path(self):
+        """Path of the output file for GDAL, on local or object storage."""
+        return gdal_path(self.file) if self.file else None
+
 
 class Province(models.Model):
     """Stores information about provinces.
@@ -214,6 +434,10 @@ class Crawler(models.Model):
         LANDSAT = 'landsat', _('landsat')
         SENTINEL = 'sentinel', _('sentinel')
 
+    class OutputMode(models.TextChoices):
+        COG = 'cog', _('COG per water body')
+        ZARR = 'zarr', _('Zarr data cube')
+
     name = models.CharField(max_length=100)
     description = models.TextField(null=True, blank=True)
     province = models.ForeignKey(Province, on_delete=models.CASCADE, null=True, blank=True)
@@ -223,6 +447,12 @@ class Crawler(models.Model):
         default=ImageType.SENTINEL,
     )
     resolution = models.IntegerField(default=20)
+    output_mode = models.CharField(
+        max_length=10,
+        choices=OutputMode.choices,
+        default=OutputMode.COG,
+        help_text="Store monthly outputs as COG files or in a Zarr data cube"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(
         User,
@@ -0,0 +1,43 @@
+from django.contrib.gis.db import models
+from django.utils.translation import gettext_lazy as _
+
+from project.models.monitor import AnalysisTask, MonitoringIndicatorType
+
+
+class PollutionStatistic(models.Model):
+    """
+    Index statistics of one pollution source for one month,
+    produced by a batch pollution analysis task.
+    """
+
+    class SourceType(models.TextChoices):
+        POINT = 'point', _('Point')
+        NON_POINT = 'non_point', _('Non-point')
+
+    task = models.ForeignKey(
+        AnalysisTask,
+        related_name='pollution_statistics',
+        on_delete=models.CASCADE
+    )
+    source_type = models.CharField(max_length=20, choices=SourceType.choices)
+    source_id = models.CharField(max_length=100)
+    geometry = models.GeometryField(srid=4326, null=True, blank=True)
+    monitoring_type = models.ForeignKey(MonitoringIndicatorType, on_delete=models.CASCADE)
+    observation_date = models.DateField()
+    raster_count = models.IntegerField(default=0)
+    pixel_count = models.IntegerField(default=0)
+    mean = models.FloatField(null=True, blank=True)
+    min = models.FloatField(null=True, blank=True)
+    max = models.FloatField(null=True, blank=True)
+    std = models.FloatField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['source_type', 'source_id', 'observation_date']
+        indexes = [
+            models.Index(fields=['task', 'source_type', 'source_id', 'observation_date']),
+            models.Index(fields=['monitoring_type', 'observation_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.source_type} {self.source_id} {self.observation_date}"
@@ -0,0 +1,40 @@
+from django.contrib.gis.db import models
+
+from project.models.monitor import TaskOutput
+
+
+class TaskOutputSummary(models.Model):
+    """
+    Summary statistics of a TaskOutput raster, computed when it is exported.
+    """
+
+    output = models.OneToOneField(
+        TaskOutput,
+        related_name='summary',
+        on_delete=models.CASCADE
+    )
+    pixel_count = models.BigIntegerField(default=0)
+    valid_count = models.BigIntegerField(default=0)
+    valid_fraction = models.FloatField(default=0)
+    mean = models.FloatField(null=True, blank=True)
+    std = models.FloatField(null=True, blank=True)
+    min = models.FloatField(null=True, blank=True)
+    max = models.FloatField(null=True, blank=True)
+    p5 = models.FloatField(null=True, blank=True)
+    p50 = models.FloatField(null=True, blank=True)
+    p95 = models.FloatField(null=True, blank=True)
+    water_area_km2 = models.FloatField(
+        null=True,
+        blank=True,
+        help_text="Area of AWEI pixels above the water threshold"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['mean']),
+            models.Index(fields=['water_area_km2']),
+        ]
+
+    def __str__(self):
+        return f"Summary of {self.output}"
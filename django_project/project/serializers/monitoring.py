@@ -1,13 +1,26 @@
 # serializers.py
 from rest_framework import serializers
-from project.models import AnalysisTask, TaskOutput
+from project.models import AnalysisTask, TaskOutput, TaskOutputSummary
+
+
+class TaskOutputSummarySerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = TaskOutputSummary
+        fields = [
+            'pixel_count', 'valid_count', 'valid_fraction', 'mean', 'std', 'min', 'max',
+            'p5', 'p50', 'p95', 'water_area_km2'
+        ]
 
 
 class TaskOutputSerializer(serializers.ModelSerializer):
     file = serializers.SerializerMethodField()
     monitoring_type = serializers.SerializerMethodField()
+    summary = TaskOutputSummarySerializer(read_only=True, allow_null=True)
 
     def get_file(self, obj):
+        if not obj.file:
+            return None
         request = self.context.get('request')
         if request is not None:
             return request.build_absolute_uri(obj.file.url)
@@ -21,16 +34,21 @@ class TaskOutputSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'task_id', 'file', 'size',
             'monitoring_type', 'created_at', 'observation_date',
-            'period'
+            'period', 'datacube', 'summary'
         ]
 
 
-class AnalysisTaskStatusSerializer(serializers.ModelSerializer):
-    task_outputs = TaskOutputSerializer(many=True, read_only=True)
+class AnalysisTaskSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = AnalysisTask
         fields = [
-            'uuid', 'task_name', 'status', 'parameters', 'started_at', 'completed_at', 'created_at',
-            'task_outputs'
+            'uuid', 'task_name', 'status', 'parameters', 'started_at', 'completed_at', 'created_at'
         ]
+
+
+class AnalysisTaskStatusSerializer(AnalysisTaskSerializer):
+    task_outputs = TaskOutputSerializer(many=True, read_only=True)
+
+    class Meta(AnalysisTaskSerializer.Meta):
+        fields = AnalysisTaskSerializer.Meta.fields + ['task_outputs']
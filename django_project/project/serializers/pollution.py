@@ -0,0 +1,15 @@
+from rest_framework import serializers
+from project.models import PollutionStatistic
+
+
+class PollutionStatisticSerializer(serializers.ModelSerializer):
+    monitoring_type = serializers.CharField(source='monitoring_type.name', read_only=True)
+    task_id = serializers.UUIDField(read_only=True)
+
+    class Meta:
+        model = PollutionStatistic
+        fields = [
+            'id', 'task_id', 'source_type', 'source_id', 'monitoring_type',
+            'observation_date', 'raster_count', 'pixel_count',
+            'mean', 'min', 'max', 'std'
+        ]
@@ -3,7 +3,7 @@ from celery import current_app
 from celery.utils.log import get_task_logger
 from celery import shared_task
 from core.celery import app
-from project.utils.calculations.analysis import Analysis
+from project.models.datacube import DataCube
 from project.models.monitor import AnalysisTask
 
 logger = get_task_logger(__name__)
@@ -20,32 +20,41 @@ def run_analysis(start_date,
                  task_id=None,
                  mask_path=None,
                  auto_detect_water=True,
-                 image_type='sentinel'):
+                 image_type='sentinel',
+                 items=None,
+                 datacube_id=None,
+                 export_nc_combined=False):
     """Run calculation."""
+    from project.utils.calculations.analysis import Analysis
 
     try:
         task = AnalysisTask.objects.get(uuid=task_id)
     except AnalysisTask.DoesNotExist:
         logger.error(f"Task with id {task_id} does not exist.")
         return False
+    datacube = DataCube.objects.get(pk=datacube_id) if datacube_id else None
 
     task.start()
     try:
-        calculation = Analysis(
-            start_date=start_date,
-            end_date=end_date,
-            bbox=bbox,
-            resolution=resolution,
-            export_nc=export_nc,
-            export_plot=export_plot,
-            export_cog=export_cog,
-            calc_types=calc_types,
-            task=task,
-            mask_path=mask_path,
-            auto_detect_water=auto_detect_water,
-            image_type=image_type
-        )
-        calculation.run()
+        with task.buffered_logs():
+            calculation = Analysis(
+                start_date=start_date,
+                end_date=end_date,
+                bbox=bbox,
+                resolution=resolution,
+                export_nc=export_nc,
+                export_plot=export_plot,
+                export_cog=export_cog,
+                calc_types=calc_types,
+                task=task,
+                mask_path=mask_path,
+                auto_detect_water=auto_detect_water,
+                image_type=image_type,
+                items=items,
+                datacube=datacube,
+                export_nc_combined=export_nc_combined
+            )
+            calculation.run()
     except Exception as e:
         task.add_log(str(e), logging.ERROR)
         task.failed()
@@ -68,10 +77,22 @@ def run_analysis_task(self,
                       task_id=None,
                       mask_path=None,
                       auto_detect_water=True,
-                      image_type='sentinel'):
-    """Run calculation."""
+                      image_type='sentinel',
+                      export_nc_combined=False,
+                      items=None):
+    """
+    Run calculation.
+
+    ``items`` are optional STAC items as dicts, found by a search shared with
+    other tasks; the task searches its scenes itself without them.
+    """
+    from project.utils.calculations.analysis import Analysis
 
     self.update_state(state="RUNNING")
+    if items is not None:
+        import pystac
+
+        items = [pystac.Item.from_dict(item) for item in items]
 
     try:
         task = AnalysisTask.objects.get(uuid=task_id)
@@ -81,21 +102,24 @@ def run_analysis_task(self,
 
     task.start()
     try:
-        calculation = Analysis(
-            start_date=start_date,
-            end_date=end_date,
-            bbox=bbox,
-            resolution=resolution,
-            export_nc=export_nc,
-            export_plot=export_plot,
-            export_cog=export_cog,
-            calc_types=calc_types,
-            task=task,
-            mask_path=mask_path,
-            auto_detect_water=auto_detect_water,
-            image_type=image_type
-        )
-        calculation.run()
+        with task.buffered_logs():
+            calculation = Analysis(
+                start_date=start_date,
+                end_date=end_date,
+                bbox=bbox,
+                resolution=resolution,
+                export_nc=export_nc,
+                export_plot=export_plot,
+                export_cog=export_cog,
+                calc_types=calc_types,
+                task=task,
+                mask_path=mask_path,
+                auto_detect_water=auto_detect_water,
+                image_type=image_type,
+                items=items,
+                export_nc_combined=export_nc_combined
+            )
+            calculation.run()
     except Exception as e:
         task.add_log(str(e), logging.ERROR)
         task.failed()
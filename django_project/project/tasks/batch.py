@@ -0,0 +1,75 @@
+import logging
+from celery import group as celery_group
+from celery.utils.log import get_task_logger
+from core.celery import app
+from project.models.monitor import AnalysisTask
+from project.tasks.analysis import run_analysis_task
+from project.utils.batch import bboxes_intersect
+
+logger = get_task_logger(__name__)
+
+
+@app.task(bind=True, name='run_analysis_group_task')
+def run_analysis_group_task(self, task_ids, bbox, start_date, end_date, image_type='sentinel'):
+    """
+    Run the analysis tasks of a group of nearby bboxes.
+
+    The scenes are searched once for the enclosing ``bbox``; every task is
+    then dispatched as its own ``run_analysis_task`` in a Celery group, with
+    the scenes that overlap its bbox, so the tasks load and compute their
+    data in parallel on the workers.
+    """
+    from project.utils.calculations.analysis import search_stac_items
+
+    self.update_state(state="RUNNING")
+    tasks = list(AnalysisTask.objects.filter(uuid__in=task_ids).order_by('created_at'))
+    try:
+        items = search_stac_items(bbox, start_date, end_date, image_type)
+    except Exception as e:
+        logger.error(f"Failed searching scenes of batch group: {e}")
+        fail_tasks(tasks, f"Failed searching scenes: {e}")
+        self.update_state(state="FAILURE")
+        return False
+
+    signatures = []
+    for task in tasks:
+        parameters = task.parameters
+        task_items = [
+            item.to_dict() for item in items
+            if item.bbox is None or bboxes_intersect(item.bbox, parameters['bbox'])
+        ]
+        signatures.append(run_analysis_task.si(
+            start_date=parameters['start_date'],
+            end_date=parameters['end_date'],
+            bbox=parameters['bbox'],
+            resolution=parameters.get('resolution', 20),
+            export_plot=parameters.get('export_plot', False),
+            export_nc=parameters.get('export_nc', False),
+            export_cog=parameters.get('export_cog', True),
+            calc_types=parameters.get('calc_types'),
+            task_id=str(task.uuid),
+            mask_path=parameters.get('mask_path'),
+            auto_detect_water=parameters.get('auto_detect_water', True),
+            image_type=image_type,
+            items=task_items,
+        ))
+    try:
+        result = celery_group(signatures).apply_async()
+    except Exception as e:
+        logger.error(f"Failed dispatching batch group: {e}")
+        fail_tasks(tasks, f"Failed scheduling the analysis: {e}")
+        self.update_state(state="FAILURE")
+        return False
+
+    for task, task_result in zip(tasks, result.results):
+        task.celery_task_id = task_result.id
+    AnalysisTask.objects.bulk_update(tasks, ['celery_task_id'])
+    self.update_state(state="SUCCESS")
+    return {str(task.uuid): task_result.id for task, task_result in zip(tasks, result.results)}
+
+
+def fail_tasks(tasks, message):
+    """Mark tasks failed with an error log."""
+    for task in tasks:
+        task.add_log(message, logging.ERROR)
+        task.failed()
@@ -0,0 +1,157 @@
+import logging
+from collections import defaultdict
+from celery.utils.log import get_task_logger
+from django.contrib.gis.geos import GEOSGeometry, Polygon
+from core.celery import app
+from project.models.monitor import AnalysisTask, MonitoringIndicatorType, TaskOutput
+from project.models.pollution import PollutionStatistic
+from project.utils.coverage import output_footprint
+from project.utils.datacube import output_raster_path
+from project.utils.scratch import ScratchDirectory
+
+logger = get_task_logger(__name__)
+
+
+def _to_float(value):
+    """Return ``value`` as float, or None if it is NaN."""
+    value = float(value)
+    return None if value != value else value
+
+
+def run_pollution_analysis(task,
+                           start_date,
+                           end_date,
+                           point_sources=None,
+                           non_point_sources=None,
+                           calc_types=None):
+    """
+    Compute a source x month matrix of index statistics from stored outputs.
+
+    Every NDTI/NDCI COG that intersects the sources in the date range is opened
+    once, and statistics for all sources are computed in that single pass.
+    Outputs in a data cube are exported over the sources first. Where the
+    outputs of several tasks overlap, the pixels of the latest task are used.
+    Results replace any previous :class:`PollutionStatistic` rows of ``task``.
+
+    :return: Number of statistic rows stored.
+    """
+    import shapely
+    from project.utils.calculations.pollution import sources_from_geojson
+    from project.utils.calculations.zonal import zonal_statistics_layers
+
+    if not calc_types:
+        calc_types = [MonitoringIndicatorType.Type.NDTI, MonitoringIndicatorType.Type.NDCI]
+
+    sources = sources_from_geojson(point_sources, non_point_sources)
+    if sources.empty:
+        raise ValueError("No pollution sources provided.")
+
+    sources_bbox = Polygon.from_bbox(tuple(sources.total_bounds))
+    sources_bbox.srid = 4326
+    outputs = TaskOutput.objects.filter(
+        monitoring_type__name__in=calc_types,
+        observation_date__gte=start_date,
+        observation_date__lte=end_date,
+        bbox__intersects=sources_bbox,
+    ).select_related('monitoring_type', 'task', 'datacube').order_by(
+        'observation_date', '-task__created_at', 'id'
+    )
+
+    # Rasters of every task, latest task first, per index and date
+    groups = defaultdict(dict)
+    skipped = 0
+    for output in outputs:
+        if not output.datacube_id and not output.file.name.lower().endswith('.tif'):
+            skipped += 1
+            continue
+        tasks = groups[(output.monitoring_type, output.observation_date)]
+        tasks.setdefault(output.task_id, []).append(output)
+    if skipped:
+        task.add_log(f"Skipped {skipped} outputs that are not GeoTIFFs or in a data cube")
+
+    geometries = [GEOSGeometry(geom.wkt, srid=4326) for geom in sources.geometry]
+    statistics = []
+    for (monitoring_type, observation_date), tasks in groups.items():
+        with ScratchDirectory() as scratch:
+            layers = []
+            for task_outputs in tasks.values():
+                paths = [
+                    output_raster_path(output, sources_bbox, scratch.path)
+                    for output in task_outputs
+                ]
+                footprint = shapely.union_all([
+                    shapely.from_wkt(output_footprint(output).wkt) for output in task_outputs
+                ])
+                layers.append((paths, footprint))
+            task.add_log(
+                f"Computing {monitoring_type.name} {observation_date} from "
+                f"{sum(len(paths) for paths, _ in layers)} rasters of {len(layers)} "
+                f"tasks for {len(sources)} sources"
+            )
+            stats = zonal_statistics_layers(layers, sources.geometry)
+        for idx, source in enumerate(sources.itertuples()):
+            statistics.append(
+                PollutionStatistic(
+                    task=task,
+                    source_type=source.source_type,
+                    source_id=source.source_id,
+                    geometry=geometries[idx],
+                    monitoring_type=monitoring_type,
+                    observation_date=observation_date,
+                    raster_count=int(stats["rasters"][idx]),
+                    pixel_count=int(stats["count"][idx]),
+                    mean=_to_float(stats["mean"][idx]),
+                    min=_to_float(stats["min"][idx]),
+                    max=_to_float(stats["max"][idx]),
+                    std=_to_float(stats["std"][idx]),
+                )
+            )
+
+    PollutionStatistic.objects.filter(task=task).delete()
+    PollutionStatistic.objects.bulk_create(statistics, batch_size=1000)
+    task.add_log(f"Stored {len(statistics)} pollution statistics")
+    return len(statistics)
+
+
+@app.task(bind=True, name="run_pollution_analysis_task")
+def run_pollution_analysis_task(self,
+                                task_id,
+                                start_date,
+                                end_date,
+                                point_sources=None,
+                                non_point_sources=None,
+                                calc_types=None):
+    """
+    Celery Task: Batch pollution analysis across stored NDTI/NDCI outputs.
+    """
+    self.update_state(state="RUNNING")
+    try:
+        task = AnalysisTask.objects.get(uuid=task_id)
+    except AnalysisTask.DoesNotExist:
+        error_msg = f"Task with id {task_id} does not exist."
+        logger.error(error_msg)
+        self.update_state(state="FAILURE")
+        return {"error": error_msg}
+
+    task.start()
+    try:
+        with task.buffered_logs():
+            total = run_pollution_analysis(
+                task,
+                start_date,
+                end_date,
+                point_sources=point_sources,
+                non_point_sources=non_point_sources,
+                calc_types=calc_types,
+            )
+    except Exception as e:
+        error_msg = f"Error computing pollution statistics: {str(e)}"
+        logger.error(error_msg)
+        task.add_log(error_msg, logging.ERROR)
+        task.failed()
+        self.update_state(state="FAILURE")
+        raise
+    else:
+        task.complete()
+        self.update_state(state="SUCCESS")
+    return {"statistics": total}
@@ -0,0 +1,12 @@
+from celery.signals import worker_ready
+from celery.utils.log import get_task_logger
+from project.utils.scratch import reclaim_orphans
+
+logger = get_task_logger(__name__)
+
+
+@worker_ready.connect
+def reclaim_scratch_space(**kwargs):
+    """Remove the scratch directories left by dead workers when a worker starts."""
+    removed = reclaim_orphans()
+    logger.info(f"Scratch directories reclaimed: {len(removed)}")
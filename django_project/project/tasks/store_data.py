@@ -2,8 +2,6 @@ import json
 import logging
 import os
 import calendar
-import geopandas as gpd
-from shapely.geometry import box
 from copy import deepcopy
 
 from datetime import date, timedelta
@@ -13,6 +11,7 @@ from core.celery import app
 from django.utils import timezone
 
 from core.settings.utils import absolute_path
+from project.models.datacube import DataCube
 from project.models.monitor import (
     AnalysisTask,
     Crawler,
@@ -23,7 +22,9 @@ from project.models.monitor import (
 )
 from project.models.logs import TaskLog
 from project.tasks.analysis import run_analysis
+from project.utils.datacube import write_window_geotiff
 from project.utils.helper import get_admin_user
+from project.utils.scratch import ScratchDirectory
 
 
 logger = get_task_logger(__name__)
@@ -63,11 +64,23 @@ def process_water_body(self, parameters, task_id, crawler_progress_id):
     )
     all_success = True
     for output in outputs:
-        parameters.update({
-            "bbox": output.bbox.extent,
-            "mask_path": output.file.path,
-        })
-        success = run_analysis(**parameters)
+        with ScratchDirectory() as scratch:
+            mask_path = output.file_path
+            if output.datacube_id:
+                # Water bodies in a data cube have no file, export their mask
+                mask_path = write_window_geotiff(
+                    output.datacube,
+                    MonitoringIndicatorType.Type.AWEI,
+                    output.observation_date,
+                    output.bbox.extent,
+                    os.path.join(scratch.path, f"mask_{output.pk}.tif"),
+                    as_mask=True,
+                )
+            parameters.update({
+                "bbox": output.bbox.extent,
+                "mask_path": mask_path,
+            })
+            success = run_analysis(**parameters)
 
         if not success:
             all_success &= False
@@ -96,6 +109,9 @@ def process_catchment(start_date, end_date, geom, crawler_progress, gdf_waterbod
 
 @app.task(name="process_crawler")
 def process_crawler(start_date, end_date, crawler_id):
+    import geopandas as gpd
+    from shapely.geometry import box
+
     crawler = Crawler.objects.get(id=crawler_id)
 
     bbox = crawler.bbox.extent
@@ -128,10 +144,12 @@ def process_crawler(start_date, end_date, crawler_id):
             "auto_detect_water": True,
             "image_type": crawler.image_type,
         }
+        if crawler.output_mode == Crawler.OutputMode.ZARR:
+            parameters["datacube_id"] = DataCube.get_or_create_for_crawler(crawler).pk
         month = '{:02d}'.format(start_date.month)
         year = start_date.year
-        task, created = AnalysisTask.objects.get_or_create(
-            parameters=parameters,
+        task, created = AnalysisTask.objects.get_or_create_for_parameters(
+            parameters,
             defaults={
                 'task_name': f"Periodic Update {crawler.name} {row.uid} {year}-{month}",
                 'created_by': get_admin_user()
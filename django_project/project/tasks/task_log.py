@@ -0,0 +1,24 @@
+from celery.utils.log import get_task_logger
+from constance import config
+from core.celery import app
+from project.utils.task_log import (
+    create_task_log_partitions,
+    drop_expired_task_log_partitions
+)
+
+logger = get_task_logger(__name__)
+
+
+@app.task(name="manage_task_log_partitions")
+def manage_task_log_partitions():
+    """
+    Celery Task: Create upcoming monthly TaskLog partitions and drop
+    the ones older than TASK_LOG_RETENTION_MONTHS.
+    """
+    created = create_task_log_partitions()
+    dropped = drop_expired_task_log_partitions(config.TASK_LOG_RETENTION_MONTHS)
+    logger.info(f"TaskLog partitions created: {created}, dropped: {dropped}")
+    return {
+        "created": [month.isoformat() for month in created],
+        "dropped": dropped,
+    }
@@ -1,14 +1,22 @@
 import os
 import logging
 from celery.utils.log import get_task_logger
+from django.contrib.gis.geos import Polygon
 from core.celery import app
-from django.core.files import File
 from project.models.monitor import (AnalysisTask, MonitoringIndicatorType, TaskOutput)
 from project.utils.calculations.water_extent import (calculate_water_extent_from_tif,
-                                                     generate_water_mask_from_tif)
+                                                     generate_water_mask_from_tif,
+                                                     water_extent_from_outputs)
+from project.utils.coverage import coverage_index, uncovered_requests
+from project.utils.datacube import output_raster_path
+from project.utils.scratch import ScratchDirectory
+from project.utils.storage import store_file
 
 logger = get_task_logger(__name__)
 
+# Stored output types a water extent can be computed from, in order of preference
+WATER_EXTENT_TYPES = ['AWEI', 'AWEI_MASK']
+
 
 def check_awei_output(task):
     """
@@ -21,6 +29,28 @@ def check_awei_output(task):
     return awei_output
 
 
+def water_extent_coverage(bbox, start_date, end_date, resolution):
+    """
+    Find stored AWEI or AWEI_MASK outputs of any task covering ``bbox``.
+
+    :return: Tuple of ``{month: output_ids}`` for covered months and the
+        coverage entries of the months no stored output covers.
+    """
+    covered = {}
+    uncovered = {}
+    index = coverage_index(bbox, start_date, end_date, WATER_EXTENT_TYPES, resolution)
+    for entry in index:
+        month = entry['month']
+        if month in covered:
+            continue
+        if entry['uncovered_bbox'] is None:
+            covered[month] = entry['output_ids']
+            uncovered.pop(month, None)
+        elif entry['calc_type'] == 'AWEI':
+            uncovered[month] = entry
+    return covered, list(uncovered.values())
+
+
 @app.task(bind=True, name="compute_water_extent_task")
 def compute_water_extent_task(self,
                               task_id,
@@ -32,6 +62,9 @@ def compute_water_extent_task(self,
                               threshold=0.0):
     """
     Celery Task: Compute surface water extent using AWEI output.
+
+    Stored AWEI outputs of any task covering the bbox are reused, and the
+    analysis only runs for the months they do not cover.
     """
     from project.utils.calculations.analysis import Analysis
 
@@ -46,9 +79,34 @@ def compute_water_extent_task(self,
     task.start()
 
     try:
-        awei_output = check_awei_output(task)
-
-        if not awei_output:
+        covered = {}
+        if start_date and end_date:
+            covered, uncovered = water_extent_coverage(
+                bbox, start_date, end_date, spatial_resolution
+            )
+            if covered:
+                task.add_log(f"Reusing stored AWEI outputs for {len(covered)} month(s)")
+            # Only analyse the parts of the months that are not stored yet
+            for request in uncovered_requests(uncovered, start_date, end_date):
+                analysis = Analysis(
+                    start_date=request['start_date'],
+                    end_date=request['end_date'],
+                    bbox=request['bbox'],
+                    resolution=spatial_resolution,
+                    export_nc=False,
+                    export_plot=False,
+                    export_cog=True,
+                    calc_types=['AWEI'],
+                    task=task,
+                    mask_path=None,
+                    auto_detect_water=False
+                )
+                analysis.run()
+            if uncovered:
+                covered, _ = water_extent_coverage(
+                    bbox, start_date, end_date, spatial_resolution
+                )
+        elif not check_awei_output(task):
             analysis = Analysis(
                 start_date=start_date,
                 end_date=end_date,
@@ -64,11 +122,33 @@ def compute_water_extent_task(self,
             )
             analysis.run()
 
-        awei_output = check_awei_output(task)
-        if not awei_output:
-            raise ValueError("AWEI output not found for this task.")
-
-        result = calculate_water_extent_from_tif(awei_output.file.path, threshold=threshold)
+        monthly_area = {}
+        bbox_polygon = Polygon.from_bbox(bbox)
+        bbox_polygon.srid = 4326
+        for month, output_ids in sorted(covered.items()):
+            outputs = TaskOutput.objects.filter(id__in=output_ids).select_related(
+                'datacube', 'monitoring_type'
+            ).order_by('id')
+            # Outputs in a data cube are exported over the bbox first
+            with ScratchDirectory() as scratch:
+                paths = [
+                    output_raster_path(output, bbox_polygon, scratch.path)
+                    for output in outputs
+                    if output.datacube_id or output.file.name.lower().endswith('.tif')
+                ]
+                if paths:
+                    monthly_area[month] = water_extent_from_outputs(
+                        paths, bbox, threshold=threshold
+                    )['area_km2']
+
+        if monthly_area:
+            # The latest month, as with the output of a single analysis
+            result = {"area_km2": monthly_area[max(monthly_area)]}
+        else:
+            awei_output = check_awei_output(task)
+            if not awei_output:
+                raise ValueError("AWEI output not found for this task.")
+            result = calculate_water_extent_from_tif(awei_output.file_path, threshold=threshold)
 
     except Exception as e:
         error_msg = f"Error computing water extent: {str(e)}"
@@ -84,6 +164,8 @@ def compute_water_extent_task(self,
     celery_result = {
         "area_km2": float(result["area_km2"])
     }
+    if monthly_area:
+        celery_result["monthly_area_km2"] = monthly_area
     return celery_result
 
 
@@ -120,21 +202,25 @@ def generate_water_mask_task(self,
             raise ValueError("AWEI output not found for this task.")
 
         # Generate water mask from AWEI file
-        result = generate_water_mask_from_tif(awei_output.file.path, threshold=threshold)
-        mask_path = result["mask_path"]
-
-        # Save to TaskOutput
-        with open(mask_path, "rb") as f:
-            django_file = File(f)
-            django_file.name = os.path.basename(mask_path)
-            output = TaskOutput.objects.create(
+        file_name = os.path.splitext(os.path.basename(awei_output.file.name))[0]
+        with ScratchDirectory() as scratch:
+            result = generate_water_mask_from_tif(
+                awei_output.file_path,
+                mask_output_path=os.path.join(scratch.path, f"{file_name}_mask.tif"),
+                threshold=threshold
+            )
+            mask_path = result["mask_path"]
+
+            # Save to TaskOutput
+            output = TaskOutput(
                 task=task,
-                file=django_file,
                 monitoring_type=MonitoringIndicatorType.objects.get(
                     monitoring_indicator_type="AWEI_MASK"),
                 size=os.path.getsize(mask_path),
                 created_by=task.created_by,
             )
+            store_file(output.file, mask_path)
+            output.save()
 
         task.add_log(f"Water mask generated and saved: {output.file.url}")
         task.complete()
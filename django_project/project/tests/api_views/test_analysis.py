@@ -8,11 +8,13 @@ from core.settings.utils import absolute_path
 from unittest.mock import patch, MagicMock
 from django.urls import reverse
 from django.conf import settings
+from django.contrib.gis.geos import Polygon
 from django.test import override_settings
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from core.factories import UserFactory
-from project.models.monitor import AnalysisTask, Status
+from project.models.monitor import AnalysisTask, MonitoringIndicatorType, Status
+from project.tests.factories.monitor import AnalysisTaskFactory, TaskOutputFactory
 from project.utils.calculations.analysis import Analysis
 
 
@@ -30,7 +32,7 @@ class WaterAnalysisAPIViewTest(APITestCase):
         )
         self.client.force_authenticate(user=self.user)
 
-    def setup_data(self, mock_stac_load, mock_client):
+    def setup_data(self, mock_stac_load, mock_client, **kwargs):
         """Setup dummy data for processing.
         """
 
@@ -55,6 +57,7 @@ class WaterAnalysisAPIViewTest(APITestCase):
             "export_cog": True,
             "export_plot": True,
             "export_nc": True,
+            **kwargs,
         }
 
         # Trigger view POST
@@ -119,6 +122,26 @@ class WaterAnalysisAPIViewTest(APITestCase):
         for output in awei_outputs + ndci_outputs:
             self.assertTrue(os.path.exists(output))
 
+    @patch("project.utils.calculations.analysis.Client")
+    @patch("project.utils.calculations.analysis.stac_load")
+    def test_profile(self, mock_stac_load, mock_client):
+        """Test that a profiled task gets its profiles as diagnostic outputs.
+        """
+        response = self.setup_data(mock_stac_load, mock_client, profile=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        task = AnalysisTask.objects.get(uuid=response.data["task_uuid"])
+        self.assertTrue(task.profile)
+        self.assertEqual(task.status, Status.COMPLETED)
+        self.assertNotIn("profile", task.parameters)
+        profiles = task.task_outputs.filter(
+            monitoring_type__monitoring_indicator_type=MonitoringIndicatorType.DIAGNOSTIC
+        )
+        self.assertEqual(
+            sorted(os.path.splitext(output.file.name)[1] for output in profiles),
+            [".html", ".json"]
+        )
+
     @patch("project.utils.calculations.analysis.Client")
     @patch("project.utils.calculations.analysis.stac_load")
     def test_no_duplicate_task(self, mock_stac_load, mock_client):
@@ -227,3 +250,133 @@ class AnalysisTaskListTest(APITestCase):
         self.assertIn(str(self.user_task.uuid), uuids)
         self.assertNotIn(str(self.admin_task.uuid), uuids)
         self.assertEqual(len(uuids), 1)
+
+
+class WaterAnalysisCoverageTest(APITestCase):
+    """Test that WaterAnalysisAPIView only schedules what stored outputs do not cover.
+    """
+    fixtures = ["monitoring_indicator_type.json"]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+
+        # Stored AWEI and NDCI for March over the western half at 20 m
+        source_task = AnalysisTaskFactory(
+            parameters={"bbox": [19.0, -34.0, 19.5, -33.5], "resolution": 20}
+        )
+        for calc_type in ["AWEI", "NDCI"]:
+            TaskOutputFactory(
+                task=source_task,
+                monitoring_type=MonitoringIndicatorType.objects.get(name=calc_type),
+                observation_date="2025-03-01",
+                bbox=Polygon.from_bbox((19.1, -33.9, 19.2, -33.8)),
+            )
+
+    def post(self, **kwargs):
+        payload = {
+            "start_date": "2025-03-01",
+            "end_date": "2025-04-30",
+            "bbox": [19.0, -34.0, 20.0, -33.5],
+            "calc_types": ["AWEI", "NDCI"],
+            **kwargs,
+        }
+        return self.client.post(reverse("water-analysis"), payload, format="json")
+
+    @patch("project.api_views.analysis.run_analysis_task")
+    def test_schedules_uncovered_parts(self, mock_task):
+        mock_task.delay.return_value = MagicMock(id=str(uuid_lib.uuid4()))
+        response = self.post()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "processing")
+
+        reused = response.data["reused"]
+        self.assertEqual(len(reused), 2)
+        self.assertEqual({entry["month"] for entry in reused}, {"2025-03"})
+        self.assertEqual(reused[0]["coverage"], 0.5)
+
+        scheduled = sorted(response.data["scheduled"], key=lambda piece: piece["start_date"])
+        self.assertEqual(len(scheduled), 2)
+        # Eastern half of March, whole bbox for April
+        self.assertEqual(scheduled[0]["bbox"], [19.5, -34.0, 20.0, -33.5])
+        self.assertEqual(scheduled[0]["end_date"], "2025-03-31")
+        self.assertEqual(scheduled[1]["bbox"], [19.0, -34.0, 20.0, -33.5])
+        self.assertEqual(scheduled[1]["start_date"], "2025-04-01")
+        self.assertEqual(scheduled[1]["calc_types"], ["AWEI", "NDCI"])
+        self.assertEqual(mock_task.delay.call_count, 2)
+
+    @patch("project.api_views.analysis.run_analysis_task")
+    def test_repeated_request_returns_same_body(self, mock_task):
+        mock_task.delay.return_value = MagicMock(id=str(uuid_lib.uuid4()))
+        first = self.post()
+        second = self.post()
+        self.assertEqual(mock_task.delay.call_count, 2)
+        self.assertEqual(second.data["status"], "processing")
+        self.assertEqual(second.data["task_uuid"], first.data["task_uuid"])
+        self.assertEqual(second.data["reused"], first.data["reused"])
+        self.assertEqual(second.data["scheduled"], first.data["scheduled"])
+
+    @patch("project.api_views.analysis.run_analysis_task")
+    def test_dispatch_failure_fails_pending_tasks(self, mock_task):
+        mock_task.delay.side_effect = [
+            MagicMock(id=str(uuid_lib.uuid4())), OSError("broker down")
+        ]
+        response = self.post()
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        tasks = AnalysisTask.objects.filter(created_by=self.user)
+        self.assertEqual(
+            sorted((task.celery_task_id is None, task.status) for task in tasks),
+            [(False, Status.PENDING), (True, Status.FAILED)],
+        )
+
+    @patch("project.api_views.analysis.run_analysis_task")
+    def test_ready_when_covered(self, mock_task):
+        response = self.post(bbox=[19.1, -33.9, 19.4, -33.6], end_date="2025-03-31")
+        self.assertEqual(response.data["status"], "ready")
+        self.assertEqual(len(response.data["reused"]), 2)
+        mock_task.delay.assert_not_called()
+
+    @patch("project.api_views.analysis.run_analysis_task")
+    def test_profile_runs_covered_request(self, mock_task):
+        mock_task.delay.return_value = MagicMock(id=str(uuid_lib.uuid4()))
+        response = self.post(bbox=[19.1, -33.9, 19.4, -33.6], end_date="2025-03-31", profile=True)
+        self.assertEqual(response.data["status"], "processing")
+        self.assertEqual(response.data["reused"], [])
+        self.assertEqual(len(response.data["scheduled"]), 1)
+        self.assertTrue(response.data["scheduled"][0]["profile"])
+        mock_task.delay.assert_called_once()
+
+    @patch("project.api_views.analysis.run_analysis_task")
+    def test_profile_reruns_finished_task(self, mock_task):
+        mock_task.delay.return_value = MagicMock(id=str(uuid_lib.uuid4()))
+        first = self.post(profile=True)
+        task = AnalysisTask.objects.get(uuid=first.data["task_uuid"])
+        task.status = Status.COMPLETED
+        task.save()
+
+        second = self.post(profile=True)
+        self.assertNotEqual(second.data["task_uuid"], task.uuid)
+        self.assertTrue(AnalysisTask.objects.get(uuid=second.data["task_uuid"]).profile)
+        self.assertEqual(mock_task.delay.call_count, 2)
+
+    @patch("project.api_views.analysis.run_analysis_task")
+    def test_profile_not_made_for_running_task(self, mock_task):
+        mock_task.delay.return_value = MagicMock(id=str(uuid_lib.uuid4()))
+        first = self.post(profile=True)
+        AnalysisTask.objects.filter(created_by=self.user).update(
+            status=Status.RUNNING, profile=False
+        )
+
+        second = self.post(profile=True)
+        self.assertEqual(second.data["task_uuid"], first.data["task_uuid"])
+        self.assertFalse(second.data["scheduled"][0]["profile"])
+        self.assertEqual(mock_task.delay.call_count, 1)
+
+    @patch("project.api_views.analysis.run_analysis_task")
+    def test_other_resolution_is_not_reused(self, mock_task):
+        mock_task.delay.return_value = MagicMock(id=str(uuid_lib.uuid4()))
+        response = self.post(bbox=[19.1, -33.9, 19.4, -33.6], resolution=10)
+        self.assertEqual(response.data["status"], "processing")
+        self.assertEqual(response.data["reused"], [])
+        self.assertEqual(len(response.data["scheduled"]), 1)
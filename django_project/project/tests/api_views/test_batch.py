@@ -0,0 +1,142 @@
+import json
+from unittest import mock
+from django.contrib.gis.geos import Polygon
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from core.factories import UserFactory
+from project.models.batch import AnalysisBatch
+from project.models.monitor import AnalysisTask, MonitoringIndicatorType, Status
+from project.tests.factories.monitor import TaskOutputFactory
+from project.utils.batch import group_nearby
+
+
+class GroupNearbyTest(SimpleTestCase):
+
+    def test_groups_by_extent(self):
+        bboxes = [
+            [29.0, -28.0, 29.1, -27.9],
+            [30.5, -25.0, 30.6, -24.9],
+            [29.2, -28.2, 29.3, -28.1],
+        ]
+        self.assertEqual(group_nearby(bboxes), [[0, 2], [1]])
+
+    def test_group_size(self):
+        bboxes = [[29.0, -28.0, 29.01, -27.99]] * 5
+        self.assertEqual(group_nearby(bboxes, max_size=2), [[0, 1], [2, 3], [4]])
+
+
+class BatchAnalysisAPITest(APITestCase):
+    """Test the batch submission of analysis tasks.
+    """
+    fixtures = ["monitoring_indicator_type.json"]
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("batch-analysis")
+        self.payload = {
+            "start_date": "2025-03-01",
+            "end_date": "2025-03-31",
+            "calc_types": ["AWEI", "NDCI"],
+            "bboxes": [
+                [29.0, -28.0, 29.1, -27.9],
+                [29.2, -28.2, 29.3, -28.1],
+                [30.5, -25.0, 30.6, -24.9],
+            ],
+        }
+
+    def post(self, payload):
+        with mock.patch('project.api_views.batch.celery_group') as celery_group:
+            celery_group.return_value.apply_async.return_value.id = 'group-id'
+            celery_group.return_value.apply_async.return_value.results = [
+                mock.Mock(id='00000000-0000-0000-0000-00000000000%d' % i) for i in range(5)
+            ]
+            response = self.client.post(self.url, payload, format='json')
+        return response, celery_group
+
+    def test_submit_batch(self):
+        response, celery_group = self.post(self.payload)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 3)
+        # Two nearby bboxes share one Celery task
+        signatures = celery_group.call_args.args[0]
+        self.assertEqual(len(signatures), 2)
+        self.assertEqual(
+            sorted(len(signature.kwargs['task_ids']) for signature in signatures), [1, 2]
+        )
+
+        batch = AnalysisBatch.objects.get(uuid=response.data['batch_uuid'])
+        self.assertEqual(batch.celery_group_id, 'group-id')
+        self.assertEqual(batch.tasks.count(), 3)
+        self.assertFalse(batch.tasks.filter(celery_task_id__isnull=True).exists())
+
+    def test_dispatch_failure_fails_tasks(self):
+        with mock.patch('project.api_views.batch.celery_group') as celery_group:
+            celery_group.return_value.apply_async.side_effect = OSError('broker down')
+            response = self.client.post(self.url, self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        tasks = AnalysisTask.objects.filter(created_by=self.user)
+        self.assertEqual(tasks.count(), 3)
+        for task in tasks:
+            self.assertEqual(task.status, Status.FAILED)
+            self.assertIsNotNone(task.completed_at)
+            self.assertEqual(AnalysisTask.get_cached_status(task.uuid)['status'], Status.FAILED)
+
+    def test_existing_tasks_are_reused(self):
+        first, _ = self.post(self.payload)
+        task_uuid = first.data['tasks'][0]
+
+        payload = {**self.payload, "bboxes": self.payload['bboxes'] + [[31.0, -26.0, 31.1, -25.9]]}
+        response, celery_group = self.post(payload)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['reused'], 3)
+        self.assertEqual(response.data['tasks'][0], task_uuid)
+        self.assertEqual(len(celery_group.call_args.args[0]), 1)
+
+    def test_water_bodies_and_geometries(self):
+        water_body = TaskOutputFactory(
+            monitoring_type=MonitoringIndicatorType.objects.get(name='AWEI'),
+            bbox=Polygon.from_bbox((29.16, -28.2, 29.18, -28.19)),
+        )
+        geometry = {
+            "type": "Polygon",
+            "coordinates": [[[30, -26], [30.1, -26], [30.05, -25.9], [30, -26]]]
+        }
+        response, _ = self.post({
+            "type": "water_extent",
+            "start_date": "2025-03-01",
+            "end_date": "2025-03-31",
+            "water_bodies": [water_body.pk],
+            "geometries": [json.dumps(geometry)],
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        bboxes = [
+            AnalysisTask.objects.get(uuid=task_uuid).parameters['bbox']
+            for task_uuid in response.data['tasks']
+        ]
+        self.assertEqual(bboxes, [[30.0, -26.0, 30.1, -25.9], [29.16, -28.2, 29.18, -28.19]])
+
+    def test_progress(self):
+        response, _ = self.post(self.payload)
+        AnalysisTask.objects.filter(uuid=response.data['tasks'][0]).update(
+            status=Status.COMPLETED
+        )
+        progress = self.client.get(
+            reverse("batch-analysis-status", kwargs={"batch_uuid": response.data['batch_uuid']})
+        ).data
+        self.assertEqual(progress['total'], 3)
+        self.assertEqual(progress['completed'], 1)
+        self.assertEqual(progress['pending'], 2)
+        self.assertEqual(progress['status'], Status.RUNNING)
+        self.assertAlmostEqual(progress['progress'], 0.3333)
+
+    def test_invalid_batch(self):
+        response, _ = self.post({"start_date": "2025-03-01", "end_date": "2025-03-31"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response, _ = self.post({**self.payload, "bboxes": [[1, 2, 0, 3]]})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,87 @@
+import os
+import numpy as np
+import rasterio
+from rasterio.io import MemoryFile
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from core.factories import UserFactory
+from core.settings.utils import absolute_path
+from project.models.monitor import MonitoringIndicatorType
+from project.tests.factories.monitor import TaskOutputFactory
+
+TEST_DATA_PATH = absolute_path('project', 'tests', 'data', 'pollution')
+
+
+class TaskOutputClipTest(APITestCase):
+    """Test the clip-on-read download of TaskOutput.
+    """
+    fixtures = ["monitoring_indicator_type.json"]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=UserFactory())
+        self.path = os.path.join(TEST_DATA_PATH, 'NDCI_2025_03.tif')
+        self.output = TaskOutputFactory(
+            monitoring_type=MonitoringIndicatorType.objects.get(name='NDCI'),
+            file__from_path=self.path,
+            file__filename='NDCI_2025_03.tif',
+        )
+        self.url = reverse("task-output-clip", kwargs={"pk": self.output.pk})
+        self.bbox = "29.167,-28.195,29.169,-28.193"
+
+    def read_response(self, response):
+        with MemoryFile(b''.join(response.streaming_content)) as memfile:
+            with memfile.open() as dataset:
+                return dataset.read(1), dataset.transform, dataset.crs
+
+    def test_clip_bbox(self):
+        response = self.client.get(self.url, {"bbox": self.bbox})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("NDCI_2025_03_clip.tif", response["Content-Disposition"])
+        data, transform, crs = self.read_response(response)
+        with rasterio.open(self.path) as src:
+            self.assertEqual(crs, src.crs)
+            self.assertLess(data.size, src.width * src.height)
+            # Pixels match the source at the same location
+            rows, cols = np.nonzero(np.isfinite(data))
+            self.assertTrue(len(rows))
+            x, y = transform * (cols[0] + 0.5, rows[0] + 0.5)
+            src_row, src_col = src.index(x, y)
+            self.assertEqual(data[rows[0], cols[0]], src.read(1)[src_row, src_col])
+
+    def test_clip_resolution_from_overviews(self):
+        response = self.client.get(self.url, {"bbox": self.bbox, "resolution": 60})
+        data, transform, _ = self.read_response(response)
+        self.assertEqual(data.shape, (4, 4))
+        self.assertGreater(abs(transform.a), 20)
+
+    def test_clip_geometry_netcdf(self):
+        geometry = {
+            "type": "Polygon",
+            "coordinates": [[
+                [29.168, -28.195], [29.169, -28.193], [29.167, -28.193], [29.168, -28.195]
+            ]],
+        }
+        response = self.client.post(
+            self.url, {"geometry": geometry, "format": "nc"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-netcdf")
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'\x89HDF'))
+
+    @override_settings(CLIP_MAX_PIXELS=20)
+    def test_clip_too_large(self):
+        response = self.client.get(self.url, {"bbox": self.bbox})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("exceeds the limit", response.data["error"])
+        response = self.client.get(self.url, {"bbox": self.bbox, "resolution": 60})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {"bbox": "0,0,1,1"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {"bbox": self.bbox, "format": "png"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
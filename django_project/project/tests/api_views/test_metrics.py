@@ -0,0 +1,123 @@
+import os
+import tempfile
+import dask.array as da
+import numpy as np
+from datetime import timedelta
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from core.factories import UserFactory
+from project.models.monitor import AnalysisTask
+from project.utils.instrumentation import StageMetrics, metrics_text, reset_peak_rss
+
+
+@override_settings(RELEASE='1.2.0')
+class StageMetricsTest(SimpleTestCase):
+
+    def test_stage(self):
+        metrics = StageMetrics()
+        with metrics.stage('compute'):
+            da.ones((100, 100), chunks=10).sum().compute(scheduler='sync')
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(os.urandom(100000))
+            f.flush()
+            with metrics.stage('read'):
+                with open(f.name, 'rb') as source:
+                    source.read()
+            with metrics.stage('read'):
+                pass
+
+        compute = metrics.stages['compute']
+        self.assertEqual(compute['calls'], 1)
+        self.assertGreater(compute['dask_tasks'], 100)
+        self.assertGreater(compute['peak_rss'], 0)
+        self.assertGreaterEqual(compute['wall_time'], 0)
+        read = metrics.stages['read']
+        self.assertEqual(read['calls'], 2)
+        self.assertGreaterEqual(read['read_bytes'], 100000)
+        self.assertEqual(read['dask_tasks'], 0)
+        self.assertEqual(metrics.to_dict()['release'], '1.2.0')
+
+    def test_nested_stage_peak(self):
+        if not reset_peak_rss():
+            self.skipTest('The peak RSS cannot be reset here.')
+        metrics = StageMetrics()
+        with metrics.stage('outer'):
+            data = np.ones(256 * 1024 ** 2, dtype=np.uint8)
+            del data
+            with metrics.stage('inner'):
+                pass
+
+        self.assertGreater(
+            metrics.stages['outer']['peak_rss'],
+            metrics.stages['inner']['peak_rss'] + 128 * 1024 ** 2
+        )
+        self.assertEqual(metrics.open_peaks, [])
+
+    def test_merge(self):
+        metrics = StageMetrics()
+        metrics.add('save', wall_time=1.5, read_bytes=10, peak_rss=200, dask_tasks=3)
+        metrics.merge({'stages': {'save': {
+            'calls': 2, 'wall_time': 2.0, 'read_bytes': 5, 'peak_rss': 100, 'dask_tasks': 1
+        }}})
+        self.assertEqual(metrics.stages['save'], {
+            'calls': 3, 'wall_time': 3.5, 'read_bytes': 15, 'peak_rss': 200, 'dask_tasks': 4
+        })
+
+    def test_metrics_text(self):
+        text = metrics_text([
+            {'release': '1.2.0', 'stages': {'save': {
+                'calls': 1, 'wall_time': 0.3, 'read_bytes': 10, 'peak_rss': 1, 'dask_tasks': 2
+            }}},
+            {'release': '1.2.0', 'stages': {'save': {
+                'calls': 1, 'wall_time': 20, 'read_bytes': 5, 'peak_rss': 1, 'dask_tasks': 0
+            }}},
+        ])
+        labels = 'release="1.2.0",stage="save"'
+        self.assertIn(f'analysis_stage_wall_time_seconds_bucket{{{labels},le="0.5"}} 1', text)
+        self.assertIn(f'analysis_stage_wall_time_seconds_bucket{{{labels},le="30"}} 2', text)
+        self.assertIn(f'analysis_stage_wall_time_seconds_count{{{labels}}} 2', text)
+        self.assertIn(f'analysis_stage_read_bytes_total{{{labels}}} 15', text)
+        self.assertIn(f'analysis_stage_dask_tasks_total{{{labels}}} 2', text)
+
+
+class MetricsAPITest(APITestCase):
+    """Test the Prometheus endpoint of the analysis stage metrics.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=UserFactory())
+        self.url = reverse("metrics")
+        stage_metrics = {'release': '1.2.0', 'stages': {'stac_load': {
+            'calls': 1, 'wall_time': 4.0, 'read_bytes': 0, 'peak_rss': 0, 'dask_tasks': 0
+        }}}
+        AnalysisTask.objects.create(
+            task_name='recent', completed_at=timezone.now(), stage_metrics=stage_metrics
+        )
+        AnalysisTask.objects.create(
+            task_name='old',
+            completed_at=timezone.now() - timedelta(days=60),
+            stage_metrics=stage_metrics
+        )
+
+    def test_metrics(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(
+            'analysis_stage_wall_time_seconds_count{release="1.2.0",stage="stac_load"} 1',
+            response.content.decode()
+        )
+
+        response = self.client.get(self.url, {'days': 90})
+        self.assertIn(
+            'analysis_stage_wall_time_seconds_count{release="1.2.0",stage="stac_load"} 2',
+            response.content.decode()
+        )
+
+    def test_invalid_days(self):
+        response = self.client.get(self.url, {'days': 'week'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,60 @@
+from django.urls import reverse
+from rest_framework.test import APITestCase, APIClient
+from project.tests.factories.monitor import (
+    TaskOutputFactory,
+    UserFactory,
+    MonitoringIndicatorTypeFactory,
+    AnalysisTaskFactory,
+)
+
+
+class ListQueryCountTestCase(APITestCase):
+    """
+    Pin the number of queries per page of the TaskOutput and AnalysisTask listings,
+    so they do not grow with the number of rows.
+    """
+
+    def setUp(self):
+        self.user = UserFactory(is_superuser=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        indicators = [MonitoringIndicatorTypeFactory() for _ in range(3)]
+        for _ in range(4):
+            task = AnalysisTaskFactory(created_by=self.user)
+            for indicator in indicators:
+                TaskOutputFactory(task=task, monitoring_type=indicator, created_by=self.user)
+
+    def test_task_output_list_queries(self):
+        """One query per page, without COUNT(*) and per-row monitoring type lookups."""
+        url = reverse("task-output-list")
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"page_size": 10})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertNotIn("count", response.data)
+
+        # Following the cursor returns the remaining rows
+        with self.assertNumQueries(1):
+            response = self.client.get(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNone(response.data["next"])
+
+    def test_analysis_task_list_queries(self):
+        """Nested outputs are prefetched in a single extra query."""
+        url = reverse("analysis-tasks-list")
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 4)
+        for result in response.data["results"]:
+            self.assertEqual(len(result["task_outputs"]), 3)
+
+    def test_analysis_task_list_without_outputs(self):
+        """include_outputs=false skips the nested outputs entirely."""
+        url = reverse("analysis-tasks-list")
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"include_outputs": "false"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 4)
+        self.assertNotIn("task_outputs", response.data["results"][0])
@@ -0,0 +1,77 @@
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from core.factories import UserFactory
+from project.models.monitor import AnalysisTask, Status
+from project.tests.factories.monitor import AnalysisTaskFactory
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+)
+class AnalysisTaskStatusCacheTest(APITestCase):
+    """Test the cached status endpoint of AnalysisTask.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=UserFactory())
+        self.task = AnalysisTaskFactory()
+        self.url = reverse("analysis-task-status", kwargs={"task_uuid": self.task.uuid})
+
+    def test_status_changes_are_cached(self):
+        self.task.start()
+        entry = cache.get(AnalysisTask.status_cache_key(self.task.uuid))
+        self.assertEqual(entry["status"], Status.RUNNING)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"status": Status.RUNNING})
+
+        self.task.complete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data, {"status": Status.COMPLETED})
+
+    def test_cache_miss_falls_back_to_database(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data, {"status": Status.PENDING})
+        self.assertIsNotNone(cache.get(AnalysisTask.status_cache_key(self.task.uuid)))
+
+    def test_etag_not_modified(self):
+        self.task.start()
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.task.complete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    @override_settings(TASK_STATUS_RETRY_AFTER=3)
+    def test_retry_after_until_finished(self):
+        self.task.start()
+        response = self.client.get(self.url)
+        self.assertEqual(response["Retry-After"], "3")
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["Retry-After"], "3")
+
+        self.task.complete()
+        response = self.client.get(self.url)
+        self.assertNotIn("Retry-After", response)
+
+    def test_unknown_task(self):
+        url = reverse(
+            "analysis-task-status",
+            kwargs={"task_uuid": "00000000-0000-0000-0000-000000000000"}
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,121 @@
+import math
+import os
+import tempfile
+from io import BytesIO
+from unittest.mock import patch
+import numpy as np
+from PIL import Image
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from core.factories import UserFactory
+from core.settings.utils import absolute_path
+from project.models.monitor import MonitoringIndicatorType
+from project.tests.factories.monitor import TaskOutputFactory
+from project.utils.tiles import TileCache
+
+TEST_DATA_PATH = absolute_path('project', 'tests', 'data', 'pollution')
+
+
+def lonlat_to_tile(lon, lat, z):
+    n = 2 ** z
+    x = int((lon + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return x, y
+
+
+class TaskOutputTileTest(APITestCase):
+    """Test the XYZ tile endpoint of TaskOutput.
+    """
+    fixtures = ["monitoring_indicator_type.json"]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=UserFactory())
+        self.output = TaskOutputFactory(
+            monitoring_type=MonitoringIndicatorType.objects.get(name='NDCI'),
+            file__from_path=os.path.join(TEST_DATA_PATH, 'NDCI_2025_03.tif'),
+            file__filename='NDCI_2025_03.tif',
+        )
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.cache = TileCache(self.cache_dir.name, 10 * 1024 * 1024)
+        patcher = patch("project.api_views.task_output.tile_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.cache_dir.cleanup)
+
+    def get_tile(self, z, x, y, image_format='png', **params):
+        url = reverse(
+            "task-output-tile",
+            kwargs={"pk": self.output.pk, "z": z, "x": x, "y": y, "image_format": image_format}
+        )
+        return self.client.get(url, params)
+
+    def test_render_and_cache_tile(self):
+        z = 16
+        x, y = lonlat_to_tile(29.17, -28.195, z)
+        response = self.get_tile(z, x, y)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "image/png")
+        image = np.array(Image.open(BytesIO(response.content)))
+        self.assertEqual(image.shape, (256, 256, 4))
+        # Tile contains data and transparent pixels outside the raster
+        self.assertTrue((image[..., 3] == 255).any())
+        self.assertTrue((image[..., 3] == 0).any())
+
+        with patch("project.api_views.task_output.render_tile") as mock_render:
+            cached = self.get_tile(z, x, y)
+        mock_render.assert_not_called()
+        self.assertEqual(cached.content, response.content)
+
+        webp = self.get_tile(z, x, y, image_format='webp')
+        self.assertEqual(webp["Content-Type"], "image/webp")
+
+    def test_tile_outside_raster_is_transparent(self):
+        response = self.get_tile(3, 0, 0)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        image = np.array(Image.open(BytesIO(response.content)))
+        self.assertFalse(image[..., 3].any())
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.get_tile(2, 4, 0).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            self.get_tile(2, 0, 0, image_format='jpg').status_code, status.HTTP_400_BAD_REQUEST
+        )
+        self.assertEqual(
+            self.get_tile(2, 0, 0, colormap='../x').status_code, status.HTTP_400_BAD_REQUEST
+        )
+        self.assertEqual(
+            self.get_tile(2, 0, 0, colormap='Unknown').status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+
+
+class TileCacheTest(SimpleTestCase):
+    def test_lru_eviction(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = TileCache(directory, max_size=10000)
+            for i in range(3):
+                cache.set(('1', '0', f'{i}.png'), b'x' * 100)
+                os.utime(cache.path(('1', '0', f'{i}.png')), (i, i))
+            # Reading a tile marks it as recently used
+            self.assertEqual(cache.get(('1', '0', '0.png')), b'x' * 100)
+
+            cache.max_size = 250
+            self.assertEqual(cache.evict(), 1)
+            self.assertIsNone(cache.get(('1', '0', '1.png')))
+            self.assertIsNotNone(cache.get(('1', '0', '0.png')))
+            self.assertIsNotNone(cache.get(('1', '0', '2.png')))
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    )
+    def test_eviction_is_throttled(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = TileCache(directory, max_size=1000, evict_interval=60)
+            with patch.object(cache, 'evict') as evict:
+                for i in range(5):
+                    cache.set(('1', '0', f'{i}.png'), b'x' * 200)
+            # Over the threshold on every write, but walked once per interval
+            evict.assert_called_once()
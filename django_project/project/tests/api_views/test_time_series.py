@@ -0,0 +1,118 @@
+import os
+from datetime import date
+from unittest import mock
+from django.contrib.gis.geos import Polygon
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from core.factories import UserFactory
+from core.settings.utils import absolute_path
+from project.models.monitor import MonitoringIndicatorType
+from project.models.summary import TaskOutputSummary
+from project.tests.factories.monitor import TaskOutputFactory
+from project.utils import time_series
+
+TEST_DATA_PATH = absolute_path('project', 'tests', 'data', 'pollution')
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+)
+class TimeSeriesAPITest(APITestCase):
+    """Test the time series of stored TaskOutput statistics.
+    """
+    fixtures = ["monitoring_indicator_type.json"]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=UserFactory())
+        self.url = reverse("time-series")
+        self.bbox = (29.166, -28.197, 29.171, -28.192)
+        self.ndci = MonitoringIndicatorType.objects.get(name='NDCI')
+        self.awei = MonitoringIndicatorType.objects.get(name='AWEI')
+
+        # Water body with stored summaries for two months
+        self.water_body = TaskOutputFactory(
+            monitoring_type=self.awei,
+            observation_date=date(2025, 1, 15),
+            bbox=Polygon.from_bbox(self.bbox),
+        )
+        TaskOutputSummary.objects.create(output=self.water_body, mean=0.2, water_area_km2=1.5)
+        february = TaskOutputFactory(
+            monitoring_type=self.awei,
+            observation_date=date(2025, 2, 1),
+            bbox=Polygon.from_bbox(self.bbox),
+        )
+        TaskOutputSummary.objects.create(output=february, mean=0.3, water_area_km2=2.0)
+
+        # NDCI raster without a summary
+        self.ndci_output = TaskOutputFactory(
+            monitoring_type=self.ndci,
+            observation_date=date(2025, 3, 1),
+            bbox=Polygon.from_bbox(self.bbox),
+            file__from_path=os.path.join(TEST_DATA_PATH, 'NDCI_2025_03.tif'),
+            file__filename='NDCI_2025_03.tif',
+        )
+
+    def test_series_from_summaries(self):
+        with mock.patch.object(time_series, 'raster_statistics') as raster_statistics:
+            response = self.client.get(
+                self.url,
+                {"water_body": self.water_body.pk, "calc_types": "AWEI"}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        raster_statistics.assert_not_called()
+        series = response.data['series']['AWEI']
+        self.assertEqual([entry['date'] for entry in series], ['2025-01', '2025-02'])
+        self.assertEqual([entry['water_area_km2'] for entry in series], [1.5, 2.0])
+        self.assertEqual({entry['source'] for entry in series}, {'summary'})
+
+    def test_missing_months(self):
+        response = self.client.get(self.url, {
+            "bbox": ",".join(str(coord) for coord in self.bbox),
+            "start_date": "2025-01-01",
+            "end_date": "2025-04-30",
+        })
+        self.assertEqual(response.data['missing']['AWEI'], ['2025-03', '2025-04'])
+        self.assertEqual(response.data['missing']['NDCI'], ['2025-01', '2025-02', '2025-04'])
+
+    def test_raster_fallback_is_cached(self):
+        params = {"bbox": "29.167,-28.195,29.169,-28.193", "calc_types": "NDCI"}
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        entry = response.data['series']['NDCI'][0]
+        self.assertEqual(entry['source'], 'raster')
+        self.assertEqual(entry['output_id'], self.ndci_output.pk)
+        self.assertGreater(entry['valid_count'], 0)
+        self.assertIsNotNone(entry['mean'])
+
+        with mock.patch.object(time_series, 'raster_statistics') as raster_statistics:
+            cached = self.client.get(self.url, params)
+        raster_statistics.assert_not_called()
+        self.assertEqual(cached.data['series'], response.data['series'])
+
+    def test_raster_fallback_uses_every_output(self):
+        params = {"bbox": "29.167,-28.195,29.169,-28.193", "calc_types": "NDCI"}
+        single = self.client.get(self.url, params).data['series']['NDCI'][0]
+
+        # A later task over the same area, its pixels are not counted twice
+        later = TaskOutputFactory(
+            monitoring_type=self.ndci,
+            observation_date=date(2025, 3, 20),
+            bbox=Polygon.from_bbox(self.bbox),
+            file__from_path=os.path.join(TEST_DATA_PATH, 'NDCI_2025_03.tif'),
+            file__filename='NDCI_2025_03.tif',
+        )
+        entry = self.client.get(self.url, params).data['series']['NDCI'][0]
+        self.assertEqual(entry['output_ids'], [later.pk, self.ndci_output.pk])
+        self.assertEqual(entry['valid_count'], single['valid_count'])
+        self.assertAlmostEqual(entry['mean'], single['mean'])
+
+    def test_invalid_request(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {"water_body": 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,64 @@
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from project.models.monitor import AnalysisTask, Status, hash_parameters
+
+
+class AnalysisTaskParametersHashTest(TestCase):
+    def setUp(self):
+        self.parameters = {
+            "start_date": "2025-01-01",
+            "end_date": "2025-01-31",
+            "bbox": [29.1, -28.3, 29.2, -28.2],
+            "calc_types": ["AWEI"],
+        }
+
+    def test_hash_is_canonical(self):
+        reordered = dict(reversed(list(self.parameters.items())))
+        self.assertEqual(hash_parameters(self.parameters), hash_parameters(reordered))
+        self.assertEqual(
+            hash_parameters(self.parameters),
+            hash_parameters({**self.parameters, "bbox": (29.1, -28.3, 29.2, -28.2)})
+        )
+        self.assertNotEqual(
+            hash_parameters(self.parameters),
+            hash_parameters({**self.parameters, "calc_types": ["NDTI"]})
+        )
+
+    def test_get_or_create_for_parameters(self):
+        task, created = AnalysisTask.objects.get_or_create_for_parameters(
+            self.parameters, defaults={"task_name": "First"}
+        )
+        self.assertTrue(created)
+        self.assertEqual(task.parameters_hash, hash_parameters(self.parameters))
+
+        reordered = dict(reversed(list(self.parameters.items())))
+        same_task, created = AnalysisTask.objects.get_or_create_for_parameters(
+            reordered, defaults={"task_name": "Second"}
+        )
+        self.assertFalse(created)
+        self.assertEqual(same_task.uuid, task.uuid)
+
+        # Finished tasks are still reused
+        task.complete()
+        same_task, created = AnalysisTask.objects.get_or_create_for_parameters(self.parameters)
+        self.assertFalse(created)
+        self.assertEqual(same_task.uuid, task.uuid)
+
+    def test_single_active_task_per_parameters(self):
+        parameters_hash = hash_parameters(self.parameters)
+        AnalysisTask.objects.create(
+            task_name="Active", parameters=self.parameters, parameters_hash=parameters_hash
+        )
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            AnalysisTask.objects.create(
+                task_name="Duplicate", parameters=self.parameters, parameters_hash=parameters_hash
+            )
+
+        # Inactive duplicates are allowed
+        AnalysisTask.objects.create(
+            task_name="Failed",
+            parameters=self.parameters,
+            parameters_hash=parameters_hash,
+            status=Status.FAILED,
+        )
+        self.assertEqual(AnalysisTask.objects.filter(parameters_hash=parameters_hash).count(), 2)
@@ -0,0 +1,130 @@
+import logging
+from datetime import datetime
+from unittest.mock import patch
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from project.models.logs import TaskLog
+from project.tasks.analysis import run_analysis
+from project.tests.factories.monitor import AnalysisTaskFactory
+from project.utils.task_log import (
+    create_task_log_partition,
+    drop_expired_task_log_partitions,
+    get_task_log_partitions,
+    month_start,
+    task_log_partition_name,
+)
+
+
+class TaskLogBufferTest(TestCase):
+    def setUp(self):
+        self.task = AnalysisTaskFactory()
+
+    def get_logs(self):
+        return list(
+            TaskLog.objects.filter(object_id=str(self.task.pk))
+            .order_by('timestamp').values_list('log', flat=True)
+        )
+
+    def test_flush_on_size_and_exit(self):
+        with self.task.buffered_logs(max_size=3, flush_interval=60, min_level=logging.INFO):
+            for i in range(5):
+                self.task.add_log(f"log {i}")
+                if i == 1:
+                    self.assertEqual(self.get_logs(), [])
+            self.assertEqual(self.get_logs(), ["log 0", "log 1", "log 2"])
+        self.assertEqual(self.get_logs(), [f"log {i}" for i in range(5)])
+
+        # Without buffer logs are written right away
+        self.task.add_log("log 5")
+        self.assertEqual(len(self.get_logs()), 6)
+
+    def test_flush_on_interval(self):
+        with self.task.buffered_logs(max_size=100, flush_interval=0, min_level=logging.INFO):
+            self.task.add_log("log 0")
+            self.assertEqual(self.get_logs(), ["log 0"])
+
+    def test_level_filter(self):
+        with self.task.buffered_logs(min_level=logging.WARNING):
+            self.task.add_log("debug", logging.DEBUG)
+            self.task.add_log("info", logging.INFO)
+            self.task.add_log("error", logging.ERROR)
+        self.assertEqual(self.get_logs(), ["error"])
+
+    @patch("project.utils.calculations.analysis.Analysis")
+    def test_logs_kept_in_order_on_crash(self, mock_analysis):
+        def run():
+            for i in range(3):
+                self.task.add_log(f"step {i}")
+            raise RuntimeError("boom")
+
+        mock_analysis.return_value.run.side_effect = run
+        with patch("project.tasks.analysis.AnalysisTask.objects.get", return_value=self.task):
+            self.assertFalse(run_analysis("2025-01-01", "2025-01-31", task_id=self.task.uuid))
+
+        self.assertEqual(self.get_logs(), ["step 0", "step 1", "step 2", "boom"])
+
+
+class TaskLogPartitionTest(TestCase):
+    def setUp(self):
+        self.task = AnalysisTaskFactory()
+        self.now = timezone.now()
+
+    def create_log(self, timestamp):
+        return TaskLog.objects.create(
+            content_object=self.task, log="log", level=logging.INFO, timestamp=timestamp
+        )
+
+    def test_table_is_partitioned(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_partitioned_table "
+                "WHERE partrelid = %s::regclass",
+                [TaskLog._meta.db_table]
+            )
+            self.assertEqual(cursor.fetchone()[0], 1)
+        partitions = get_task_log_partitions()
+        self.assertIn(month_start(self.now.date()), partitions)
+        self.assertIn(month_start(self.now.date(), 2), partitions)
+
+    def test_create_partition_moves_default_rows(self):
+        old_month = month_start(self.now.date(), -60)
+        log = self.create_log(timezone.make_aware(datetime(old_month.year, old_month.month, 15)))
+        self.assertNotIn(old_month, get_task_log_partitions())
+
+        self.assertTrue(create_task_log_partition(old_month))
+        self.assertFalse(create_task_log_partition(old_month))
+        self.assertIn(old_month, get_task_log_partitions())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT uuid FROM "{task_log_partition_name(old_month)}"'
+            )
+            self.assertEqual(cursor.fetchone()[0], log.uuid)
+
+    def test_drop_expired_partitions(self):
+        expired_month = month_start(self.now.date(), -14)
+        create_task_log_partition(expired_month)
+        self.create_log(timezone.make_aware(
+            datetime(expired_month.year, expired_month.month, 2)
+        ))
+        # Default partition row older than the retention
+        self.create_log(timezone.make_aware(datetime(2000, 1, 1)))
+        recent = self.create_log(self.now)
+
+        dropped = drop_expired_task_log_partitions(12)
+        self.assertIn(task_log_partition_name(expired_month), dropped)
+        self.assertNotIn(expired_month, get_task_log_partitions())
+        self.assertEqual(
+            list(TaskLog.objects.values_list('uuid', flat=True)), [recent.uuid]
+        )
+        self.assertEqual(drop_expired_task_log_partitions(0), [])
+
+    def test_for_object_prunes_older_partitions(self):
+        self.create_log(self.now)
+        self.assertEqual(TaskLog.objects.for_object(self.task).count(), 1)
+
+        old_month = month_start(self.now.date(), -3)
+        create_task_log_partition(old_month)
+        plan = TaskLog.objects.for_object(self.task).explain()
+        self.assertNotIn(task_log_partition_name(old_month), plan)
+        self.assertIn(task_log_partition_name(month_start(self.now.date())), plan)
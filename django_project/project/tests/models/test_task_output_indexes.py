@@ -0,0 +1,107 @@
+import random
+from datetime import date
+from django.contrib.gis.geos import Polygon
+from django.db import connection
+from django.test import TestCase
+from project.models.monitor import AnalysisTask, MonitoringIndicatorType, TaskOutput
+from project.tasks.water_extent import check_awei_output
+
+
+class TaskOutputIndexTest(TestCase):
+    """
+    Check that the TaskOutput lookup paths use index scans
+    at realistic row counts.
+    """
+    fixtures = ["monitoring_indicator_type.json"]
+
+    TASKS = 500
+    OUTPUTS_PER_TASK = 60
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(42)
+        types = list(MonitoringIndicatorType.objects.all())
+        months = [date(year, month, 1) for year in range(2016, 2026) for month in range(1, 13)]
+
+        tasks = AnalysisTask.objects.bulk_create(
+            [AnalysisTask(task_name=f"Task {i}") for i in range(cls.TASKS)]
+        )
+        outputs = []
+        for task in tasks:
+            for _ in range(cls.OUTPUTS_PER_TASK):
+                # Small water body extents spread over South Africa
+                minx = rng.uniform(17.0, 32.0)
+                miny = rng.uniform(-34.5, -22.5)
+                outputs.append(
+                    TaskOutput(
+                        task=task,
+                        file='dummy.tif',
+                        monitoring_type=rng.choice(types),
+                        observation_date=rng.choice(months),
+                        bbox=Polygon.from_bbox((minx, miny, minx + 0.05, miny + 0.05)),
+                    )
+                )
+        TaskOutput.objects.bulk_create(outputs, batch_size=5000)
+        cls.task = tasks[0]
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {TaskOutput._meta.db_table}")
+            cursor.execute(f"ANALYZE {MonitoringIndicatorType._meta.db_table}")
+
+    def assertIndexScan(self, queryset):
+        plan = queryset.explain()
+        self.assertNotIn(f"Seq Scan on {TaskOutput._meta.db_table}", plan, plan)
+        self.assertIn("Index", plan, plan)
+
+    def get_index_definitions(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexdef FROM pg_indexes WHERE tablename = %s", [table])
+            return [row[0] for row in cursor.fetchall()]
+
+    def test_spatial_index_exists(self):
+        indexes = self.get_index_definitions(TaskOutput._meta.db_table)
+        self.assertTrue(
+            any('USING gist' in index and '(bbox)' in index for index in indexes), indexes
+        )
+
+    def test_existing_output_check(self):
+        """Query of WaterAnalysisAPIView for stored outputs."""
+        self.assertIndexScan(
+            TaskOutput.objects.filter(
+                monitoring_type__name__in=['AWEI', 'NDCI'],
+                bbox__intersects=Polygon.from_bbox((19.0, -34.0, 19.1, -33.9)),
+                observation_date__gte='2025-03-01',
+                observation_date__lte='2025-03-31',
+            )
+        )
+
+    def test_type_and_date_range(self):
+        self.assertIndexScan(
+            TaskOutput.objects.filter(
+                monitoring_type__name='NDTI',
+                observation_date__gte='2025-01-01',
+                observation_date__lte='2025-03-31',
+            )
+        )
+
+    def test_check_awei_output(self):
+        queryset = TaskOutput.objects.filter(
+            monitoring_type__name__iexact='AWEI',
+            task=self.task
+        ).order_by("-created_at")
+        self.assertIndexScan(queryset)
+        self.assertEqual(check_awei_output(self.task), queryset.first())
+
+    def test_type_name_functional_index(self):
+        indexes = self.get_index_definitions(MonitoringIndicatorType._meta.db_table)
+        self.assertTrue(any('upper(name)' in index for index in indexes), indexes)
+
+    def test_task_output_filter(self):
+        """bbox intersects plus date range, as in TaskOutputFilter."""
+        self.assertIndexScan(
+            TaskOutput.objects.filter(
+                bbox__intersects=Polygon.from_bbox((25.0, -30.0, 25.2, -29.8)),
+                observation_date__gte='2024-01-01',
+                observation_date__lte='2024-12-31',
+            )
+        )
@@ -0,0 +1,70 @@
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+from django.test import TestCase
+from project.models.monitor import AnalysisTask, Status
+from project.tasks.batch import run_analysis_group_task
+from project.tests.factories.monitor import AnalysisTaskFactory
+
+
+def stac_item(item_id, bbox):
+    return SimpleNamespace(id=item_id, bbox=bbox, to_dict=lambda: {'id': item_id})
+
+
+class AnalysisGroupTaskTest(TestCase):
+    """Test the fan-out of a batch group into one analysis task per area.
+    """
+
+    def setUp(self):
+        parameters = {'start_date': '2025-03-01', 'end_date': '2025-03-31'}
+        self.west = AnalysisTaskFactory(
+            parameters={**parameters, 'bbox': [19.0, -34.0, 19.1, -33.9]}
+        )
+        self.east = AnalysisTaskFactory(
+            parameters={**parameters, 'bbox': [19.4, -34.0, 19.5, -33.9]}
+        )
+        self.task_ids = [str(self.west.uuid), str(self.east.uuid)]
+        self.celery_ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+        self.items = [
+            stac_item('west', [18.9, -34.1, 19.2, -33.8]),
+            stac_item('east', [19.3, -34.1, 19.6, -33.8]),
+        ]
+
+    def run_group(self, **group_kwargs):
+        with mock.patch(
+            'project.utils.calculations.analysis.search_stac_items', return_value=self.items
+        ) as search, mock.patch(
+            'project.tasks.batch.run_analysis_task'
+        ) as analysis_task, mock.patch(
+            'project.tasks.batch.celery_group', **group_kwargs
+        ) as celery_group:
+            celery_group.return_value.apply_async.return_value.results = [
+                SimpleNamespace(id=celery_id) for celery_id in self.celery_ids
+            ]
+            result = run_analysis_group_task.apply(kwargs={
+                'task_ids': self.task_ids,
+                'bbox': [19.0, -34.0, 19.5, -33.9],
+                'start_date': '2025-03-01',
+                'end_date': '2025-03-31',
+            }).get()
+        return result, search, analysis_task
+
+    def test_tasks_are_dispatched_with_their_scenes(self):
+        result, search, analysis_task = self.run_group()
+        search.assert_called_once()
+        self.assertEqual(result, dict(zip(self.task_ids, self.celery_ids)))
+
+        calls = analysis_task.si.call_args_list
+        self.assertEqual([call.kwargs['task_id'] for call in calls], self.task_ids)
+        self.assertEqual(
+            [call.kwargs['items'] for call in calls], [[{'id': 'west'}], [{'id': 'east'}]]
+        )
+        self.west.refresh_from_db()
+        self.assertEqual(str(self.west.celery_task_id), self.celery_ids[0])
+
+    def test_dispatch_failure_fails_tasks(self):
+        result, _, _ = self.run_group(side_effect=OSError('broker down'))
+        self.assertFalse(result)
+        self.assertEqual(
+            set(AnalysisTask.objects.values_list('status', flat=True)), {Status.FAILED}
+        )
@@ -0,0 +1,150 @@
+import json
+import os
+import geopandas as gpd
+from django.contrib.gis.geos import Polygon
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase, APIClient
+from core.factories import UserFactory
+from core.settings.utils import absolute_path
+from project.models.monitor import AnalysisTask, MonitoringIndicatorType, Status
+from project.models.pollution import PollutionStatistic
+from project.tasks.pollution import run_pollution_analysis
+from project.tests.factories.monitor import AnalysisTaskFactory, TaskOutputFactory
+
+TEST_DATA_PATH = absolute_path('project', 'tests', 'data', 'pollution')
+
+
+class PollutionAnalysisTaskTest(APITestCase):
+    """Test batch pollution analysis across stored TaskOutputs.
+    """
+    fixtures = ["monitoring_indicator_type.json"]
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        source_task = AnalysisTaskFactory()
+        for calc_type in ['NDTI', 'NDCI']:
+            TaskOutputFactory(
+                task=source_task,
+                monitoring_type=MonitoringIndicatorType.objects.get(name=calc_type),
+                observation_date='2025-03-01',
+                bbox=Polygon.from_bbox((29.16, -28.2, 29.18, -28.19)),
+                created_by=self.user,
+                file__from_path=os.path.join(TEST_DATA_PATH, f'{calc_type}_2025_03.tif'),
+                file__filename=f'{calc_type}_2025_03.tif',
+            )
+
+        self.point_sources = json.loads(
+            gpd.read_file(os.path.join(TEST_DATA_PATH, 'multi-point.shp')).to_json()
+        )
+        self.non_point_sources = json.loads(
+            gpd.read_file(os.path.join(TEST_DATA_PATH, 'area.shp')).to_json()
+        )
+
+    def test_source_month_matrix(self):
+        """Every source gets one statistic per index and month."""
+        task = AnalysisTaskFactory(created_by=self.user)
+        total = run_pollution_analysis(
+            task,
+            '2025-03-01',
+            '2025-03-31',
+            point_sources=self.point_sources,
+            non_point_sources=self.non_point_sources,
+        )
+
+        # 4 point + 2 non-point sources, 2 indices, 1 month
+        self.assertEqual(total, 12)
+        statistics = PollutionStatistic.objects.filter(task=task)
+        self.assertEqual(statistics.count(), 12)
+        self.assertEqual(
+            statistics.filter(source_type=PollutionStatistic.SourceType.POINT).count(), 8
+        )
+
+        area = statistics.filter(
+            source_type=PollutionStatistic.SourceType.NON_POINT,
+            monitoring_type__name='NDCI',
+        ).order_by('id').first()
+        self.assertEqual(area.pixel_count, 30)
+        self.assertEqual(area.raster_count, 1)
+        self.assertIsInstance(area.mean, float)
+
+        # Point without valid pixel is stored without statistics
+        empty_point = statistics.get(
+            source_type=PollutionStatistic.SourceType.POINT,
+            source_id='3',
+            monitoring_type__name='NDTI',
+        )
+        self.assertEqual(empty_point.pixel_count, 0)
+        self.assertIsNone(empty_point.mean)
+
+        # Rerunning replaces previous results
+        run_pollution_analysis(
+            task,
+            '2025-03-01',
+            '2025-03-31',
+            point_sources=self.point_sources,
+        )
+        self.assertEqual(PollutionStatistic.objects.filter(task=task).count(), 8)
+
+    def test_overlapping_tasks_are_counted_once(self):
+        """Outputs of a later task over the same area replace those of earlier ones."""
+        later_task = AnalysisTaskFactory()
+        TaskOutputFactory(
+            task=later_task,
+            monitoring_type=MonitoringIndicatorType.objects.get(name='NDCI'),
+            observation_date='2025-03-01',
+            bbox=Polygon.from_bbox((29.16, -28.2, 29.18, -28.19)),
+            created_by=self.user,
+            file__from_path=os.path.join(TEST_DATA_PATH, 'NDCI_2025_03.tif'),
+            file__filename='NDCI_2025_03.tif',
+        )
+        task = AnalysisTaskFactory(created_by=self.user)
+        run_pollution_analysis(
+            task,
+            '2025-03-01',
+            '2025-03-31',
+            non_point_sources=self.non_point_sources,
+            calc_types=['NDCI'],
+        )
+
+        area = PollutionStatistic.objects.filter(task=task).order_by('id').first()
+        self.assertEqual(area.pixel_count, 30)
+        self.assertEqual(area.raster_count, 1)
+
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+    def test_pollution_analysis_api(self):
+        """API dispatches the task and exposes the stored statistics."""
+        response = self.client.post(
+            reverse('pollution-analysis'),
+            {
+                'start_date': '2025-03-01',
+                'end_date': '2025-03-31',
+                'point_sources': self.point_sources,
+                'non_point_sources': self.non_point_sources,
+                'calc_types': ['NDCI'],
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        task = AnalysisTask.objects.get(uuid=response.data['task_uuid'])
+        self.assertEqual(task.status, Status.COMPLETED)
+
+        response = self.client.get(
+            reverse('pollution-statistic-list'),
+            {'task__uuid': str(task.uuid), 'source_type': 'non_point', 'page_size': 100}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(response.data['results'][0]['monitoring_type'], 'NDCI')
+
+    def test_pollution_analysis_api_requires_sources(self):
+        """Missing sources are rejected."""
+        response = self.client.post(
+            reverse('pollution-analysis'),
+            {'start_date': '2025-03-01', 'end_date': '2025-03-31'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
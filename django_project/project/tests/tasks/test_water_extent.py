@@ -0,0 +1,187 @@
+import os
+import shutil
+import tempfile
+from datetime import date
+from unittest import mock
+import numpy as np
+import rasterio
+import rioxarray  # noqa
+import xarray as xr
+from django.contrib.gis.geos import Polygon
+from django.test import SimpleTestCase, TestCase, override_settings
+from core.settings.utils import absolute_path
+from project.models.datacube import DataCube
+from project.models.monitor import AnalysisTask, MonitoringIndicatorType, Status, TaskOutput
+from project.tasks.water_extent import compute_water_extent_task
+from project.tests.factories.monitor import (
+    AnalysisTaskFactory,
+    CrawlerFactory,
+    TaskOutputFactory,
+)
+from project.utils.benchmarks.synthetic import RESOLUTION, write_tiff
+from project.utils.datacube import cube_grid, write_month
+from project.utils.calculations.water_extent import (
+    calculate_water_extent_from_tif,
+    generate_water_mask_from_tif,
+    water_extent_from_outputs,
+)
+
+TEST_DATA_PATH = absolute_path('project', 'tests', 'data', 'pollution')
+
+
+class ComputeWaterExtentReuseTest(TestCase):
+    """Test that the water extent reuses stored AWEI outputs of other tasks.
+    """
+    fixtures = ["monitoring_indicator_type.json"]
+
+    def setUp(self):
+        self.bbox = [29.1662, -28.1967, 29.171, -28.1919]
+        self.path = os.path.join(TEST_DATA_PATH, 'NDCI_2025_03.tif')
+        source_task = AnalysisTaskFactory(
+            parameters={'bbox': self.bbox, 'spatial_resolution': 20}
+        )
+        TaskOutputFactory(
+            task=source_task,
+            monitoring_type=MonitoringIndicatorType.objects.get(name='AWEI'),
+            observation_date='2025-03-01',
+            bbox=Polygon.from_bbox(self.bbox),
+            file__from_path=self.path,
+            file__filename='AWEI_2025_03.tif',
+        )
+        self.task = AnalysisTask.objects.create(
+            task_name='Water Extent',
+            parameters={'bbox': self.bbox, 'spatial_resolution': 20},
+        )
+
+    def run_task(self, start_date, end_date):
+        return compute_water_extent_task.apply(kwargs={
+            'task_id': str(self.task.uuid),
+            'bbox': self.bbox,
+            'spatial_resolution': 20,
+            'start_date': start_date,
+            'end_date': end_date,
+        }).get()
+
+    @mock.patch('project.utils.calculations.analysis.Analysis')
+    def test_covered_month_skips_analysis(self, mock_analysis):
+        result = self.run_task('2025-03-01', '2025-03-31')
+
+        mock_analysis.assert_not_called()
+        expected = calculate_water_extent_from_tif(self.path)['area_km2']
+        self.assertEqual(result['area_km2'], float(expected))
+        self.assertEqual(result['monthly_area_km2'], {'2025-03': expected})
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, Status.COMPLETED)
+
+    @mock.patch('project.utils.calculations.analysis.Analysis')
+    def test_only_uncovered_months_are_analysed(self, mock_analysis):
+        result = self.run_task('2025-03-01', '2025-04-30')
+
+        mock_analysis.assert_called_once()
+        kwargs = mock_analysis.call_args.kwargs
+        self.assertEqual(kwargs['start_date'], '2025-04-01')
+        self.assertEqual(kwargs['end_date'], '2025-04-30')
+        self.assertEqual(kwargs['bbox'], self.bbox)
+        self.assertEqual(list(result['monthly_area_km2']), ['2025-03'])
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+)
+class ComputeWaterExtentDataCubeTest(TestCase):
+    """Test that AWEI outputs stored in a data cube are reused.
+    """
+    fixtures = ["monitoring_indicator_type.json"]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.bbox = [29.16, -28.2, 29.18, -28.19]
+        crawler = CrawlerFactory(bbox=Polygon.from_bbox(self.bbox), resolution=20)
+        origin_x, origin_y, width, height = cube_grid(self.bbox, 20)
+        self.cube = DataCube.objects.create(
+            crawler=crawler,
+            path=os.path.join(self.directory, 'cube.zarr'),
+            resolution=20,
+            origin_x=origin_x,
+            origin_y=origin_y,
+            width=width,
+            height=height,
+            start_date=date(2015, 1, 1),
+            bbox=Polygon.from_bbox(self.bbox),
+        )
+        # 20 x 20 water pixels of AWEI 0.5 in a block of land pixels
+        values = np.full((30, 30), -0.5, dtype=np.float32)
+        values[5:25, 5:25] = 0.5
+        x = origin_x + 20 * (np.arange(30) + 0.5)
+        y = origin_y - 20 * (np.arange(30) + 0.5)
+        data_array = xr.DataArray(values, coords={'y': y, 'x': x}, dims=('y', 'x'))
+        write_month(
+            self.cube, 'AWEI', date(2025, 3, 1), data_array.rio.write_crs('EPSG:6933')
+        )
+        TaskOutput.objects.create(
+            task=AnalysisTaskFactory(parameters={'bbox': self.bbox, 'spatial_resolution': 20}),
+            monitoring_type=MonitoringIndicatorType.objects.get(name='AWEI'),
+            observation_date=date(2025, 3, 1),
+            bbox=Polygon.from_bbox(self.bbox),
+            datacube=self.cube,
+            size=0,
+        )
+        self.task = AnalysisTask.objects.create(
+            task_name='Water Extent',
+            parameters={'bbox': self.bbox, 'spatial_resolution': 20},
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @mock.patch('project.utils.calculations.analysis.Analysis')
+    def test_datacube_month(self, mock_analysis):
+        result = compute_water_extent_task.apply(kwargs={
+            'task_id': str(self.task.uuid),
+            'bbox': self.bbox,
+            'spatial_resolution': 20,
+            'start_date': '2025-03-01',
+            'end_date': '2025-03-31',
+        }).get()
+
+        mock_analysis.assert_not_called()
+        self.assertEqual(list(result['monthly_area_km2']), ['2025-03'])
+        self.assertEqual(result['area_km2'], 0.16)
+
+
+class WaterExtentFromOutputsTest(SimpleTestCase):
+    """Test the windowed water extent of several outputs.
+    """
+
+    def test_windows_match_single_read(self):
+        path = os.path.join(TEST_DATA_PATH, 'NDCI_2025_03.tif')
+        bbox = [29.1662, -28.1967, 29.171, -28.1919]
+        whole = water_extent_from_outputs([path], bbox, threshold=0.01)
+        windowed = water_extent_from_outputs([path, path], bbox, threshold=0.01, chunk_size=7)
+        self.assertGreater(whole['area_km2'], 0)
+        self.assertEqual(windowed, whole)
+
+
+class WaterMaskExtentTest(SimpleTestCase):
+    """Test that stored water masks count their water pixels only.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        mask = np.zeros((100, 100), dtype=np.uint8)
+        mask[:10, :10] = 1
+        self.path = write_tiff(os.path.join(self.directory, 'mask.tif'), mask, nodata=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_mask_extent_at_threshold_zero(self):
+        result = calculate_water_extent_from_tif(self.path, threshold=0.0)
+        self.assertAlmostEqual(result['area_km2'], 100 * RESOLUTION ** 2 / 1e6)
+
+    def test_mask_of_mask_at_threshold_zero(self):
+        result = generate_water_mask_from_tif(
+            self.path, os.path.join(self.directory, 'mask_mask.tif'), threshold=0.0
+        )
+        with rasterio.open(result['mask_path']) as src:
+            self.assertEqual(int(src.read(1).sum()), 100)
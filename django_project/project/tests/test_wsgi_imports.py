@@ -0,0 +1,57 @@
+import json
+import subprocess
+import sys
+from django.test import SimpleTestCase
+from core.settings.utils import absolute_path
+
+# Packages of the raster analysis, imported by Celery task bodies only
+ANALYSIS_PACKAGES = (
+    'dask',
+    'geopandas',
+    'matplotlib',
+    'odc',
+    'pandas',
+    'pystac_client',
+    'rioxarray',
+    'scipy',
+    'xarray',
+)
+
+IMPORT_SCRIPT = """
+import json, sys
+import core.wsgi
+import core.urls
+print(json.dumps(sorted({name.split('.')[0] for name in sys.modules})))
+"""
+
+# Renders a tile over a test raster, as the tile view of a web process does
+TILE_SCRIPT = IMPORT_SCRIPT.replace("print(", """
+import rasterio
+from project.utils.tiles import render_tile
+with rasterio.open('project/tests/data/pollution/NDCI_2025_03.tif') as src:
+    render_tile(src, 16, 38078, 38121, 'BrBG', -1, 1)
+print(""")
+
+
+class WSGIImportTest(SimpleTestCase):
+    """Test the web processes do not load the raster analysis stack.
+    """
+
+    def imported_packages(self, script):
+        # A fresh interpreter, the test runner has imported everything already
+        result = subprocess.run(
+            [sys.executable, '-c', script],
+            cwd=absolute_path(),
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        return set(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    def test_wsgi_does_not_import_analysis_packages(self):
+        modules = self.imported_packages(IMPORT_SCRIPT)
+        self.assertEqual(sorted(modules.intersection(ANALYSIS_PACKAGES)), [])
+
+    def test_tiles_do_not_import_analysis_packages(self):
+        modules = self.imported_packages(TILE_SCRIPT)
+        self.assertEqual(sorted(modules.intersection(ANALYSIS_PACKAGES)), [])
@@ -0,0 +1,66 @@
+import contextlib
+import io
+import json
+import shutil
+import tempfile
+import numpy as np
+from django.test import SimpleTestCase
+from project.utils.benchmarks.suite import CASES, compare, run_benchmarks
+from project.utils.benchmarks.synthetic import SyntheticScene, make_dataset
+
+
+class SyntheticSceneTest(SimpleTestCase):
+    """Test the synthetic inputs of the benchmarks.
+    """
+
+    def test_dataset(self):
+        dataset = make_dataset(64)
+        self.assertEqual(dict(dataset.sizes), {'time': 2, 'y': 64, 'x': 64})
+        self.assertEqual(dataset.rio.crs.to_epsg(), 6933)
+        self.assertEqual(dataset.blue.dtype, np.uint16)
+        self.assertIn(9, np.unique(dataset.scl.isel(time=1).values))
+        # Same seed, same values
+        np.testing.assert_array_equal(make_dataset(64).nir.values, dataset.nir.values)
+
+    def test_water(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        scene = SyntheticScene(64, directory)
+        awei = scene.indices['AWEI']
+        self.assertGreater((awei >= -0.11).sum(), 200)
+        self.assertGreater((awei < -0.11).sum(), 200)
+
+
+class BenchmarkSuiteTest(SimpleTestCase):
+    """Test running the benchmark suite offline.
+    """
+
+    def test_run_benchmarks(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = run_benchmarks(sizes=['small'], repeat=1)
+
+        self.assertEqual(
+            [result['case'] for result in report['results']], list(CASES)
+        )
+        for result in report['results']:
+            self.assertEqual(result['size'], 'small')
+            self.assertEqual(len(result['times']), 1)
+            self.assertGreater(result['median'], 0)
+        self.assertIn('numpy', report['versions'])
+        json.dumps(report)
+
+    def test_compare(self):
+        baseline = {'results': [
+            {'case': 'apply_mask', 'size': 'small', 'median': 1.0},
+            {'case': 'extract_tiff_info', 'size': 'small', 'median': 1.0},
+        ]}
+        report = {'results': [
+            {'case': 'apply_mask', 'size': 'small', 'median': 1.5},
+            {'case': 'extract_tiff_info', 'size': 'small', 'median': 0.9},
+            {'case': 'pollution_analyzer', 'size': 'small', 'median': 1.0},
+        ]}
+        rows = compare(report, baseline)
+        self.assertEqual(
+            [(row['case'], row['ratio'], row['regression']) for row in rows],
+            [('apply_mask', 1.5, True), ('extract_tiff_info', 0.9, False)]
+        )
@@ -0,0 +1,96 @@
+import shutil
+import tempfile
+from datetime import date
+import numpy as np
+import rioxarray  # noqa
+import xarray as xr
+import zarr
+from django.contrib.gis.geos import Polygon
+from django.test import SimpleTestCase, override_settings
+from project.models.datacube import DataCube
+from project.utils.datacube import (
+    SPATIAL_CHUNK,
+    TIME_CHUNK,
+    cube_grid,
+    open_store,
+    read_pixel_history,
+    read_window,
+    write_month,
+)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+)
+class DataCubeTest(SimpleTestCase):
+    """Test writing monthly water bodies into a Zarr data cube.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.bbox = (29.16, -28.2, 29.18, -28.19)
+        origin_x, origin_y, width, height = cube_grid(self.bbox, 20)
+        self.cube = DataCube(
+            path=f'{self.directory}/cube.zarr',
+            resolution=20,
+            origin_x=origin_x,
+            origin_y=origin_y,
+            width=width,
+            height=height,
+            start_date=date(2015, 1, 1),
+            bbox=Polygon.from_bbox(self.bbox),
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def data_array(self, row, col, values):
+        """Return a south-up block at a pixel offset of the cube grid."""
+        height, width = values.shape
+        x = self.cube.origin_x + 20 * (col + np.arange(width) + 0.5)
+        y = self.cube.origin_y - 20 * (row + np.arange(height) + 0.5)
+        data_array = xr.DataArray(values[::-1], coords={'y': y[::-1], 'x': x}, dims=('y', 'x'))
+        return data_array.rio.write_crs('EPSG:6933')
+
+    def test_write_and_read(self):
+        first = np.full((3, 4), 0.5, dtype=np.float32)
+        second = np.full((2, 2), 0.8, dtype=np.float32)
+        write_month(self.cube, 'AWEI', date(2025, 3, 1), self.data_array(1, 2, first))
+        # A second water body of the same month keeps the first one
+        write_month(self.cube, 'AWEI', date(2025, 3, 1), self.data_array(10, 10, second))
+        write_month(self.cube, 'AWEI', date(2025, 5, 1), self.data_array(1, 2, first * 2))
+
+        array = open_store(self.cube)['AWEI']
+        self.assertEqual(array.chunks, (TIME_CHUNK, SPATIAL_CHUNK, SPATIAL_CHUNK))
+        self.assertEqual(array.shape[0], (2025 - 2015) * 12 + 5)
+        self.assertEqual(array[122, 1, 2], 0.5)
+        self.assertEqual(array[122, 10, 10], np.float32(0.8))
+        self.assertTrue(np.isnan(array[123, 1, 2]))
+
+        x, y = self.cube.origin_x + 20 * 2.5, self.cube.origin_y - 20 * 1.5
+        lon, lat = _to_lonlat(x, y)
+        history = read_pixel_history(self.cube, 'AWEI', lon, lat)
+        self.assertEqual(history, [(date(2025, 3, 1), 0.5), (date(2025, 5, 1), 1.0)])
+
+        data, _ = read_window(self.cube, 'AWEI', date(2025, 3, 1), self.bbox)
+        self.assertEqual(np.count_nonzero(np.isfinite(data)), 16)
+
+        # Coordinates follow the xarray conventions, in consolidated metadata
+        root = zarr.open_consolidated(self.cube.path, mode='r')
+        self.assertEqual(root['AWEI'].attrs['_ARRAY_DIMENSIONS'], ['time', 'y', 'x'])
+        self.assertEqual(root['time'].attrs['units'], 'days since 1970-01-01')
+        self.assertEqual(root['time'][-1], (date(2025, 5, 1) - date(1970, 1, 1)).days)
+
+    def test_month_before_start(self):
+        with self.assertRaises(ValueError):
+            write_month(
+                self.cube, 'AWEI', date(2014, 12, 1),
+                self.data_array(0, 0, np.ones((2, 2), dtype=np.float32))
+            )
+
+
+def _to_lonlat(x, y):
+    from rasterio.warp import transform
+
+    xs, ys = transform('EPSG:6933', 'EPSG:4326', [x], [y])
+    return xs[0], ys[0]
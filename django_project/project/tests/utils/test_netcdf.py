@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import netCDF4
+import numpy as np
+import pandas as pd
+import rioxarray  # noqa
+import xarray as xr
+from django.test import SimpleTestCase
+from project.utils.calculations.netcdf import MultiMonthNetCDF, write_data_array_netcdf
+
+
+class NetCDFExportTest(SimpleTestCase):
+    """Test the compressed and multi-month NetCDF export.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.times = pd.date_range('2025-01-31', periods=3, freq='ME').values
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def month_data(self, value, name='AWEI', size=200):
+        x = 2815000 + 20 * (np.arange(size) + 0.5)
+        y = -3547000 + 20 * (np.arange(size) + 0.5)
+        data_array = xr.DataArray(
+            np.full((size, size), value, dtype=np.float32),
+            coords={'y': y, 'x': x},
+            dims=('y', 'x'),
+            name=name,
+        )
+        return data_array.rio.write_crs('EPSG:6933')
+
+    def test_single_month_is_compressed_and_chunked(self):
+        path = os.path.join(self.directory, 'AWEI_2025_01.nc')
+        write_data_array_netcdf(self.month_data(0.5), path)
+        with netCDF4.Dataset(path) as dataset:
+            variable = dataset['AWEI']
+            self.assertTrue(variable.filters()['zlib'])
+            self.assertTrue(variable.filters()['shuffle'])
+            self.assertEqual(variable.chunking(), [128, 128])
+
+    def test_multi_month(self):
+        path = os.path.join(self.directory, 'AWEI_NDCI_2025_01_2025_03.nc')
+        with MultiMonthNetCDF(path, self.times, ['AWEI', 'NDCI'], title='Test') as nc_file:
+            for index, time in enumerate(self.times):
+                nc_file.write('AWEI', time, self.month_data(index))
+            nc_file.write('NDCI', self.times[1], self.month_data(0.1, 'NDCI'))
+        self.assertAlmostEqual(nc_file.bbox[0], 29.17, places=1)
+
+        with netCDF4.Dataset(path) as dataset:
+            self.assertEqual(dataset.Conventions, 'CF-1.8')
+            self.assertEqual(dataset['AWEI'].chunking(), [3, 128, 128])
+            self.assertTrue(dataset['AWEI'].filters()['zlib'])
+            self.assertEqual(dataset['AWEI'].grid_mapping, 'spatial_ref')
+
+        dataset = xr.open_dataset(path, decode_coords='all')
+        self.assertEqual(dataset.AWEI.dims, ('time', 'y', 'x'))
+        self.assertEqual(str(dataset.time.values[-1])[:10], '2025-03-31')
+        self.assertEqual(float(dataset.AWEI.isel(time=2).mean()), 2.0)
+        self.assertTrue(np.isnan(dataset.NDCI.isel(time=0)).all())
+        self.assertEqual(dataset.rio.crs.to_epsg(), 6933)
+        dataset.close()
+
+    def test_grid_mismatch(self):
+        path = os.path.join(self.directory, 'AWEI_2025_01_2025_03.nc')
+        with MultiMonthNetCDF(path, self.times, ['AWEI']) as nc_file:
+            nc_file.write('AWEI', self.times[0], self.month_data(0))
+            with self.assertRaises(ValueError):
+                nc_file.write('AWEI', self.times[1], self.month_data(0, size=100))
@@ -1,9 +1,19 @@
 import os
 import json
 import math
+import numpy as np
+import geopandas as gpd
+import rasterio
+from rasterio.features import geometry_mask
+from shapely.geometry import box
 from django.test import TestCase
 from core.settings.utils import absolute_path
 from project.utils.calculations.pollution import PollutionAnalyzer
+from project.utils.calculations.zonal import (
+    zonal_statistics,
+    zonal_statistics_layers,
+    zonal_statistics_many,
+)
 
 TEST_DATA_PATH = absolute_path('project', 'tests', 'data', 'pollution')
 
@@ -54,6 +64,62 @@ class PollutionAnalyzerRealDataTest(TestCase):
         self.assertIsInstance(point_data[3]["mean_index"], type(None))
         self.assertIsInstance(point_data[3]["id"], type(None))
 
-        self.assertIsInstance(non_point_data[0]["mean_index"], type(None))
+        # NaN pixels are ignored instead of turning the whole zone into NaN
+        self.assertIsInstance(non_point_data[0]["mean_index"], float)
+        self.assertEqual(non_point_data[0]["pixel_count"], 30)
         self.assertIsInstance(non_point_data[1]["id"], type(None))
-        self.assertIsInstance(non_point_data[1]["mean_index"], float)
\ No newline at end of file
+        self.assertIsInstance(non_point_data[1]["mean_index"], float)
+        self.assertEqual(non_point_data[1]["pixel_count"], 22)
+        self.assertEqual(point_data[3]["pixel_count"], 0)
+
+    def test_zonal_statistics_match_masked_reference(self):
+        """Zonal statistics must match a per-geometry masked computation."""
+        areas = gpd.read_file(self.non_point_sources)
+        with rasterio.open(self.ndci_raster) as src:
+            stats = zonal_statistics(src, areas.geometry)
+            data = src.read(1)
+            for idx, geom in enumerate(areas.to_crs(src.crs).geometry):
+                inside = geometry_mask(
+                    [geom], out_shape=data.shape, transform=src.transform, invert=True
+                )
+                values = data[inside & np.isfinite(data)]
+                self.assertEqual(stats["count"][idx], values.size)
+                self.assertAlmostEqual(stats["mean"][idx], values.mean(), places=6)
+                self.assertAlmostEqual(stats["min"][idx], values.min(), places=6)
+                self.assertAlmostEqual(stats["max"][idx], values.max(), places=6)
+                self.assertAlmostEqual(stats["std"][idx], values.std(), places=6)
+
+    def test_overlapping_geometries_keep_their_pixels(self):
+        """Overlapping and repeated polygons get the statistics they get alone."""
+        areas = gpd.read_file(self.non_point_sources)
+        with rasterio.open(self.ndci_raster) as src:
+            single = areas.to_crs(src.crs).geometry
+            overlapping = gpd.GeoSeries(
+                [single.iloc[0], single.iloc[0].buffer(-20), single.iloc[1], single.iloc[0]],
+                crs=src.crs,
+            )
+            stats = zonal_statistics(src, overlapping)
+            alone = [zonal_statistics(src, overlapping.iloc[[idx]]) for idx in range(4)]
+        self.assertEqual(stats["count"].tolist(), [s["count"][0] for s in alone])
+        np.testing.assert_allclose(stats["mean"], [s["mean"][0] for s in alone])
+        self.assertEqual(stats["count"][0], stats["count"][3])
+
+    def test_overlapping_layers_are_counted_once(self):
+        """Overlapping layers contribute each pixel once, the first layer wins."""
+        areas = gpd.read_file(self.non_point_sources).to_crs('EPSG:4326').geometry
+        single = zonal_statistics_many([self.ndci_raster], areas)
+
+        stats = zonal_statistics_layers(
+            [([self.ndci_raster], None), ([self.ndci_raster], None)], areas
+        )
+        self.assertEqual(stats["count"].tolist(), single["count"].tolist())
+        self.assertEqual(stats["rasters"].tolist(), single["rasters"].tolist())
+        np.testing.assert_allclose(stats["mean"], single["mean"])
+
+        # Half of the sources come from the first layer, the rest from the second
+        left, bottom, right, top = areas.total_bounds
+        half = box(left, bottom, (left + right) / 2, top)
+        stats = zonal_statistics_layers(
+            [([self.ndci_raster], half), ([self.ndci_raster], None)], areas
+        )
+        self.assertEqual(stats["count"].tolist(), single["count"].tolist())
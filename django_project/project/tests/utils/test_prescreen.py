@@ -0,0 +1,112 @@
+import shutil
+import tempfile
+from datetime import datetime
+from types import SimpleNamespace
+import numpy as np
+import xarray as xr
+from django.test import SimpleTestCase, override_settings
+from project.utils.benchmarks.synthetic import SyntheticScene, write_tiff
+from project.utils.calculations.analysis import max_cloud_cover
+from project.utils.calculations.prescreen import (
+    clear_fraction,
+    clear_pixels,
+    prescreen_items,
+    read_overview,
+)
+
+
+class PrescreenTest(SimpleTestCase):
+    """Test the cloud pre-screening of scenes over an AOI.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.scene = SyntheticScene(512, self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def item(self, item_id, scl, **kwargs):
+        path = write_tiff(f"{self.directory}/{item_id}.tif", scl.astype(np.uint8), nodata=0)
+        return SimpleNamespace(id=item_id, assets={'scl': SimpleNamespace(href=path)}, **kwargs)
+
+    def test_clear_pixels(self):
+        scl = np.array([0, 3, 4, 6, 8, 9, 10, 11])
+        self.assertEqual(
+            clear_pixels(scl).tolist(),
+            [False, False, True, True, False, False, False, True]
+        )
+        # Fill, clear, dilated cloud, cirrus, cloud, cloud shadow, water
+        qa_pixel = np.array([1, 21824, 21826, 54596, 22280, 23888, 21952])
+        self.assertEqual(
+            clear_pixels(qa_pixel, 'landsat').tolist(),
+            [False, True, False, False, False, False, True]
+        )
+
+    def test_clear_pixels_data_array(self):
+        scl = xr.DataArray(np.array([[0, 3, 4], [6, 9, 10]], dtype=np.uint8)).chunk()
+        self.assertEqual(
+            clear_pixels(scl).values.tolist(), [[False, False, True], [True, False, False]]
+        )
+
+    def test_read_overview(self):
+        data, coverage = read_overview(self.scene.awei_path, self.scene.bbox, max_size=64)
+        self.assertEqual(data.shape, (64, 64))
+        self.assertEqual(data.dtype, np.float32)
+        self.assertAlmostEqual(coverage, 1.0, places=2)
+
+    def test_partial_coverage(self):
+        # The AOI extends as far again east of the raster
+        minx, miny, maxx, maxy = self.scene.bbox
+        bbox = [minx, miny, maxx + (maxx - minx), maxy]
+        item = self.item('clear', np.full((512, 512), 4))
+
+        self.assertAlmostEqual(clear_fraction(item, bbox), 0.5, places=2)
+
+    @override_settings(PRESCREEN_MIN_CLEAR_FRACTION=0, STAC_MAX_CLOUD_COVER=20)
+    def test_max_cloud_cover_without_prescreening(self):
+        self.assertEqual(max_cloud_cover(), 20)
+
+    @override_settings(PRESCREEN_MIN_CLEAR_FRACTION=0.5, PRESCREEN_MAX_CLOUD_COVER=60)
+    def test_max_cloud_cover_with_prescreening(self):
+        self.assertEqual(max_cloud_cover(), 60)
+
+    def test_prescreen_items(self):
+        clear = np.full((512, 512), 4)
+        cloudy = clear.copy()
+        cloudy[:, 64:] = 9
+        half = clear.copy()
+        half[:, 256:] = 0
+        items = [
+            self.item('clear', clear),
+            self.item('cloudy', cloudy),
+            self.item('half', half),
+            SimpleNamespace(id='missing', assets={'scl': SimpleNamespace(href='missing.tif')}),
+        ]
+
+        kept, fractions = prescreen_items(items, self.scene.bbox, min_clear_fraction=0.2)
+
+        self.assertEqual([item.id for item in kept], ['clear', 'half', 'missing'])
+        self.assertAlmostEqual(fractions['clear'], 1.0)
+        self.assertAlmostEqual(fractions['cloudy'], 0.125, places=2)
+        self.assertAlmostEqual(fractions['half'], 0.5, places=2)
+        self.assertIsNone(fractions['missing'])
+
+    def test_tiles_of_one_acquisition(self):
+        # The AOI straddles two tiles of one pass, half of it on each
+        west = np.full((512, 512), 4)
+        west[:, 256:] = 0
+        east = np.full((512, 512), 4)
+        east[:, :256] = 0
+        properties = {'platform': 'sentinel-2a'}
+        items = [
+            self.item('west', west, datetime=datetime(2025, 3, 1, 8, 0), properties=properties),
+            self.item('east', east, datetime=datetime(2025, 3, 1, 8, 1), properties=properties),
+            self.item('later', west, datetime=datetime(2025, 3, 6, 8, 0), properties=properties),
+        ]
+
+        kept, fractions = prescreen_items(items, self.scene.bbox, min_clear_fraction=0.6)
+
+        self.assertEqual([item.id for item in kept], ['west', 'east'])
+        self.assertAlmostEqual(fractions['west'], 0.5, places=2)
+        self.assertAlmostEqual(fractions['east'], 0.5, places=2)
@@ -0,0 +1,53 @@
+import json
+import os
+import shutil
+import tempfile
+import dask.array as da
+from django.test import SimpleTestCase
+from project.utils.profiling import RunProfiler
+
+
+class RunProfilerTest(SimpleTestCase):
+    """Test the profiler of analysis runs.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_profiles(self):
+        with RunProfiler(self.directory, name='profile_test') as profiler:
+            da.ones((200, 200), chunks=20).mean().compute(scheduler='threads')
+
+        self.assertEqual(
+            [os.path.basename(path) for path in profiler.paths],
+            ['profile_test.html', 'profile_test_dask.json']
+        )
+        with open(profiler.paths[0]) as f:
+            self.assertIn('pyinstrument', f.read())
+        with open(profiler.paths[1]) as f:
+            report = json.load(f)
+        self.assertGreater(report['tasks'], 100)
+        self.assertEqual(sum(entry['count'] for entry in report['prefixes']), report['tasks'])
+
+    def test_profiles_written_on_error(self):
+        with self.assertRaises(ValueError):
+            with RunProfiler(self.directory) as profiler:
+                raise ValueError()
+        self.assertEqual(len(profiler.paths), 2)
+        with open(profiler.paths[1]) as f:
+            self.assertEqual(json.load(f)['tasks'], 0)
+
+    def test_profiles_written_later(self):
+        profiler = RunProfiler(name='profile_test')
+        profiler.start()
+        da.ones((100, 100), chunks=20).sum().compute(scheduler='threads')
+        profiler.stop()
+
+        paths = profiler.write(self.directory)
+        self.assertEqual(paths, profiler.paths)
+        self.assertTrue(all(os.path.dirname(path) == self.directory for path in paths))
+        with open(paths[1]) as f:
+            self.assertGreater(json.load(f)['tasks'], 0)
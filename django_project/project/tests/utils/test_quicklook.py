@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+import xarray as xr
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+from project.utils.calculations.quicklook import (
+    BRBG_LUT,
+    COLORMAPS,
+    colorize,
+    render_quicklook,
+    stretch_range,
+    write_thumbnails,
+)
+
+
+class QuickLookTest(SimpleTestCase):
+    """Test the numpy/Pillow quick-look renderer.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'NDCI_2025_03.png')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def data_array(self, height, width):
+        data = np.tile(np.linspace(-1, 1, width, dtype=np.float32), (height, 1))
+        # South-up, as the analysis arrays are sorted by y
+        return xr.DataArray(
+            data,
+            coords={'y': np.arange(height) * 20.0, 'x': np.arange(width) * 20.0},
+            dims=('y', 'x'),
+        )
+
+    def test_lookup_table(self):
+        self.assertEqual(BRBG_LUT.shape, (256, 4))
+        self.assertEqual(tuple(BRBG_LUT[0]), (0x54, 0x30, 0x05, 255))
+        self.assertEqual(tuple(BRBG_LUT[-1]), (0x00, 0x3c, 0x30, 255))
+
+    def test_colormaps(self):
+        self.assertEqual(tuple(COLORMAPS['Blues'][0]), (0xf7, 0xfb, 0xff, 255))
+        self.assertEqual(tuple(COLORMAPS['viridis'][-1]), (0xfd, 0xe7, 0x25, 255))
+        data = np.array([[np.nan, 0.0, 1.0]], dtype=np.float32)
+        rgba = colorize(data, 0.0, 1.0, COLORMAPS['Blues'])
+        self.assertEqual(rgba[0, 0, 3], 0)
+        self.assertEqual(tuple(rgba[0, 2]), tuple(COLORMAPS['Blues'][-1]))
+        # An empty value range maps every value to the first color
+        self.assertEqual(tuple(colorize(data, 1.0, 1.0)[0, 2]), tuple(BRBG_LUT[0]))
+
+    def test_stretch_range(self):
+        data = np.linspace(0, 100, 10001, dtype=np.float32).reshape(1, -1)
+        vmin, vmax = stretch_range(data, sample_size=1000)
+        self.assertAlmostEqual(vmin, 2, delta=0.5)
+        self.assertAlmostEqual(vmax, 98, delta=0.5)
+        self.assertEqual(stretch_range(np.ones((4, 4))), (0.9, 1.1))
+        self.assertEqual(stretch_range(np.full((4, 4), np.nan)), (-0.1, 0.1))
+
+    @override_settings(QUICKLOOK_MAX_SIZE=100)
+    def test_render_max_size(self):
+        data_array = self.data_array(300, 450)
+        data_array[0, :] = np.nan
+        render_quicklook(data_array, self.path)
+
+        with Image.open(self.path) as image:
+            self.assertEqual(image.mode, 'RGBA')
+            self.assertEqual(image.size, (90, 60))
+            pixels = np.asarray(image)
+        # Row 0 of the south-up array is the bottom row of the image
+        self.assertTrue((pixels[-1, :, 3] == 0).all())
+        self.assertTrue((pixels[0, :, 3] == 255).all())
+        self.assertEqual(tuple(pixels[0, 0, :3]), tuple(BRBG_LUT[0, :3]))
+
+    def test_thumbnails(self):
+        render_quicklook(self.data_array(64, 512), self.path)
+        paths = write_thumbnails(self.path, [64, 256])
+
+        self.assertEqual(
+            {size: os.path.basename(path) for size, path in paths.items()},
+            {256: 'NDCI_2025_03_256.png', 64: 'NDCI_2025_03_64.png'}
+        )
+        with Image.open(paths[256]) as image:
+            self.assertEqual(image.size, (256, 32))
+        with Image.open(paths[64]) as image:
+            self.assertEqual(image.size, (64, 8))
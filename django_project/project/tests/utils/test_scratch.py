@@ -0,0 +1,125 @@
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from django.test import SimpleTestCase, override_settings
+from project.utils.scratch import (
+    ScratchDirectory,
+    ScratchSpaceError,
+    host_root,
+    reclaim_orphans,
+    scratch_usage,
+)
+
+
+class ScratchDirectoryTest(SimpleTestCase):
+    """Test the scratch space of analysis working directories.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.tmpfs = tempfile.mkdtemp()
+        self.settings = override_settings(
+            SCRATCH_DIR=self.root,
+            SCRATCH_MAX_SIZE=1000,
+            SCRATCH_TMPFS_DIR=self.tmpfs,
+            SCRATCH_TMPFS_JOB_SIZE=100,
+            SCRATCH_TMPFS_MAX_SIZE=150,
+            SCRATCH_ORPHAN_AGE=3600,
+        )
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.root)
+        shutil.rmtree(self.tmpfs)
+
+    def write(self, directory, size):
+        with open(os.path.join(directory.path, 'output.tif'), 'wb') as f:
+            f.write(b'0' * size)
+
+    def dead_pid(self):
+        process = subprocess.Popen([sys.executable, '-c', 'pass'])
+        process.wait()
+        return process.pid
+
+    def test_cleanup_on_success_and_failure(self):
+        with ScratchDirectory() as scratch:
+            self.write(scratch, 10)
+        self.assertFalse(os.path.exists(scratch.path))
+
+        with self.assertRaises(ValueError):
+            with ScratchDirectory() as scratch:
+                raise ValueError()
+        self.assertFalse(os.path.exists(scratch.path))
+
+    def test_small_jobs_on_tmpfs(self):
+        small = ScratchDirectory(estimated_size=100)
+        self.assertEqual(os.path.dirname(small.path), host_root(self.tmpfs))
+
+        # The tmpfs is reserved, so the next small job goes to disk
+        other = ScratchDirectory(estimated_size=100)
+        self.assertEqual(os.path.dirname(other.path), host_root(self.root))
+        self.assertEqual(
+            os.path.dirname(ScratchDirectory(estimated_size=500).path), host_root(self.root)
+        )
+
+    def test_budget(self):
+        scratch = ScratchDirectory(estimated_size=500)
+        self.write(scratch, 800)
+        with self.assertRaises(ScratchSpaceError):
+            ScratchDirectory(estimated_size=500)
+
+        scratch.cleanup()
+        ScratchDirectory(estimated_size=500)
+
+    def test_estimates_are_reserved(self):
+        # Nothing is written yet, the estimate of the first job still counts
+        ScratchDirectory(estimated_size=600)
+        with self.assertRaises(ScratchSpaceError):
+            ScratchDirectory(estimated_size=500)
+        ScratchDirectory(estimated_size=400)
+
+    def test_budget_is_per_worker(self):
+        other_host = os.path.join(self.root, 'other-host', f'other-host_{os.getpid()}_abc')
+        os.makedirs(other_host)
+        with open(os.path.join(other_host, 'output.tif'), 'wb') as f:
+            f.write(b'0' * 900)
+        ScratchDirectory(estimated_size=900)
+
+    def test_reclaim_orphans(self):
+        live = ScratchDirectory(estimated_size=500)
+        own_root = host_root(self.root)
+        orphan = os.path.join(own_root, f"{socket.gethostname()}_{self.dead_pid()}_abc")
+        other_host = os.path.join(self.root, 'other-host')
+        recreated_host = os.path.join(self.root, 'recreated-host')
+        for path in [orphan, other_host, recreated_host]:
+            os.makedirs(path)
+        with open(os.path.join(orphan, 'output.tif'), 'wb') as f:
+            f.write(b'0' * 900)
+        # Nothing changed in the directories of the recreated container for 2 hours
+        stale = time.time() - 7200
+        os.utime(recreated_host, (stale, stale))
+
+        # Orphans are reclaimed when the budget is exceeded
+        ScratchDirectory(estimated_size=500)
+        self.assertFalse(os.path.exists(orphan))
+        self.assertFalse(os.path.exists(recreated_host))
+        self.assertTrue(os.path.exists(live.path))
+        self.assertTrue(os.path.exists(other_host))
+        self.assertEqual(reclaim_orphans(), [])
+
+    def test_usage(self):
+        scratch = ScratchDirectory(estimated_size=500)
+        self.write(scratch, 300)
+        usage = scratch_usage()
+        self.assertEqual([entry['path'] for entry in usage], [self.root, self.tmpfs])
+        self.assertEqual(usage[0]['directories'], 1)
+        self.assertEqual(usage[0]['orphans'], 0)
+        self.assertEqual(usage[0]['size'], 300)
+        self.assertEqual(usage[0]['reserved'], 500)
+        self.assertEqual(usage[0]['budget'], 1000)
+        self.assertEqual(usage[1]['size'], 0)
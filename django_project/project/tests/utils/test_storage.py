@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import boto3
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase, override_settings
+from moto import mock_aws
+from storages.backends.s3 import S3Storage
+from project.models.monitor import AnalysisTask, TaskOutput
+from project.utils.storage import gdal_path, store_file, store_file_as
+
+CHUNK_SIZE = 5 * 1024 * 1024
+
+
+@override_settings(OUTPUT_UPLOAD_CHUNK_SIZE=CHUNK_SIZE, OUTPUT_UPLOAD_CONCURRENCY=4)
+class OutputStorageTest(SimpleTestCase):
+    """Test storing task outputs on local and S3-compatible storage.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.media = tempfile.mkdtemp()
+        self.task = AnalysisTask(task_name='Storage test')
+        self.content = os.urandom(2 * CHUNK_SIZE + 1024)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        shutil.rmtree(self.media)
+
+    def write_file(self, name='AWEI_2025_03.tif'):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(self.content)
+        return path
+
+    def test_local_storage_moves_file(self):
+        output = TaskOutput(task=self.task)
+        output.file.storage = FileSystemStorage(location=self.media)
+        path = self.write_file()
+
+        name = store_file(output.file, path)
+
+        self.assertEqual(name, f'0/{self.task.uuid}/AWEI_2025_03.tif')
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(gdal_path(output.file), os.path.join(self.media, name))
+        with open(gdal_path(output.file), 'rb') as f:
+            self.assertEqual(f.read(), self.content)
+
+        # A second output of the same name does not overwrite the first
+        other = TaskOutput(task=self.task)
+        other.file.storage = output.file.storage
+        self.assertNotEqual(store_file(other.file, self.write_file()), name)
+
+    @mock_aws
+    def test_object_storage_multipart_upload(self):
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket='outputs')
+        output = TaskOutput(task=self.task)
+        output.file.storage = S3Storage(bucket_name='outputs', file_overwrite=False)
+        path = self.write_file()
+
+        name = store_file(output.file, path)
+
+        self.assertEqual(output.file.name, name)
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(gdal_path(output.file), f'/vsis3/outputs/{name}')
+        stored = client.get_object(Bucket='outputs', Key=name)
+        self.assertEqual(stored['Body'].read(), self.content)
+        # Uploaded in three parts of the configured chunk size
+        self.assertTrue(stored['ETag'].strip('"').endswith('-3'))
+        self.assertIn(name, output.file.url)
+
+        thumbnail = store_file_as(
+            output.file.storage, self.write_file('thumbnail.png'), 'thumbnails/AWEI_256.png'
+        )
+        self.assertEqual(thumbnail, 'thumbnails/AWEI_256.png')
+        self.assertTrue(output.file.storage.exists(thumbnail))
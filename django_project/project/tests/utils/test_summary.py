@@ -0,0 +1,64 @@
+import numpy as np
+import rioxarray  # noqa
+import xarray as xr
+from django.test import SimpleTestCase
+from rasterio.crs import CRS
+from project.utils.calculations.summary import (
+    pixel_area_km2,
+    summarize,
+    summarize_data_array,
+    summarize_water_mask,
+)
+
+
+class SummarizeTest(SimpleTestCase):
+
+    def test_statistics_ignore_nan(self):
+        values = np.array([[0.1, 0.2, np.nan], [0.3, 0.4, np.nan]])
+        summary = summarize(values)
+
+        self.assertEqual(summary['pixel_count'], 6)
+        self.assertEqual(summary['valid_count'], 4)
+        self.assertAlmostEqual(summary['valid_fraction'], 4 / 6)
+        self.assertAlmostEqual(summary['mean'], 0.25)
+        self.assertAlmostEqual(summary['min'], 0.1)
+        self.assertAlmostEqual(summary['max'], 0.4)
+        self.assertAlmostEqual(summary['p50'], 0.25)
+        self.assertIsNone(summary['water_area_km2'])
+
+    def test_all_nan(self):
+        summary = summarize(np.full((2, 2), np.nan))
+        self.assertEqual(summary['valid_count'], 0)
+        self.assertIsNone(summary['mean'])
+        self.assertIsNone(summary['p95'])
+
+    def test_water_area(self):
+        values = np.array([-0.5, 0.0, 0.2, 0.7])
+        summary = summarize(values, pixel_area_km2=0.0004, water_threshold=0.0)
+        # Pixels at the threshold count as water, as in the stored masks
+        self.assertAlmostEqual(summary['water_area_km2'], 0.0012)
+
+    def test_pixel_area(self):
+        self.assertAlmostEqual(pixel_area_km2(CRS.from_epsg(6933), (20, -20)), 0.0004)
+        self.assertIsNone(pixel_area_km2(CRS.from_epsg(4326), (0.0001, -0.0001)))
+
+    def awei_array(self):
+        return xr.DataArray(
+            np.array([[-0.5, 0.0, 0.2], [np.nan, 0.7, -1.0]], dtype=np.float32),
+            dims=('y', 'x'),
+            coords={'y': [10.0, -10.0], 'x': [0.0, 20.0, 40.0]},
+        ).rio.write_crs('EPSG:6933').chunk()
+
+    def test_lazy_array_is_loaded_once(self):
+        awei = self.awei_array()
+        summary = summarize_data_array(awei, water_threshold=0.0)
+        self.assertIsNone(awei.chunks)
+        self.assertEqual(summary['valid_count'], 5)
+        self.assertAlmostEqual(summary['water_area_km2'], 0.0012)
+
+    def test_water_mask(self):
+        summary = summarize_water_mask(self.awei_array(), 0.0)
+        # Only the water pixels are stored in the mask, all of them 1
+        self.assertEqual(summary['valid_count'], 3)
+        self.assertEqual(summary['mean'], 1.0)
+        self.assertAlmostEqual(summary['water_area_km2'], 0.0012)
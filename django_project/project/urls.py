@@ -5,7 +5,14 @@ from project.api_views import (
     AWEIWaterExtentView,
     WaterExtentStatusView,
     TaskOutputViewSet,
-    AnalysisTaskListAPIView
+    TaskOutputTileView,
+    TaskOutputClipView,
+    AnalysisTaskListAPIView,
+    PollutionAnalysisAPIView,
+    PollutionStatisticViewSet,
+    TimeSeriesAPIView,
+    BatchAnalysisAPIView,
+    BatchAnalysisStatusAPIView
 )
 from project.api_views.dataset import (
     DatasetOverviewView, )
@@ -16,6 +23,12 @@ urlpatterns = [
     path('water-analysis/<uuid:task_uuid>/',
          AnalysisTaskStatusAPIView.as_view(),
          name='analysis-task-status'),
+    path("batch-analysis/", BatchAnalysisAPIView.as_view(), name="batch-analysis"),
+    path(
+        "batch-analysis/<uuid:batch_uuid>/",
+        BatchAnalysisStatusAPIView.as_view(),
+        name="batch-analysis-status"
+    ),
     path(
         "awei-water-extent/<uuid:task_uuid>/",
         WaterExtentStatusView.as_view(),
@@ -23,9 +36,30 @@ urlpatterns = [
     ),
     path("awei-water-extent/", AWEIWaterExtentView.as_view(), name="awei-water-extent"),
     path("task-outputs/", TaskOutputViewSet.as_view({'get': 'list'}), name="task-output-list"),
+    path(
+        "task-outputs/<int:pk>/tiles/<int:z>/<int:x>/<int:y>.<str:image_format>",
+        TaskOutputTileView.as_view(),
+        name="task-output-tile"
+    ),
+    path(
+        "task-outputs/<int:pk>/clip/",
+        TaskOutputClipView.as_view(),
+        name="task-output-clip"
+    ),
+    path("time-series/", TimeSeriesAPIView.as_view(), name="time-series"),
     path(
         "analysis-tasks/",
         AnalysisTaskListAPIView.as_view({'get': 'list'}),
         name="analysis-tasks-list"
     ),
+    path(
+        "pollution-analysis/",
+        PollutionAnalysisAPIView.as_view(),
+        name="pollution-analysis"
+    ),
+    path(
+        "pollution-statistics/",
+        PollutionStatisticViewSet.as_view({'get': 'list'}),
+        name="pollution-statistic-list"
+    ),
 ]
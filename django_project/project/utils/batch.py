@@ -0,0 +1,51 @@
+# Largest extent in degrees of a group of nearby bboxes, about one Sentinel-2 tile
+MAX_GROUP_EXTENT = 1.0
+MAX_GROUP_SIZE = 20
+
+
+def union_bbox(bboxes):
+    """Return the bbox enclosing all ``bboxes``."""
+    return [
+        min(bbox[0] for bbox in bboxes),
+        min(bbox[1] for bbox in bboxes),
+        max(bbox[2] for bbox in bboxes),
+        max(bbox[3] for bbox in bboxes),
+    ]
+
+
+def group_nearby(bboxes, max_extent=MAX_GROUP_EXTENT, max_size=MAX_GROUP_SIZE):
+    """
+    Group bboxes that lie close together, so a group can share one scene search.
+
+    Bboxes are visited from west to east and added to the first group whose
+    enclosing bbox stays within ``max_extent`` degrees in both directions.
+
+    :return: List of groups, each a list of indices into ``bboxes``.
+    """
+    order = sorted(
+        range(len(bboxes)),
+        key=lambda i: ((bboxes[i][0] + bboxes[i][2]) / 2, (bboxes[i][1] + bboxes[i][3]) / 2)
+    )
+    groups = []
+    extents = []
+    for i in order:
+        for group, extent in zip(groups, extents):
+            if len(group) >= max_size:
+                continue
+            merged = union_bbox([extent, bboxes[i]])
+            if merged[2] - merged[0] <= max_extent and merged[3] - merged[1] <= max_extent:
+                group.append(i)
+                extent[:] = merged
+                break
+        else:
+            groups.append([i])
+            extents.append(list(bboxes[i]))
+    return groups
+
+
+def bboxes_intersect(first, second):
+    """Return True when two [minx, miny, maxx, maxy] bboxes overlap."""
+    return (
+        first[0] <= second[2] and second[0] <= first[2] and
+        first[1] <= second[3] and second[1] <= first[3]
+    )
@@ -0,0 +1,309 @@
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.conf import settings
+from django.utils import timezone
+
+from project.utils.benchmarks.synthetic import SyntheticScene
+
+# Pixels per side of the synthetic scenes
+SIZES = {
+    'small': 256,
+    'medium': 1024,
+    'large': 4096,
+}
+DEFAULT_SIZES = ('small', 'medium')
+# Ratio of the median times above which a case counts as a regression
+REGRESSION_THRESHOLD = 1.2
+
+CASES = {}
+
+
+def case(name):
+    """
+    Register a benchmark case.
+
+    A case is a context manager factory taking a :class:`SyntheticScene`; it
+    prepares the inputs, yields the callable that is timed, and cleans up
+    afterwards. It is entered once per repetition, so only the callable is
+    timed.
+    """
+    def decorator(func):
+        CASES[name] = contextmanager(func)
+        return func
+    return decorator
+
+
+def constance_defaults():
+    """Return the defaults of the constance settings, read without a database."""
+    return SimpleNamespace(**{
+        key: value[0] for key, value in settings.CONSTANCE_CONFIG.items()
+    })
+
+
+@contextmanager
+def offline(scene):
+    """
+    Run the analysis without network, database or task: ``stac_load``
+    returns the synthetic dataset, outputs are left in the working
+    directory and constance settings have their defaults.
+    """
+    from project.utils.calculations.analysis import Analysis
+
+    config = constance_defaults()
+    with ExitStack() as stack:
+        stack.enter_context(patch(
+            'project.utils.calculations.analysis.stac_load', return_value=scene.dataset
+        ))
+        stack.enter_context(patch(
+            'project.utils.calculations.analysis.config', config
+        ))
+        stack.enter_context(patch(
+            'project.utils.calculations.water_extent.config', config
+        ))
+        stack.enter_context(patch.object(Analysis, 'save_output', return_value=None))
+        yield
+
+
+def analysis(scene, **kwargs):
+    from project.utils.calculations.analysis import Analysis
+
+    parameters = {
+        'start_date': '2025-03-01',
+        'end_date': '2025-03-31',
+        'bbox': scene.bbox,
+        'export_plot': False,
+        'export_nc': False,
+        'export_cog': False,
+        'calc_types': ['AWEI'],
+        'items': scene.items,
+    }
+    parameters.update(kwargs)
+    return Analysis(**parameters)
+
+
+@case('analysis_run')
+def analysis_run(scene):
+    calculation = analysis(
+        scene,
+        export_plot=True,
+        export_nc=True,
+        export_cog=True,
+        calc_types=['AWEI', 'NDTI', 'NDCI'],
+    )
+    try:
+        yield calculation.run
+    finally:
+        calculation.cleanup()
+
+
+@case('extract_water_bodies')
+def extract_water_bodies(scene):
+    calculation = analysis(scene, auto_detect_water=True)
+    awei = scene.index_array('AWEI')
+    try:
+        yield lambda: calculation.extract_water_bodies(awei, 2025, 3)
+    finally:
+        calculation.cleanup()
+
+
+@case('apply_mask')
+def apply_mask(scene):
+    calculation = analysis(scene, mask_path=scene.mask_path)
+    awei = scene.index_array('AWEI')
+    try:
+        yield lambda: calculation.apply_mask(awei)
+    finally:
+        calculation.cleanup()
+
+
+@case('prescreen_items')
+def prescreen_items(scene):
+    from project.utils.calculations.prescreen import prescreen_items
+
+    items = scene.items
+    bbox = scene.bbox
+    yield lambda: prescreen_items(items, bbox)
+
+
+@case('calculate_indices')
+def calculate_indices(scene):
+    from project.utils.calculations.calculations import bands_sentinel2
+    from project.utils.calculations.calculations import calculate_indices
+
+    path = scene.multiband_path
+    with tempfile.TemporaryDirectory() as output_dir:
+        yield lambda: calculate_indices(path, bands_sentinel2, output_dir)
+
+
+@case('extract_tiff_info')
+def extract_tiff_info(scene):
+    from project.utils.calculations.extract_info import extract_tiff_info
+
+    path = scene.multiband_path
+    yield lambda: extract_tiff_info(path)
+
+
+@case('calculate_water_extent_from_tif')
+def calculate_water_extent_from_tif(scene):
+    from project.utils.calculations.water_extent import calculate_water_extent_from_tif
+
+    path = scene.awei_path
+    yield lambda: calculate_water_extent_from_tif(path, threshold=-0.11)
+
+
+@case('generate_water_mask_from_tif')
+def generate_water_mask_from_tif(scene):
+    from project.utils.calculations.water_extent import generate_water_mask_from_tif
+
+    path = scene.awei_path
+    with tempfile.TemporaryDirectory() as output_dir:
+        mask_path = os.path.join(output_dir, 'mask.tif')
+        yield lambda: generate_water_mask_from_tif(path, mask_path)
+
+
+@case('water_extent_from_outputs')
+def water_extent_from_outputs(scene):
+    from project.utils.calculations.water_extent import water_extent_from_outputs
+
+    paths = [scene.awei_path, scene.mask_path]
+    bbox = scene.bbox
+    yield lambda: water_extent_from_outputs(paths, bbox, threshold=-0.11)
+
+
+@case('pollution_analyzer')
+def pollution_analyzer(scene):
+    from project.utils.calculations.pollution import PollutionAnalyzer
+
+    inputs = (
+        scene.ndti_path,
+        scene.ndci_path,
+        scene.point_sources_path,
+        scene.non_point_sources_path,
+    )
+    with tempfile.TemporaryDirectory() as output_dir:
+        yield lambda: PollutionAnalyzer(*inputs, output_dir).generate_reports()
+
+
+def time_case(scene, name, repeat=3):
+    """Return the wall times in seconds of ``repeat`` runs of a case."""
+    times = []
+    with offline(scene):
+        for _ in range(repeat):
+            with CASES[name](scene) as func:
+                start = time.perf_counter()
+                func()
+                times.append(time.perf_counter() - start)
+    return times
+
+
+def commit():
+    """Return the git commit of the working tree, or None outside of git."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def versions():
+    """Return the versions of the libraries the hot paths run on."""
+    import dask
+    import numpy
+    import rasterio
+    import scipy
+    import xarray
+
+    return {
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'xarray': xarray.__version__,
+        'dask': dask.__version__,
+        'scipy': scipy.__version__,
+        'rasterio': rasterio.__version__,
+        'gdal': rasterio.__gdal_version__,
+    }
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, cases=None, repeat=3, directory=None, seed=0):
+    """
+    Time the benchmark cases on synthetic scenes of every size.
+
+    :param sizes: Names of :data:`SIZES`.
+    :param cases: Names of the cases to run, defaults to all.
+    :param directory: Directory of the synthetic inputs, a temporary one
+        by default.
+    :return: Report dict, with the commit, library versions and the
+        ``min``, ``median`` and ``mean`` seconds of every case and size.
+    """
+    cases = list(cases or CASES)
+    results = []
+    with ExitStack() as stack:
+        if directory is None:
+            directory = stack.enter_context(tempfile.TemporaryDirectory())
+        for size_name in sizes:
+            size = SIZES[size_name]
+            scene = SyntheticScene(size, os.path.join(directory, size_name), seed=seed)
+            for name in cases:
+                times = time_case(scene, name, repeat)
+                results.append({
+                    'case': name,
+                    'size': size_name,
+                    'pixels': size * size,
+                    'times': [round(value, 4) for value in times],
+                    'min': round(min(times), 4),
+                    'median': round(statistics.median(times), 4),
+                    'mean': round(statistics.mean(times), 4),
+                })
+    return {
+        'commit': commit(),
+        'release': settings.RELEASE,
+        'created': timezone.now().isoformat(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'versions': versions(),
+        'repeat': repeat,
+        'seed': seed,
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Compare the median times of ``report`` with those of ``baseline``.
+
+    :return: List of dicts with ``case``, ``size``, both medians, their
+        ``ratio`` and whether it is a ``regression``, for the cases of
+        both reports.
+    """
+    baseline_medians = {
+        (result['case'], result['size']): result['median']
+        for result in baseline.get('results', [])
+    }
+    rows = []
+    for result in report['results']:
+        key = (result['case'], result['size'])
+        if key not in baseline_medians:
+            continue
+        ratio = result['median'] / baseline_medians[key] if baseline_medians[key] else None
+        rows.append({
+            'case': result['case'],
+            'size': result['size'],
+            'baseline': baseline_medians[key],
+            'median': result['median'],
+            'ratio': round(ratio, 3) if ratio is not None else None,
+            'regression': ratio is not None and ratio > threshold,
+        })
+    return rows
@@ -0,0 +1,274 @@
+import os
+from functools import cached_property
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import rasterio
+import rioxarray  # noqa
+import xarray as xr
+from rasterio.transform import from_origin
+from rasterio.warp import transform_bounds
+
+CRS = "EPSG:6933"
+RESOLUTION = 20
+# Upper left corner of the grid, near the Berg River dam
+ORIGIN = (1835460.0, -4082860.0)
+BLOCK_SIZE = 512
+
+# Surface reflectance x 10000 of the stac_load bands over water and land,
+# AWEI is about 0.2 over water and -0.5 over land
+WATER = {"blue": 600, "green": 800, "red": 500, "nir": 200, "swir16": 100, "swir22": 80}
+LAND = {"blue": 900, "green": 1200, "red": 1400, "nir": 3000, "swir16": 2500, "swir22": 1800}
+NOISE = 0.05
+# Scene classification values of vegetation, water and cloud
+SCL_VEGETATION = 4
+SCL_WATER = 6
+SCL_CLOUD = 9
+
+# Sentinel-2 band numbers of the multi-band image, as bands_sentinel2
+SENTINEL2_BANDS = {
+    1: "blue", 2: "blue", 3: "green", 4: "red", 5: "red_edge", 6: "nir", 7: "nir",
+    8: "nir", 9: "nir", 10: "swir16", 11: "swir16", 12: "swir22",
+}
+
+
+def water_bodies(size, seed=0, count=None):
+    """
+    Return a ``size`` x ``size`` boolean array of elliptic water bodies.
+
+    Every body covers at least 200 pixels, above the default
+    ``WATER_BODY_MIN_PIXEL``, so all of them are extracted.
+    """
+    rng = np.random.default_rng(seed)
+    if count is None:
+        count = max(2, size // 128)
+    y, x = np.ogrid[:size, :size]
+    water = np.zeros((size, size), dtype=bool)
+    for _ in range(count):
+        radius_y, radius_x = rng.uniform(max(8, size / 24), max(10, size / 10), 2)
+        center_y, center_x = rng.uniform(0, size, 2)
+        water |= ((y - center_y) / radius_y) ** 2 + ((x - center_x) / radius_x) ** 2 <= 1
+    return water
+
+
+def make_dataset(size, times=2, seed=0, chunk_size=1024):
+    """
+    Return a dataset like ``stac_load`` returns for Sentinel-2 scenes.
+
+    The dataset has ``times`` scenes of ``size`` x ``size`` pixels, in one
+    month, on a 20 m EPSG:6933 grid. The uint16 bands hold land and water
+    reflectance with noise, ``scl`` marks water and a cloud over part of
+    every scene but the first. The bands are dask arrays of ``chunk_size``
+    pixels, so nothing is computed until the analysis does.
+    """
+    rng = np.random.default_rng(seed)
+    water = water_bodies(size, seed)
+    shape = (times, size, size)
+
+    data_vars = {}
+    for band in WATER:
+        values = np.where(water, WATER[band], LAND[band]).astype(np.float32)
+        values = values * rng.normal(1, NOISE, shape).astype(np.float32)
+        data_vars[band] = (("time", "y", "x"), np.clip(values, 1, 10000).astype(np.uint16))
+    scl = np.broadcast_to(np.where(water, SCL_WATER, SCL_VEGETATION), shape).astype(np.uint8)
+    scl = scl.copy()
+    for scene in range(1, times):
+        start = rng.integers(0, max(1, size // 2))
+        scl[scene, start:start + size // 4, start:start + size // 4] = SCL_CLOUD
+    data_vars["scl"] = (("time", "y", "x"), scl)
+
+    left, top = ORIGIN
+    dataset = xr.Dataset(
+        data_vars,
+        coords={
+            "time": pd.date_range("2025-03-01", periods=times, freq="5D"),
+            "y": top - RESOLUTION * (np.arange(size) + 0.5),
+            "x": left + RESOLUTION * (np.arange(size) + 0.5),
+        },
+    )
+    for band in dataset.data_vars:
+        dataset[band].attrs["nodata"] = 0
+    dataset = dataset.rio.write_crs(CRS)
+    return dataset.chunk({"time": 1, "y": chunk_size, "x": chunk_size})
+
+
+def compute_indices(dataset):
+    """Return the AWEI, NDTI and NDCI of the first scene of ``dataset``."""
+    scene = {
+        band: dataset[band].isel(time=0).values.astype(np.float32) / 10000
+        for band in WATER
+    }
+    return {
+        "AWEI": (
+            scene["blue"] + 2.5 * scene["green"] -
+            1.5 * (scene["nir"] + scene["swir16"]) - 0.25 * scene["swir22"]
+        ),
+        "NDTI": (scene["green"] - scene["red"]) / (scene["green"] + scene["red"]),
+        "NDCI": (scene["red"] - scene["blue"]) / (scene["red"] + scene["blue"]),
+    }
+
+
+def write_tiff(path, data, nodata=None):
+    """Write a tiled, compressed GeoTIFF of ``data`` (bands, y, x) on the grid."""
+    if data.ndim == 2:
+        data = data[np.newaxis]
+    count, height, width = data.shape
+    tiled = height >= BLOCK_SIZE and width >= BLOCK_SIZE
+    profile = {
+        "driver": "GTiff",
+        "height": height,
+        "width": width,
+        "count": count,
+        "dtype": data.dtype.name,
+        "crs": CRS,
+        "transform": from_origin(*ORIGIN, RESOLUTION, RESOLUTION),
+        "nodata": nodata,
+        "compress": "deflate",
+        "tiled": tiled,
+    }
+    if tiled:
+        profile.update(blockxsize=BLOCK_SIZE, blockysize=BLOCK_SIZE)
+    with rasterio.open(path, "w", **profile) as dst:
+        dst.write(data)
+    return path
+
+
+def write_sources(path, geometries):
+    """Write pollution sources with an ``id`` column as GeoJSON in EPSG:4326."""
+    import geopandas as gpd
+
+    sources = gpd.GeoDataFrame(
+        {"id": list(range(1, len(geometries) + 1))}, geometry=geometries, crs=CRS
+    )
+    sources.to_crs("EPSG:4326").to_file(path, driver="GeoJSON")
+    return path
+
+
+class SyntheticScene:
+    """
+    Synthetic inputs of the raster analysis of ``size`` x ``size`` pixels,
+    written to ``directory`` on first use.
+
+    Scenes of the same size and seed hold the same values, so timings of
+    different commits are comparable.
+    """
+
+    def __init__(self, size, directory, seed=0):
+        self.size = size
+        self.directory = directory
+        self.seed = seed
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    @cached_property
+    def dataset(self):
+        return make_dataset(self.size, seed=self.seed)
+
+    @cached_property
+    def indices(self):
+        return compute_indices(self.dataset)
+
+    @cached_property
+    def bounds(self):
+        left, top = ORIGIN
+        extent = self.size * RESOLUTION
+        return left, top - extent, left + extent, top
+
+    @cached_property
+    def bbox(self):
+        """Return the ``[minx, miny, maxx, maxy]`` of the grid in EPSG:4326."""
+        return list(transform_bounds(CRS, "EPSG:4326", *self.bounds))
+
+    def index_array(self, name):
+        """Return an index as an in-memory DataArray, like a computed month."""
+        dataset = self.dataset
+        return xr.DataArray(
+            self.indices[name],
+            dims=("y", "x"),
+            coords={"y": dataset.y.values, "x": dataset.x.values},
+            name=name,
+        ).rio.write_crs(CRS)
+
+    @cached_property
+    def items(self):
+        """STAC-like items of the scenes, with their SCL band as a local GeoTIFF."""
+        items = []
+        for index, time in enumerate(self.dataset.time.values):
+            path = write_tiff(
+                self.path(f"scl_{index}.tif"),
+                self.dataset.scl.isel(time=index).values,
+                nodata=0,
+            )
+            items.append(SimpleNamespace(
+                id=f"synthetic_{pd.Timestamp(time):%Y%m%d}",
+                bbox=self.bbox,
+                assets={"scl": SimpleNamespace(href=path)},
+            ))
+        return items
+
+    @cached_property
+    def multiband_path(self):
+        """A 12-band uint16 Sentinel-2 image, in the band order of bands_sentinel2."""
+        scene = {band: self.dataset[band].isel(time=0).values for band in WATER}
+        scene["red_edge"] = ((scene["red"].astype(np.uint32) + scene["nir"]) // 2)
+        data = np.stack([scene[SENTINEL2_BANDS[band]] for band in sorted(SENTINEL2_BANDS)])
+        return write_tiff(self.path("multiband.tif"), data.astype(np.uint16), nodata=0)
+
+    def index_path(self, name):
+        path = self.path(f"{name}.tif")
+        if not os.path.exists(path):
+            write_tiff(path, self.indices[name].astype(np.float32), nodata=np.nan)
+        return path
+
+    @cached_property
+    def awei_path(self):
+        return self.index_path("AWEI")
+
+    @cached_property
+    def ndti_path(self):
+        return self.index_path("NDTI")
+
+    @cached_property
+    def ndci_path(self):
+        return self.index_path("NDCI")
+
+    @cached_property
+    def mask_path(self):
+        """A uint8 mask of the water bodies grown by a margin, as a study area."""
+        from scipy.ndimage import binary_dilation
+
+        mask = binary_dilation(water_bodies(self.size, self.seed), iterations=4)
+        return write_tiff(self.path("mask.tif"), mask.astype(np.uint8), nodata=0)
+
+    @cached_property
+    def point_sources_path(self):
+        """Point sources on a regular grid over the scene."""
+        from shapely.geometry import Point
+
+        left, bottom, right, top = self.bounds
+        steps = np.linspace(0.05, 0.95, 10)
+        points = [
+            Point(left + (right - left) * x, bottom + (top - bottom) * y)
+            for y in steps for x in steps
+        ]
+        return write_sources(self.path("point_sources.geojson"), points)
+
+    @cached_property
+    def non_point_sources_path(self):
+        """Square source areas tiling the scene."""
+        from shapely.geometry import box
+
+        left, bottom, right, top = self.bounds
+        edges = np.linspace(0, 1, 5)
+        areas = [
+            box(
+                left + (right - left) * x0, bottom + (top - bottom) * y0,
+                left + (right - left) * x1, bottom + (top - bottom) * y1,
+            )
+            for y0, y1 in zip(edges[:-1], edges[1:])
+            for x0, x1 in zip(edges[:-1], edges[1:])
+        ]
+        return write_sources(self.path("non_point_sources.geojson"), areas)
@@ -1,12 +1,14 @@
 import logging
+import math
 import uuid
 import os
 import re
+import tempfile
+from contextlib import nullcontext
 import rioxarray
 import xarray as xr
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import geopandas as gpd
 from constance import config
 from pyproj import CRS
@@ -19,18 +21,66 @@ from rasterio.warp import transform_bounds
 from celery.utils.log import get_task_logger
 from pystac_client import Client
 from odc.stac import configure_rio, stac_load
-from django.core.files import File
+from django.conf import settings
 from django.utils import timezone
 from django.contrib.gis.geos import Polygon
 from project.models import MonitoringIndicatorType
 from project.models.monitor import TaskOutput
-from project.utils.calculations.water_extent import generate_water_mask_from_tif
+from project.models.summary import TaskOutputSummary
+from project.utils.calculations.prescreen import clear_pixels, prescreen_items
+from project.utils.calculations.netcdf import MultiMonthNetCDF, write_data_array_netcdf
+from project.utils.calculations.quicklook import (
+    render_quicklook,
+    thumbnail_path,
+    write_thumbnails,
+)
+from project.utils.calculations.summary import summarize_data_array, summarize_water_mask
+from project.utils.calculations.water_extent import generate_water_mask_from_tif, is_water
+from project.utils.coverage import month_range
+from project.utils.instrumentation import StageMetrics
+from project.utils.scratch import ScratchDirectory
+from project.utils.storage import store_file, store_file_as
 from collections import defaultdict
 from datetime import datetime
 
 logger = get_task_logger(__name__)
 
 
+def max_cloud_cover():
+    """
+    Return the tile-wide cloud cover limit of the scene search, looser when
+    the scenes are pre-screened over the AOI.
+    """
+    if settings.PRESCREEN_MIN_CLEAR_FRACTION > 0:
+        return settings.PRESCREEN_MAX_CLOUD_COVER
+    return settings.STAC_MAX_CLOUD_COVER
+
+
+def search_stac_items(bbox, start_date, end_date, image_type='sentinel'):
+    """Search the STAC catalogue for the scenes of a bbox and date range."""
+    # Open the stac catalogue
+    catalog = Client.open("https://earth-search.aws.element84.com/v1")
+
+    # Set the STAC collections
+    if image_type == 'sentinel':
+        collections = ["sentinel-2-c1-l2a"]
+    else:
+        collections = ["landsat-c2-l2"]
+
+    # Build a query with the set parameters
+    query = catalog.search(
+        bbox=bbox,
+        collections=collections,
+        datetime=f"{start_date}/{end_date}",
+        # Tile-wide cloud cover, the AOI is pre-screened later
+        query={"eo:cloud_cover": {
+            "lt": max_cloud_cover()
+        }}
+    )
+    # Search the STAC catalog for all items matching the query
+    return list(query.items())
+
+
 class Analysis:
     """
     Do calculations on the STAC data.
@@ -48,56 +98,101 @@ class Analysis:
                  task=None,
                  mask_path=None,
                  auto_detect_water=False,
-                 image_type='sentinel'):
+                 image_type='sentinel',
+                 items=None,
+                 datacube=None,
+                 export_nc_combined=False):
         self.bbox = bbox
         self.resolution = resolution
         self.crs = "EPSG:6933"
         self.export_plot = export_plot
         self.export_nc = export_nc
+        # Write all months and indices into one NetCDF file
+        self.export_nc_combined = export_nc_combined
         self.export_cog = export_cog
         self.calc_types = calc_types
         if not calc_types:
             self.calc_types = MonitoringIndicatorType.Type.values
 
         self.uuid = str(uuid.uuid4())
-        self.output_dir = os.path.join("/tmp", self.uuid)
-        os.makedirs(self.output_dir, exist_ok=True)
 
         self.task = task
+        self.metrics = StageMetrics()
         self.mask_path = mask_path
         self.auto_detect_water = auto_detect_water
         self.image_type = image_type
+        # Write outputs into a Zarr data cube instead of COG files
+        self.datacube = datacube
 
+        if self.image_type == 'sentinel':
+            self.bands = ("blue", "red", "green", "nir", "swir16", "swir22", "scl")
+        else:
+            self.bands = ("blue", "red", "green", "nir08", "swir16", "swir22", "qa_pixel")
+
+        # Profile the whole analysis, from the scene search on
+        self.profiler = None
+        self.output_dir = None
+        if self.task is not None and self.task.profile:
+            self.start_profiler()
+        try:
+            self.prepare(start_date, end_date, items)
+        except Exception:
+            if self.profiler is not None:
+                self.save_profile()
+            raise
+
+    def prepare(self, start_date, end_date, items=None):
+        """Search and pre-screen the scenes, and create the working directory."""
         configure_rio(cloud_defaults=True)
 
         self.mask = None
-        if mask_path and os.path.exists(mask_path):
-            self.mask = rioxarray.open_rasterio(mask_path).isel(band=0)
+        if self.mask_path and (
+            self.mask_path.startswith('/vsi') or os.path.exists(self.mask_path)
+        ):
+            self.mask = rioxarray.open_rasterio(self.mask_path).isel(band=0)
+
+        # Items of a shared search can be passed in, e.g. for batches
+        if items is None:
+            with self.metrics.stage('search'):
+                items = search_stac_items(self.bbox, start_date, end_date, self.image_type)
+        self.items = list(items)
+        self.add_log(f"Found: {len(self.items):d} datasets")
+        if self.items and settings.PRESCREEN_MIN_CLEAR_FRACTION > 0:
+            with self.metrics.stage('prescreen'):
+                self.items = self.prescreen(self.items)
 
-        # Open the stac catalogue
-        catalog = Client.open("https://earth-search.aws.element84.com/v1")
+        self.scratch = ScratchDirectory(self.estimate_scratch_size(start_date, end_date))
+        self.output_dir = self.scratch.path
+        self.add_log(f"Working directory: {self.output_dir}")
 
-        # Set the STAC collections
-        if self.image_type == 'sentinel':
-            collections = ["sentinel-2-c1-l2a"]
-            self.bands = ("blue", "red", "green", "nir", "swir16", "swir22", "scl")
-        else:
-            collections = ["landsat-c2-l2"]
-            self.bands = ("blue", "red", "green", "nir08", "swir16", "swir22")
-
-        # Build a query with the set parameters
-        query = catalog.search(
-            bbox=bbox,
-            collections=collections,
-            datetime=f"{start_date}/{end_date}",
-            query={"eo:cloud_cover": {
-                "lt": 20
-            }}  # Optional cloud cover filter
+    def prescreen(self, items):
+        """
+        Drop the scenes that are mostly cloudy over the AOI, from a low
+        resolution read of their SCL or QA_PIXEL band.
+        """
+        kept, fractions = prescreen_items(items, self.bbox, self.image_type)
+        for item_id, fraction in fractions.items():
+            if fraction is not None:
+                self.add_log(f"{item_id}: {fraction:.0%} of the area clear", logging.DEBUG)
+        self.add_log(
+            f"Pre-screening kept {len(kept):d} of {len(fractions):d} datasets "
+            f"with at least {settings.PRESCREEN_MIN_CLEAR_FRACTION:.0%} of the area clear"
         )
-        # Search the STAC catalog for all items matching the query
-        # self.items = list(self.group_tiles_latest_date_catalog(query))
-        self.items = list(query.items())
-        self.add_log(f"Found: {len(self.items):d} datasets")
+        return kept
+
+    def estimate_scratch_size(self, start_date, end_date):
+        """Estimate the bytes of the files written to the working directory."""
+        minx, miny, maxx, maxy = self.bbox
+        latitude = math.radians((miny + maxy) / 2)
+        width = (maxx - minx) * 111320 * math.cos(latitude) / self.resolution
+        height = (maxy - miny) * 110540 / self.resolution
+        months = len(month_range(start_date, end_date))
+        # A float32 COG, NetCDF and PNG per index and month
+        return int(width * height * 4 * 3 * months * len(self.calc_types))
+
+    def cleanup(self):
+        """Remove the working directory."""
+        self.scratch.cleanup()
 
     def group_tiles_latest_date_catalog(self, query):
         items = list(query.items())
@@ -142,28 +237,40 @@ class Analysis:
         )
 
     def run_export_nc(self, month_data, nc_path):
-        """Export to NetCDF.
+        """Export to compressed, chunked NetCDF.
         """
         self.add_log(f"Saving NetCDF: {nc_path}")
-        month_data.to_netcdf(nc_path, engine="netcdf4")
+        write_data_array_netcdf(month_data, nc_path)
+
+    def open_combined_nc(self, times):
+        """Open the NetCDF file that all months and indices are written to."""
+        first, last = pd.Timestamp(times[0]), pd.Timestamp(times[-1])
+        nc_path = os.path.join(
+            self.output_dir,
+            f"{'_'.join(self.calc_types)}_{first.year}_{first.month:02d}_"
+            f"{last.year}_{last.month:02d}.nc"
+        )
+        self.add_log(f"Saving NetCDF of all months: {nc_path}")
+        return MultiMonthNetCDF(
+            nc_path,
+            times,
+            self.calc_types,
+            title=f"{', '.join(self.calc_types)} {first:%Y-%m} to {last:%Y-%m}"
+        )
 
     def run_export_plot(self, month_data, png_path, year, month, calc_type):
-        """Export to PNG format.
+        """Export a quick-look PNG.
         """
         self.add_log(f"Saving Plot: {png_path}")
-        data_min = float(month_data.min().compute())
-        data_max = float(month_data.max().compute())
-        if data_min == data_max:
-            data_min -= 0.1
-            data_max += 0.1
-
-        ax = month_data.plot(cmap="BrBG", vmin=data_min, vmax=data_max)  # noqa
-        plt.gca().set_title(f"{calc_type} - {year}-{month:02d}")
+        vmin, vmax = render_quicklook(month_data, png_path)
+        self.add_log(f"{calc_type} - {year}-{month:02d} stretched from {vmin:.4f} to {vmax:.4f}")
 
-        plt.savefig(png_path, dpi=300, bbox_inches='tight')
-        plt.close()
+    def summarize(self, data_array, calc_type):
+        """Compute summary statistics of an exported array."""
+        water_threshold = config.AWEI_THRESHOLD if calc_type == 'AWEI' else None
+        return summarize_data_array(data_array, water_threshold=water_threshold)
 
-    def save_output(self, path, calc_type, bbox):
+    def save_output(self, path, calc_type, bbox, summary=None):
         # Convert bbox list to Polygon if needed
         if isinstance(bbox, list):
             minx, miny, maxx, maxy = bbox
@@ -179,9 +286,8 @@ class Analysis:
                 tzinfo=timezone.get_current_timezone()
             )
 
-            with open(path, 'rb') as f:
-                django_file = File(f)
-                output = TaskOutput.objects.create(
+            with self.metrics.stage('save'):
+                output = TaskOutput(
                     monitoring_type=MonitoringIndicatorType.objects.get(
                         monitoring_indicator_type=calc_type),
                     task=self.task,
@@ -189,10 +295,41 @@ class Analysis:
                     created_by=self.task.created_by if self.task else None,
                     bbox=bbox,
                     observation_date=observation_date)
-                output.file.save(os.path.basename(path), django_file)
-                os.remove(path)
-                self.add_log("Output saved")
-                return output.file.path
+                store_file(output.file, path)
+                output.save()
+                if summary:
+                    TaskOutputSummary.objects.create(output=output, **summary)
+            self.add_log("Output saved")
+            return output
+
+    def save_thumbnails(self, output, thumbnails):
+        """Store thumbnails next to the file of ``output``."""
+        for size, path in thumbnails.items():
+            store_file_as(output.file.storage, path, thumbnail_path(output.file.name, size))
+
+    def save_datacube_output(self, data_array, calc_type, year, month, summary=None):
+        """Write a month into the data cube and record it as a TaskOutput."""
+        from project.utils.datacube import write_month
+
+        observation_date = datetime(year, month, 1).date()
+        with self.metrics.stage('export_zarr'):
+            left, bottom, right, top = write_month(
+                self.datacube, calc_type, observation_date, data_array
+            )
+        bbox = transform_bounds(self.datacube.crs, "EPSG:4326", left, bottom, right, top)
+        with self.metrics.stage('save'):
+            output = TaskOutput.objects.create(
+                monitoring_type=MonitoringIndicatorType.objects.get(
+                    monitoring_indicator_type=calc_type),
+                task=self.task,
+                datacube=self.datacube,
+                created_by=self.task.created_by if self.task else None,
+                bbox=Polygon.from_bbox(bbox),
+                observation_date=observation_date)
+            if summary:
+                TaskOutputSummary.objects.create(output=output, **summary)
+        self.add_log("Output saved to data cube")
+        return output
 
     def apply_mask(self, data_array):
         """Applies the raster mask if available, ensuring proper CRS."""
@@ -240,7 +377,7 @@ class Analysis:
         """Extracts and saves multiple large water bodies from AWEI."""
         self.add_log(f"Extracting water bodies for {year}-{month:02d}")
         # Step 1: Apply Water Threshold (AWEI ≥ 0)
-        water_mask = (awei_data >= config.AWEI_THRESHOLD).astype(np.uint8)
+        water_mask = is_water(awei_data, config.AWEI_THRESHOLD).astype(np.uint8)
 
         # Step 2: Merge Nearby Pixels to Prevent Fragmentation
         water_mask = binary_closing(water_mask, structure=np.ones((3, 3))).astype(np.uint8)
@@ -286,6 +423,17 @@ class Analysis:
                     "x": masked_awei.x[min_x:max_x + 1]
                 })
 
+                if self.datacube is not None:
+                    self.save_datacube_output(
+                        cropped_awei,
+                        'AWEI',
+                        year,
+                        month,
+                        summary=self.summarize(cropped_awei, 'AWEI')
+                    )
+                    self.add_log(f"Saved water body {i}/{num_features} for {year}-{month:02d}")
+                    continue
+
                 # Save as GeoTIFF
                 tiff_path = f"{self.output_dir}/{i}_AWEI_{year}_{month:02d}.tif"
                 cropped_awei.rio.to_raster(
@@ -299,7 +447,12 @@ class Analysis:
                     overview_resampling="nearest",
                 )
 
-                self.save_output(tiff_path, 'AWEI', self.get_bbox(cropped_awei))
+                self.save_output(
+                    tiff_path,
+                    'AWEI',
+                    self.get_bbox(cropped_awei),
+                    summary=self.summarize(cropped_awei, 'AWEI')
+                )
                 self.add_log(f"Saved water body {i}/{num_features} for {year}-{month:02d}")
 
         self.add_log(f"Finished extracting water bodies for {year}-{month:02d}")
@@ -326,21 +479,87 @@ class Analysis:
 
         return bbox_polygon
 
+    def save_metrics(self):
+        """Add the stage metrics of this run to the task."""
+        if self.task:
+            self.task.add_stage_metrics(self.metrics)
+
     def run(self):
+        """Run the calculations, removing the working directory afterwards.
+        """
+        try:
+            if self.profiler is not None:
+                self.run_profiled()
+            else:
+                self.run_calculations()
+        finally:
+            self.cleanup()
+            self.save_metrics()
+
+    def start_profiler(self):
+        """Start profiling the analysis."""
+        from project.utils.profiling import RunProfiler
+
+        self.add_log("Profiling the analysis")
+        self.profiler = RunProfiler(name=f"profile_{timezone.now():%Y%m%d%H%M%S}")
+        self.profiler.start()
+
+    def save_profile(self):
+        """
+        Stop the profiler and store the profiles as diagnostic outputs of the
+        task, through a temporary directory when the working one is missing.
+        """
+        profiler, self.profiler = self.profiler, None
+        profiler.stop()
+        if self.output_dir is not None:
+            directory = nullcontext(self.output_dir)
+        else:
+            directory = tempfile.TemporaryDirectory()
+        with directory as path:
+            for profile_path in profiler.write(path):
+                self.save_diagnostic_output(profile_path)
+
+    def run_profiled(self):
+        """
+        Run the calculations, and store the profiles of the search and the
+        calculations, also when the calculations fail.
+        """
+        try:
+            self.run_calculations()
+        finally:
+            self.save_profile()
+
+    def save_diagnostic_output(self, path):
+        """Store a diagnostic file, e.g. a profile, as a TaskOutput of the task."""
+        output = TaskOutput(
+            monitoring_type=MonitoringIndicatorType.diagnostic(),
+            task=self.task,
+            size=os.path.getsize(path),
+            created_by=self.task.created_by,
+        )
+        store_file(output.file, path)
+        output.save()
+        self.add_log(f"Diagnostic output saved: {os.path.basename(path)}")
+        return output
+
+    def run_calculations(self):
         """Run the calculations.
         """
+        if not self.items:
+            raise ValueError("No datasets with clear pixels found for the area and dates.")
         self.add_log("Loading STAC items")
 
-        ds = stac_load(
-            self.items,
-            bands=self.bands,
-            crs=self.crs,
-            resolution=self.resolution,
-            chunks={},
-            groupby="solar_day",
-            bbox=self.bbox,
-            band_aliases={"nir": "nir08"}
-        )
+        with self.metrics.stage('stac_load'):
+            ds = stac_load(
+                self.items,
+                bands=self.bands,
+                crs=self.crs,
+                resolution=self.resolution,
+                chunks={},
+                groupby="solar_day",
+                bbox=self.bbox,
+                band_aliases={"nir": "nir08"}
+            )
 
         if self.image_type == 'landsat':
             ds = ds.rename({"nir08": "nir"})
@@ -351,11 +570,15 @@ class Analysis:
 
         self.add_log("Resample monthly")
         # Step 2: Resample monthly
-        if self.image_type == 'sentinel':
-            cloud_mask = (ds.scl != 9) & (ds.scl != 10)
-            monthly_ds = scaled_ds.where(cloud_mask).resample(time="1M").mean()
-        else:
-            monthly_ds = scaled_ds.resample(time="1M").mean()
+        with self.metrics.stage('composite'):
+            # Mask the clouds and shadows the pre-screening counts as not clear
+            quality = ds.scl if self.image_type == 'sentinel' else ds.qa_pixel
+            cloud_mask = clear_pixels(quality, self.image_type)
+            monthly_ds = scaled_ds.where(cloud_mask).resample(time="1ME").mean()
+
+        nc_file = None
+        if self.export_nc and self.export_nc_combined:
+            nc_file = self.open_combined_nc(monthly_ds.time.values)
 
         # Step 4: Calculate measurement
         for calc_type in self.calc_types:
@@ -376,13 +599,17 @@ class Analysis:
             elif calc_type == "CDOM":
                 monthly_ds[calc_type] = (1 / monthly_ds.blue) - (1 / monthly_ds.green)
 
-            monthly_ds = monthly_ds.sortby("y")
-            monthly_ds[calc_type] = monthly_ds[calc_type].interpolate_na(
-                dim="x", method="nearest").interpolate_na(dim="y", method="nearest")
+            with self.metrics.stage('interpolate_na'):
+                monthly_ds = monthly_ds.sortby("y")
+                monthly_ds[calc_type] = monthly_ds[calc_type].interpolate_na(
+                    dim="x", method="nearest").interpolate_na(dim="y", method="nearest")
 
             for time_val in monthly_ds.time.values:
-                month_data = monthly_ds.get(calc_type).sel(time=time_val)
-                month_data = self.apply_mask(month_data)
+                # Load the month once, the summary and every export reuse it
+                with self.metrics.stage('compute'):
+                    month_data = monthly_ds.get(calc_type).sel(time=time_val).compute()
+                with self.metrics.stage('mask'):
+                    month_data = self.apply_mask(month_data)
 
                 dt = pd.to_datetime(str(time_val))
                 year = dt.year
@@ -391,26 +618,60 @@ class Analysis:
                 cog_path = os.path.join(self.output_dir, f"{calc_type}_{year}_{month:02d}.tif")
                 nc_path = os.path.join(self.output_dir, f"{calc_type}_{year}_{month:02d}.nc")
                 png_path = os.path.join(self.output_dir, f"{calc_type}_{year}_{month:02d}.png")
+                with self.metrics.stage('summary'):
+                    summary = self.summarize(month_data, calc_type)
 
                 if self.export_plot:
-                    self.run_export_plot(month_data, png_path, year, month, calc_type)
-                    self.save_output(png_path, calc_type, self.get_bbox(month_data))
-
-                if self.export_nc:
-                    self.run_export_nc(month_data, nc_path)
-                    self.save_output(nc_path, calc_type, self.get_bbox(month_data))
+                    with self.metrics.stage('export_plot'):
+                        self.run_export_plot(month_data, png_path, year, month, calc_type)
+                        thumbnails = {}
+                        if settings.QUICKLOOK_THUMBNAIL_SIZES:
+                            thumbnails = write_thumbnails(png_path)
+                    output = self.save_output(
+                        png_path, calc_type, self.get_bbox(month_data), summary
+                    )
+                    if output:
+                        self.save_thumbnails(output, thumbnails)
+
+                if nc_file is not None:
+                    with self.metrics.stage('export_nc'):
+                        nc_file.write(calc_type, time_val, month_data)
+                elif self.export_nc:
+                    with self.metrics.stage('export_nc'):
+                        self.run_export_nc(month_data, nc_path)
+                    self.save_output(nc_path, calc_type, self.get_bbox(month_data), summary)
 
                 if self.export_cog:
-                    if calc_type == "AWEI":
-                        if self.auto_detect_water:
+                    if calc_type == "AWEI" and self.auto_detect_water:
+                        with self.metrics.stage('water_bodies'):
                             self.extract_water_bodies(month_data, year, month)
-                        else:
+                    elif self.datacube is not None:
+                        self.save_datacube_output(month_data, calc_type, year, month, summary)
+                    elif calc_type == "AWEI":
+                        with self.metrics.stage('export_cog'):
                             self.run_export_cog(month_data, cog_path)
+                            awei_path = cog_path
                             cog_path = generate_water_mask_from_tif(
-                                cog_path,
+                                awei_path,
                                 threshold=config.AWEI_THRESHOLD
                             )['mask_path']
-                            self.save_output(cog_path, calc_type, self.get_bbox(month_data))
+                            os.remove(awei_path)
+                        self.save_output(
+                            cog_path,
+                            calc_type,
+                            self.get_bbox(month_data),
+                            summarize_water_mask(month_data, config.AWEI_THRESHOLD)
+                        )
                     else:
-                        self.run_export_cog(month_data, cog_path)
-                        self.save_output(cog_path, calc_type, self.get_bbox(month_data))
+                        with self.metrics.stage('export_cog'):
+                            self.run_export_cog(month_data, cog_path)
+                        self.save_output(
+                            cog_path, calc_type, self.get_bbox(month_data), summary
+                        )
+
+        if nc_file is not None:
+            with self.metrics.stage('export_nc'):
+                nc_file.close()
+            if nc_file.bbox:
+                # Recorded under the first index, the file holds all of them
+                self.save_output(nc_file.path, self.calc_types[0], nc_file.bbox)
@@ -2,11 +2,13 @@ import uuid
 import os
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 
 from pystac_client import Client
 from odc.stac import configure_rio, stac_load
 from project.models import MonitoringIndicatorType
+from project.utils.calculations.netcdf import write_data_array_netcdf
+from project.utils.calculations.quicklook import render_quicklook
+from project.utils.scratch import ScratchDirectory
 
 
 class CalculateMonitoring:
@@ -34,8 +36,8 @@ class CalculateMonitoring:
             self.calc_types = MonitoringIndicatorType.Type.values
 
         self.uuid = str(uuid.uuid4())
-        self.output_dir = os.path.join("/tmp", self.uuid)
-        os.makedirs(self.output_dir, exist_ok=True)
+        self.scratch = ScratchDirectory()
+        self.output_dir = self.scratch.path
 
         configure_rio(cloud_defaults=True)
 
@@ -77,26 +79,24 @@ class CalculateMonitoring:
     def run_export_nc(self, month_data, nc_path):
         """Export to NetCDF.
         """
-        month_data.to_netcdf(nc_path, engine="netcdf4")
+        write_data_array_netcdf(month_data, nc_path)
         print(f"Saved NetCDF: {nc_path}")
 
     def run_export_plot(self, month_data, png_path, year, month, calc_type):
-        """Export to PNG format.
+        """Export a quick-look PNG.
         """
-        data_min = float(month_data.min().compute())
-        data_max = float(month_data.max().compute())
-        if data_min == data_max:
-            data_min -= 0.1
-            data_max += 0.1
-
-        ax = month_data.plot(cmap="BrBG", vmin=data_min, vmax=data_max)  # noqa
-        plt.gca().set_title(f"{calc_type} - {year}-{month:02d}")
-
-        plt.savefig(png_path, dpi=300, bbox_inches='tight')
+        render_quicklook(month_data, png_path)
         print(f"Saved Plot: {png_path}")
-        plt.close()
 
     def run(self):
+        """Run the calculations, removing the working directory afterwards.
+        """
+        try:
+            self.run_calculations()
+        finally:
+            self.scratch.cleanup()
+
+    def run_calculations(self):
         """Run the calculations.
         """
         print("stac load")
@@ -114,7 +114,7 @@ class CalculateMonitoring:
         scaled_ds = ds[["blue", "red", "green", "nir", "swir16", "swir22"]] / 10000.0
 
         # Step 2: Resample monthly
-        monthly_ds = scaled_ds.resample(time="1M").mean()
+        monthly_ds = scaled_ds.resample(time="1ME").mean()
 
         # Step 4: Calculate measurement
         for calc_type in self.calc_types:
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from pyproj import CRS
+from rasterio.warp import transform_bounds
+
+# Chunks of (time, y, x): a year of a 128 x 128 pixel block, so reading the
+# history of a location touches few chunks
+NETCDF_CHUNKS = (12, 128, 128)
+TIME_UNITS = 'days since 1970-01-01'
+
+
+def netcdf_encoding(shape):
+    """
+    Return the netCDF4 encoding of a float32 variable of ``shape``, compressed
+    with ``settings.NETCDF_COMPRESSION`` and chunked with NETCDF_CHUNKS.
+    """
+    encoding = {
+        'dtype': 'float32',
+        '_FillValue': np.nan,
+        'chunksizes': tuple(
+            min(size, chunk) for size, chunk in zip(shape, NETCDF_CHUNKS[-len(shape):])
+        ),
+        'shuffle': True,
+        'complevel': settings.NETCDF_COMPLEVEL,
+    }
+    if settings.NETCDF_COMPRESSION == 'zlib':
+        encoding['zlib'] = True
+    else:
+        encoding['compression'] = settings.NETCDF_COMPRESSION
+    return encoding
+
+
+def write_data_array_netcdf(data_array, path, name=None):
+    """Write a DataArray to a compressed, chunked NetCDF file."""
+    name = name or data_array.name or 'value'
+    data_array.to_dataset(name=name).to_netcdf(
+        path,
+        engine='netcdf4',
+        encoding={name: netcdf_encoding(data_array.shape)}
+    )
+    return path
+
+
+class MultiMonthNetCDF:
+    """
+    CF NetCDF file with every month of several indices, written month by month.
+
+    The grid is taken from the first written array, so only one month of one
+    index is in memory at a time. Each index is a (time, y, x) variable on the
+    time steps given up front; months without data stay empty.
+    """
+
+    def __init__(self, path, times, variables, title=None):
+        import netCDF4
+
+        self.path = path
+        self.times = [pd.Timestamp(value).to_pydatetime() for value in times]
+        self.time_index = {value: index for index, value in enumerate(self.times)}
+        self.variables = list(variables)
+        self.title = title
+        self.dataset = netCDF4.Dataset(path, 'w', format='NETCDF4')
+        self.shape = None
+        self.bbox = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _create(self, data_array):
+        import netCDF4
+        import rioxarray  # noqa
+
+        crs = data_array.rio.crs
+        x = data_array.x.values
+        y = data_array.y.values
+        self.shape = (len(y), len(x))
+        self.bbox = list(transform_bounds(crs, 'EPSG:4326', *data_array.rio.bounds()))
+
+        dataset = self.dataset
+        dataset.Conventions = 'CF-1.8'
+        if self.title:
+            dataset.title = self.title
+        dataset.history = f'Created {pd.Timestamp.now(tz="UTC").isoformat()}'
+
+        dataset.createDimension('time', len(self.times))
+        dataset.createDimension('y', len(y))
+        dataset.createDimension('x', len(x))
+
+        time = dataset.createVariable('time', 'f8', ('time', ))
+        time.units = TIME_UNITS
+        time.calendar = 'proleptic_gregorian'
+        time.standard_name = 'time'
+        time.axis = 'T'
+        time[:] = netCDF4.date2num(self.times, TIME_UNITS, 'proleptic_gregorian')
+
+        for name, values, axis in (('x', x, 'X'), ('y', y, 'Y')):
+            variable = dataset.createVariable(name, 'f8', (name, ))
+            variable.standard_name = f'projection_{name}_coordinate'
+            variable.units = 'm' if crs.is_projected else 'degrees'
+            variable.axis = axis
+            variable[:] = values
+
+        spatial_ref = dataset.createVariable('spatial_ref', 'i4')
+        for key, value in CRS.from_user_input(crs.to_wkt()).to_cf().items():
+            setattr(spatial_ref, key, value)
+        spatial_ref.spatial_ref = crs.to_wkt()
+        spatial_ref.GeoTransform = ' '.join(
+            str(value) for value in data_array.rio.transform().to_gdal()
+        )
+
+        encoding = netcdf_encoding((len(self.times), ) + self.shape)
+        compression = encoding.get('compression', 'zlib')
+        for name in self.variables:
+            variable = dataset.createVariable(
+                name,
+                'f4',
+                ('time', 'y', 'x'),
+                fill_value=np.float32(np.nan),
+                chunksizes=encoding['chunksizes'],
+                compression=compression,
+                complevel=encoding['complevel'],
+                shuffle=encoding['shuffle'],
+            )
+            variable.long_name = name
+            variable.grid_mapping = 'spatial_ref'
+
+    def write(self, variable, time, data_array):
+        """Write the month ``time`` of ``variable``."""
+        if self.shape is None:
+            self._create(data_array)
+        if data_array.shape != self.shape:
+            raise ValueError(
+                f"{variable} has shape {data_array.shape}, expected {self.shape}."
+            )
+        index = self.time_index[pd.Timestamp(time).to_pydatetime()]
+        self.dataset[variable][index, :, :] = np.asarray(data_array.values, dtype=np.float32)
+
+    def close(self):
+        if self.dataset.isopen():
+            self.dataset.close()
@@ -1,12 +1,10 @@
 import os
 import json
 import logging
-import numpy as np
+import pandas as pd
 import geopandas as gpd
 import rasterio
-from rasterio.mask import mask
-from rasterio.warp import calculate_default_transform, reproject, Resampling
-from shapely.geometry import mapping
+from project.utils.calculations.zonal import zonal_statistics
 
 
 # Configure logging
@@ -35,56 +33,30 @@ class PollutionAnalyzer:
 
     def analyze_pollution(self, raster_path, sources, output_json):
         """
-        Computes mean pollution index for given sources (point or non-point).
+        Computes pollution index statistics for given sources (point or non-point).
+
+        Sources are transformed into the raster CRS and reduced in a single pass,
+        see :func:`project.utils.calculations.zonal.zonal_statistics`.
 
         :param raster_path: Path to the raster file (NDTI/NDCI).
         :param sources: Geopandas DataFrame containing pollution sources.
         :param output_json: Path to save the JSON report.
         """
         with rasterio.open(raster_path) as src:
-            # Reproject raster to EPSG:4326
-            dst_crs = sources.crs
-            transform, width, height = calculate_default_transform(
-                src.crs, dst_crs, src.width, src.height, *src.bounds)
-
-            kwargs = src.meta.copy()
-            kwargs.update({
-                'crs': dst_crs,
-                'transform': transform,
-                'width': width,
-                'height': height
+            stats = zonal_statistics(src, sources.geometry)
+
+        results = []
+        for idx, source_id in enumerate(sources["id"]):
+            count = int(stats["count"][idx])
+            results.append({
+                "id": source_id,
+                "mean_index": float(stats["mean"][idx]) if count else None,
+                "min_index": float(stats["min"][idx]) if count else None,
+                "max_index": float(stats["max"][idx]) if count else None,
+                "std_index": float(stats["std"][idx]) if count else None,
+                "pixel_count": count,
             })
 
-            # Create in-memory reprojection target
-            with rasterio.MemoryFile() as memfile:
-                with memfile.open(**kwargs) as dst:
-                    for i in range(1, src.count + 1):
-                        reproject(
-                            source=rasterio.band(src, i),
-                            destination=rasterio.band(dst, i),
-                            src_transform=src.transform,
-                            src_crs=src.crs,
-                            dst_transform=transform,
-                            dst_crs=dst_crs,
-                            resampling=Resampling.nearest
-                        )
-
-                    # Now dst is the reprojected raster in EPSG:4326
-                    results = []
-                    for _, source in sources.iterrows():
-                        geom = [mapping(source.geometry)]
-                        try:
-                            out_image, _ = mask(dst, geom, crop=True)
-                            mean_pollution = np.mean(out_image[out_image != dst.nodata])
-                            results.append({
-                                "id": source["id"],
-                                "mean_index": float(mean_pollution) if
-                                mean_pollution is not None
-                                else None
-                            })
-                        except Exception as e:
-                            logging.warning(f"Skipping {source['id']}: {str(e)}")
-
         with open(output_json, "w") as f:
             json.dump(results, f, indent=4)
 
@@ -105,3 +77,41 @@ class PollutionAnalyzer:
         self.analyze_pollution(self.ndci_raster, self.non_point_areas, non_point_report)
 
         logging.info("All pollution reports generated.")
+
+
+def sources_from_geojson(point_sources=None, non_point_sources=None):
+    """
+    Build one GeoDataFrame of pollution sources from GeoJSON FeatureCollections.
+
+    :param point_sources: FeatureCollection of point sources.
+    :param non_point_sources: FeatureCollection of non-point source areas.
+    :return: GeoDataFrame in EPSG:4326 with ``source_id`` and ``source_type`` columns.
+    """
+    frames = []
+    for source_type, collection in (
+        ("point", point_sources),
+        ("non_point", non_point_sources),
+    ):
+        if not collection:
+            continue
+        features = collection.get("features", [])
+        gdf = gpd.GeoDataFrame.from_features(features, crs="EPSG:4326")
+        source_ids = []
+        for idx, feature in enumerate(features):
+            source_id = (feature.get("properties") or {}).get("id")
+            if source_id is None:
+                source_id = feature.get("id", idx)
+            if isinstance(source_id, float) and source_id.is_integer():
+                source_id = int(source_id)
+            source_ids.append(str(source_id))
+        gdf["source_id"] = source_ids
+        gdf["source_type"] = source_type
+        frames.append(gdf[["source_id", "source_type", "geometry"]])
+
+    if not frames:
+        return gpd.GeoDataFrame(
+            columns=["source_id", "source_type", "geometry"],
+            geometry="geometry",
+            crs="EPSG:4326"
+        )
+    return gpd.GeoDataFrame(pd.concat(frames, ignore_index=True), crs="EPSG:4326")
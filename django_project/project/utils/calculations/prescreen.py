@@ -0,0 +1,155 @@
+import logging
+import math
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import rasterio
+from django.conf import settings
+from rasterio.enums import Resampling
+from rasterio.warp import transform_bounds
+
+from project.utils.calculations.zonal import bounds_window
+
+logger = logging.getLogger(__name__)
+
+# Sentinel-2 scene classification: no data, cloud shadow, medium and high
+# probability cloud, thin cirrus
+SCL_ASSET = 'scl'
+SCL_NODATA = 0
+SCL_CLOUD_CLASSES = (3, 8, 9, 10)
+
+# Landsat Collection 2 QA_PIXEL bits: fill, dilated cloud, cirrus, cloud,
+# cloud shadow
+QA_PIXEL_ASSET = 'qa_pixel'
+QA_PIXEL_FILL = 1 << 0
+QA_PIXEL_CLOUD = (1 << 1) | (1 << 2) | (1 << 3) | (1 << 4)
+
+GDAL_OPTIONS = {
+    'GDAL_DISABLE_READDIR_ON_OPEN': 'EMPTY_DIR',
+    'GDAL_HTTP_MAX_RETRY': 3,
+    'GDAL_HTTP_RETRY_DELAY': 1,
+}
+
+
+def clear_pixels(data, image_type='sentinel'):
+    """
+    Return a boolean array of the clear, valid pixels of a SCL or QA_PIXEL
+    array, a numpy array or a lazy DataArray.
+    """
+    if image_type == 'sentinel':
+        clear = data != SCL_NODATA
+        for value in SCL_CLOUD_CLASSES:
+            clear = clear & (data != value)
+        return clear
+    return (data & (QA_PIXEL_FILL | QA_PIXEL_CLOUD)) == 0
+
+
+def bounds_pixels(src, bounds):
+    """Return the area of ``bounds`` in pixels of ``src``, inside the raster or not."""
+    left, bottom, right, top = bounds
+    cols, rows = ~src.transform * (
+        np.array([left, right, right, left]),
+        np.array([top, top, bottom, bottom]),
+    )
+    return (cols.max() - cols.min()) * (rows.max() - rows.min())
+
+
+def read_overview(href, bbox, max_size=None):
+    """
+    Read the pixels of the first band of ``href`` under ``bbox``, at most
+    ``max_size`` pixels per side.
+
+    The read is decimated with nearest resampling, so GDAL reads the
+    closest overview of a COG instead of the full resolution blocks.
+
+    :param bbox: [minx, miny, maxx, maxy] in EPSG:4326.
+    :return: Tuple of the 2D array, empty when the bbox does not overlap
+        the raster, and the fraction of the bbox the raster covers.
+    """
+    if max_size is None:
+        max_size = settings.PRESCREEN_MAX_SIZE
+    with rasterio.Env(**GDAL_OPTIONS), rasterio.open(href) as src:
+        bounds = transform_bounds('EPSG:4326', src.crs, *bbox, densify_pts=21)
+        window = bounds_window(src, bounds)
+        if window is None:
+            return np.zeros((0, 0), dtype=src.dtypes[0]), 0.0
+        coverage = min(1.0, window.width * window.height / max(bounds_pixels(src, bounds), 1))
+        scale = max(1, max(window.width, window.height) / max_size)
+        out_shape = (
+            max(1, math.ceil(window.height / scale)),
+            max(1, math.ceil(window.width / scale)),
+        )
+        data = src.read(1, window=window, out_shape=out_shape, resampling=Resampling.nearest)
+        return data, coverage
+
+
+def clear_fraction(item, bbox, image_type='sentinel', max_size=None):
+    """
+    Estimate the fraction of the AOI ``bbox`` that is clear in a scene.
+
+    The part of the AOI outside the raster counts as not clear, so a tile
+    covering part of the AOI contributes its part only.
+
+    :return: Fraction between 0 and 1.
+    """
+    asset = SCL_ASSET if image_type == 'sentinel' else QA_PIXEL_ASSET
+    data, coverage = read_overview(item.assets[asset].href, bbox, max_size)
+    if not data.size:
+        return 0.0
+    return float(clear_pixels(data, image_type).mean()) * coverage
+
+
+def acquisition_key(item):
+    """
+    Return the platform and date of a scene, shared by the tiles of one
+    acquisition; scenes without a datetime are their own acquisition.
+    """
+    when = getattr(item, 'datetime', None)
+    if when is None:
+        return item.id
+    properties = getattr(item, 'properties', None) or {}
+    return properties.get('platform'), when.date()
+
+
+def prescreen_items(items, bbox, image_type='sentinel', min_clear_fraction=None, workers=None):
+    """
+    Keep the acquisitions with at least ``min_clear_fraction`` of the AOI clear.
+
+    The quality bands of the scenes are read in parallel threads. The tiles
+    of one acquisition, e.g. two Sentinel-2 tiles the AOI straddles, each
+    cover part of the AOI only, so their clear fractions are added up and
+    the tiles are kept or dropped together. Acquisitions with a scene whose
+    quality band cannot be read are kept, the analysis masks their clouds
+    anyway.
+
+    :return: Tuple of the kept items and a dict of clear fractions by item id,
+        None for the scenes that could not be read.
+    """
+    if min_clear_fraction is None:
+        min_clear_fraction = settings.PRESCREEN_MIN_CLEAR_FRACTION
+    if workers is None:
+        workers = settings.PRESCREEN_WORKERS
+
+    def estimate(item):
+        try:
+            return clear_fraction(item, bbox, image_type)
+        except Exception as e:
+            logger.warning(f"Failed pre-screening {item.id}: {e}")
+            return None
+
+    items = list(items)
+    if not items:
+        return [], {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(items)))) as executor:
+        fractions = list(executor.map(estimate, items))
+
+    acquisitions = defaultdict(list)
+    for item, fraction in zip(items, fractions):
+        acquisitions[acquisition_key(item)].append(fraction)
+    kept_keys = {
+        key for key, group in acquisitions.items()
+        if None in group or min(1.0, sum(group)) >= min_clear_fraction
+    }
+    kept = [item for item in items if acquisition_key(item) in kept_keys]
+    return kept, {item.id: fraction for item, fraction in zip(items, fractions)}
@@ -0,0 +1,140 @@
+import math
+import os
+
+import numpy as np
+from django.conf import settings
+from PIL import Image
+
+# Percentiles of the values mapped to the ends of the colormap
+STRETCH_PERCENTILES = (2, 98)
+# Maximum number of pixels the stretch percentiles are computed from
+STRETCH_SAMPLE_SIZE = 512 * 512
+
+# ColorBrewer BrBG, the same control colors as the matplotlib colormap
+BRBG_COLORS = (
+    '#543005', '#8c510a', '#bf812d', '#dfc27d', '#f6e8c3', '#f5f5f5',
+    '#c7eae5', '#80cdc1', '#35978f', '#01665e', '#003c30',
+)
+
+
+def lookup_table(colors, size=256):
+    """Return a ``size`` x 4 RGBA uint8 table interpolated between hex colors."""
+    anchors = np.array(
+        [[int(color[i:i + 2], 16) for i in (1, 3, 5)] for color in colors], dtype=np.float64
+    )
+    positions = np.linspace(0, 1, len(colors))
+    samples = np.linspace(0, 1, size)
+    lut = np.full((size, 4), 255, dtype=np.uint8)
+    for channel in range(3):
+        lut[:, channel] = np.interp(samples, positions, anchors[:, channel]).round()
+    return lut
+
+
+# ColorBrewer Blues and the viridis control colors, as in matplotlib
+BLUES_COLORS = (
+    '#f7fbff', '#deebf7', '#c6dbef', '#9ecae1', '#6baed6',
+    '#4292c6', '#2171b5', '#08519c', '#08306b',
+)
+VIRIDIS_COLORS = (
+    '#440154', '#482878', '#3e4989', '#31688e', '#26828e',
+    '#1f9e89', '#35b779', '#6ece58', '#b5de2b', '#fde725',
+)
+
+BRBG_LUT = lookup_table(BRBG_COLORS)
+# Lookup tables by colormap name, e.g. of map tiles
+COLORMAPS = {
+    'BrBG': BRBG_LUT,
+    'Blues': lookup_table(BLUES_COLORS),
+    'viridis': lookup_table(VIRIDIS_COLORS),
+}
+
+
+def decimate(data_array, max_size):
+    """
+    Return ``data_array`` read with a stride so neither side exceeds
+    ``max_size`` pixels, north up.
+
+    The stride is applied before the data is computed, so only the
+    sampled pixels of a lazy array are loaded.
+    """
+    height, width = data_array.sizes['y'], data_array.sizes['x']
+    step = max(1, math.ceil(max(height, width) / max_size))
+    sample = data_array.isel(y=slice(None, None, step), x=slice(None, None, step))
+    data = np.asarray(sample.values, dtype=np.float32)
+    y = sample['y'].values
+    if len(y) > 1 and y[0] < y[-1]:
+        data = data[::-1]
+    return data
+
+
+def stretch_range(data, percentiles=STRETCH_PERCENTILES, sample_size=STRETCH_SAMPLE_SIZE):
+    """
+    Return the ``(vmin, vmax)`` stretch of ``data`` from the percentiles of a
+    decimated sample of its finite values.
+    """
+    step = max(1, math.ceil(math.sqrt(data.size / sample_size)))
+    sample = data[::step, ::step]
+    sample = sample[np.isfinite(sample)]
+    if not sample.size:
+        return -0.1, 0.1
+    vmin, vmax = (float(value) for value in np.percentile(sample, percentiles))
+    if vmin == vmax:
+        vmin -= 0.1
+        vmax += 0.1
+    return vmin, vmax
+
+
+def colorize(data, vmin, vmax, lut=BRBG_LUT):
+    """Map ``data`` to RGBA through ``lut``; NaN becomes transparent."""
+    valid = np.isfinite(data)
+    index = np.zeros(data.shape, dtype=np.uint8)
+    scale = (len(lut) - 1) / (vmax - vmin) if vmax != vmin else 0
+    index[valid] = np.clip((data[valid] - vmin) * scale, 0, len(lut) - 1).astype(np.uint8)
+    rgba = lut[index]
+    rgba[~valid, 3] = 0
+    return rgba
+
+
+def thumbnail_path(path, size):
+    """Return the path of the ``size`` pixel thumbnail of a quick-look."""
+    stem, extension = os.path.splitext(path)
+    return f"{stem}_{size}{extension}"
+
+
+def write_thumbnails(path, sizes=None):
+    """
+    Write a pyramid of thumbnails of the PNG at ``path``, each level
+    downsampled from the previous one.
+
+    :param sizes: Maximum sizes in pixels, defaults to
+        ``QUICKLOOK_THUMBNAIL_SIZES``.
+    :return: Dict of thumbnail paths by size.
+    """
+    if sizes is None:
+        sizes = settings.QUICKLOOK_THUMBNAIL_SIZES
+    paths = {}
+    with Image.open(path) as image:
+        image = image.copy()
+    for size in sorted(sizes, reverse=True):
+        image.thumbnail((size, size), Image.Resampling.BOX)
+        paths[size] = thumbnail_path(path, size)
+        image.save(paths[size], format='PNG', optimize=True)
+    return paths
+
+
+def render_quicklook(data_array, path, max_size=None, percentiles=STRETCH_PERCENTILES):
+    """
+    Render a 2D ``data_array`` with ``x`` and ``y`` dims as a BrBG PNG.
+
+    The array is decimated to at most ``max_size`` pixels, defaulting to
+    ``QUICKLOOK_MAX_SIZE``, and stretched between the ``percentiles`` of
+    its values. NaN pixels are transparent.
+
+    :return: Tuple of the ``(vmin, vmax)`` stretch.
+    """
+    if max_size is None:
+        max_size = settings.QUICKLOOK_MAX_SIZE
+    data = decimate(data_array, max_size)
+    vmin, vmax = stretch_range(data, percentiles)
+    Image.fromarray(colorize(data, vmin, vmax), 'RGBA').save(path, format='PNG')
+    return vmin, vmax
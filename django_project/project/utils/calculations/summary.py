@@ -0,0 +1,84 @@
+import numpy as np
+
+from project.utils.calculations.water_extent import is_water
+
+PERCENTILES = (5, 50, 95)
+
+
+def _to_float(value):
+    value = float(value)
+    return None if value != value else value
+
+
+def summarize(values, pixel_area_km2=None, water_threshold=None):
+    """
+    Compute summary statistics of a raster array, ignoring NaN.
+
+    :param values: Numpy array of pixel values.
+    :param pixel_area_km2: Area of one pixel, needed for the water area.
+    :param water_threshold: Pixels at or above it count as water, for AWEI.
+    :return: Dict matching the fields of TaskOutputSummary.
+    """
+    values = np.asarray(values, dtype=np.float64).ravel()
+    valid_values = values[np.isfinite(values)]
+    summary = {
+        'pixel_count': int(values.size),
+        'valid_count': int(valid_values.size),
+        'valid_fraction': valid_values.size / values.size if values.size else 0.0,
+        'mean': None,
+        'std': None,
+        'min': None,
+        'max': None,
+        'p5': None,
+        'p50': None,
+        'p95': None,
+        'water_area_km2': None,
+    }
+    if valid_values.size:
+        p5, p50, p95 = np.percentile(valid_values, PERCENTILES)
+        summary.update({
+            'mean': _to_float(valid_values.mean()),
+            'std': _to_float(valid_values.std()),
+            'min': _to_float(valid_values.min()),
+            'max': _to_float(valid_values.max()),
+            'p5': _to_float(p5),
+            'p50': _to_float(p50),
+            'p95': _to_float(p95),
+        })
+    if water_threshold is not None and pixel_area_km2:
+        water_pixels = np.count_nonzero(is_water(valid_values, water_threshold))
+        summary['water_area_km2'] = float(water_pixels * pixel_area_km2)
+    return summary
+
+
+def pixel_area_km2(crs, resolution):
+    """Return the pixel area in km² for a projected CRS in metres, else None."""
+    if crs is None or not crs.is_projected:
+        return None
+    linear_units = (crs.linear_units or '').lower()
+    if linear_units not in ('metre', 'meter', 'm'):
+        return None
+    return abs(resolution[0] * resolution[1]) / 1e6
+
+
+def summarize_data_array(data_array, water_threshold=None):
+    """
+    Compute summary statistics of a georeferenced xarray DataArray.
+
+    A lazy array is loaded in place, so exports of the same array afterwards
+    do not compute it again.
+    """
+    return summarize(
+        data_array.load().values,
+        pixel_area_km2=pixel_area_km2(data_array.rio.crs, data_array.rio.resolution()),
+        water_threshold=water_threshold,
+    )
+
+
+def summarize_water_mask(awei_data, threshold):
+    """
+    Compute summary statistics of the water mask exported for an AWEI
+    DataArray, 1 over water and nodata elsewhere.
+    """
+    water = is_water(awei_data, threshold).astype(np.float32)
+    return summarize_data_array(water.where(water > 0), water_threshold=1)
@@ -1,17 +1,38 @@
 import rasterio
 import numpy as np
 import os
+from contextlib import ExitStack
 from constance import config
+from rasterio.enums import Resampling
+from rasterio.transform import from_origin
+from rasterio.vrt import WarpedVRT
+from rasterio.warp import transform_bounds
 from rasterio.windows import Window
 
 
+def is_water(awei, threshold):
+    """Return where AWEI values count as water, at or above ``threshold``."""
+    return awei >= threshold
+
+
+def water_values(values, threshold, is_mask=False):
+    """
+    Return where the values of an AWEI raster count as water, or the
+    non-zero pixels of a binary water mask (uint8, nodata 0).
+    """
+    if is_mask:
+        return values > 0
+    with np.errstate(invalid='ignore'):
+        return is_water(values, threshold)
+
+
 def calculate_water_extent_from_tif(tif_path, threshold=0.0):
     with rasterio.open(tif_path) as src:
         awei = src.read(1)
         transform = src.transform
         pixel_area = abs(transform.a * transform.e) / 1e6  # m² → km²
 
-        water_mask = awei > threshold
+        water_mask = water_values(awei, threshold, src.dtypes[0] == 'uint8')
         water_area_km2 = np.sum(water_mask) * pixel_area
 
         return {
@@ -23,6 +44,70 @@ def calculate_water_extent_from_tif(tif_path, threshold=0.0):
         }
 
 
+def water_extent_from_outputs(paths, bbox, threshold=0.0, chunk_size=1024):
+    """
+    Compute the water surface area inside ``bbox`` from several AWEI rasters.
+
+    The rasters are mosaicked on the grid of the first one, clipped to the
+    bbox, through warped VRTs so only the blocks under the bbox are read.
+    The grid is read in windows of ``chunk_size`` pixels, so memory does
+    not grow with the bbox.
+    Pixels count as water when they are at or above ``threshold`` in any raster;
+    binary water masks (uint8) count their non-zero pixels.
+
+    Args:
+        paths (list): Paths of AWEI or water mask GeoTIFF files.
+        bbox (list): [minx, miny, maxx, maxy] in EPSG:4326.
+        threshold (float): Threshold at or above which AWEI pixels are water.
+        chunk_size (int): Size of the windows to read (default: 1024x1024).
+
+    Returns:
+        dict: Dictionary with area and grid metadata, as
+        calculate_water_extent_from_tif.
+    """
+    with rasterio.open(paths[0]) as src:
+        crs = src.crs
+        res_x, res_y = src.res
+    left, bottom, right, top = transform_bounds('EPSG:4326', crs, *bbox, densify_pts=21)
+    width = max(1, int(np.ceil((right - left) / res_x)))
+    height = max(1, int(np.ceil((top - bottom) / res_y)))
+    transform = from_origin(left, top, res_x, res_y)
+
+    water_pixels = 0
+    with ExitStack() as stack:
+        sources = []
+        for path in paths:
+            src = stack.enter_context(rasterio.open(path))
+            vrt = stack.enter_context(WarpedVRT(
+                src,
+                crs=crs,
+                transform=transform,
+                width=width,
+                height=height,
+                resampling=Resampling.nearest,
+            ))
+            sources.append((vrt, src.dtypes[0] == 'uint8'))
+
+        for j in range(0, height, chunk_size):
+            for i in range(0, width, chunk_size):
+                win = Window(i, j, min(chunk_size, width - i), min(chunk_size, height - j))
+                water = np.zeros((win.height, win.width), dtype=bool)
+                for vrt, is_mask in sources:
+                    data = vrt.read(1, window=win, masked=True)
+                    values = data.filled(0 if is_mask else np.nan)
+                    water |= water_values(values, threshold, is_mask)
+                water_pixels += int(np.count_nonzero(water))
+
+    pixel_area = abs(res_x * res_y) / 1e6  # m² → km²
+    return {
+        "area_km2": round(float(water_pixels * pixel_area), 2),
+        "width": width,
+        "height": height,
+        "crs": str(crs),
+        "resolution": (res_x, res_y)
+    }
+
+
 def generate_water_mask_from_tif(awei_path, mask_output_path=None, threshold=None, chunk_size=1024):
     """
     Generate binary water mask from an AWEI GeoTIFF file, optimized for large rasters.
@@ -30,7 +115,8 @@ def generate_water_mask_from_tif(awei_path, mask_output_path=None, threshold=Non
     Args:
         awei_path (str): Path to the AWEI GeoTIFF file.
         mask_output_path (str): Optional path to save the mask TIFF.
-        threshold (float): Threshold above which pixels are considered water.
+        threshold (float): Threshold at or above which pixels are considered water;
+            binary water masks (uint8) keep their non-zero pixels.
         chunk_size (int): Size of the chunks to process (default: 1024x1024).
 
     Returns:
@@ -39,10 +125,11 @@ def generate_water_mask_from_tif(awei_path, mask_output_path=None, threshold=Non
     if threshold is None:
         threshold = config.AWEI_THRESHOLD
 
-    if not os.path.exists(awei_path):
+    if not awei_path.startswith('/vsi') and not os.path.exists(awei_path):
         raise FileNotFoundError(f"AWEI file not found: {awei_path}")
 
     with rasterio.open(awei_path) as src:
+        is_mask = src.dtypes[0] == 'uint8'
         profile = src.profile.copy()
         profile.update(dtype=rasterio.uint8, count=1, nodata=0)
 
@@ -60,7 +147,8 @@ def generate_water_mask_from_tif(awei_path, mask_output_path=None, threshold=Non
                     awei_chunk = src.read(1, window=win)
 
                     # Apply threshold
-                    water_mask_chunk = (awei_chunk > threshold).astype(np.uint8)
+                    water_mask_chunk = water_values(awei_chunk, threshold, is_mask)
+                    water_mask_chunk = water_mask_chunk.astype(np.uint8)
 
                     # Write the chunk
                     dst.write(water_mask_chunk, 1, window=win)
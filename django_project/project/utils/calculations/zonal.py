@@ -0,0 +1,281 @@
+import numpy as np
+import rasterio
+import shapely
+from rasterio.features import rasterize
+from rasterio.transform import rowcol
+from rasterio.warp import transform_bounds
+from rasterio.windows import Window
+
+STATISTICS = ("count", "mean", "min", "max", "std")
+POINT_TYPE_IDS = (int(shapely.GeometryType.POINT), int(shapely.GeometryType.MULTIPOINT))
+
+
+def bounds_window(src, bounds):
+    """
+    Return the pixel window of ``src`` covering ``bounds``, clipped to the raster,
+    or None when the bounds do not overlap the raster.
+    """
+    left, bottom, right, top = bounds
+    # Project all four corners so north-up and south-up rasters both work
+    cols, rows = ~src.transform * (
+        np.array([left, right, right, left]),
+        np.array([top, top, bottom, bottom]),
+    )
+    col_start = max(int(np.floor(cols.min())), 0)
+    row_start = max(int(np.floor(rows.min())), 0)
+    col_stop = min(int(np.ceil(cols.max())), src.width)
+    row_stop = min(int(np.ceil(rows.max())), src.height)
+    if col_stop <= col_start or row_stop <= row_start:
+        return None
+    return Window(col_start, row_start, col_stop - col_start, row_stop - row_start)
+
+
+def _reduce(zones, values, size):
+    """
+    Reduce ``values`` grouped by integer ``zones`` (1-based) into per-zone statistics.
+    """
+    stats = {
+        "count": np.zeros(size, dtype=np.int64),
+        "mean": np.full(size, np.nan),
+        "min": np.full(size, np.nan),
+        "max": np.full(size, np.nan),
+        "std": np.full(size, np.nan),
+    }
+    if zones.size == 0:
+        return stats
+
+    count = np.bincount(zones, minlength=size + 1)
+    total = np.bincount(zones, weights=values, minlength=size + 1)
+    has_data = count > 0
+    mean = np.full(size + 1, np.nan)
+    mean[has_data] = total[has_data] / count[has_data]
+
+    # Two-pass variance keeps precision for large values
+    deviation = values - mean[zones]
+    variance = np.bincount(zones, weights=deviation * deviation, minlength=size + 1)
+
+    # Min/max via a single sort and segmented reduction
+    order = np.argsort(zones, kind="stable")
+    sorted_zones = zones[order]
+    sorted_values = values[order]
+    starts = np.flatnonzero(np.r_[True, sorted_zones[1:] != sorted_zones[:-1]])
+    zone_ids = sorted_zones[starts]
+
+    stats["count"] = count[1:]
+    stats["mean"] = mean[1:]
+    stats["std"][has_data[1:]] = np.sqrt(variance[has_data] / count[has_data])
+    stats["min"][zone_ids - 1] = np.minimum.reduceat(sorted_values, starts)
+    stats["max"][zone_ids - 1] = np.maximum.reduceat(sorted_values, starts)
+    return stats
+
+
+def _disjoint_groups(geoms):
+    """
+    Split polygons into groups of polygons that do not intersect each other,
+    with a greedy colouring of their intersection graph.
+
+    :return: List of index arrays into ``geoms``, one group when no polygons
+        intersect.
+    """
+    left, right = shapely.STRtree(geoms).query(geoms, predicate="intersects")
+    neighbours = [[] for _ in range(len(geoms))]
+    for i, j in zip(left.tolist(), right.tolist()):
+        if j < i:
+            neighbours[i].append(j)
+
+    colours = np.zeros(len(geoms), dtype=np.int64)
+    for i, previous in enumerate(neighbours):
+        taken = {colours[j] for j in previous}
+        colour = 0
+        while colour in taken:
+            colour += 1
+        colours[i] = colour
+    return [np.flatnonzero(colours == colour) for colour in range(colours.max() + 1)]
+
+
+def zonal_statistics(src, geometries, band=1):
+    """
+    Compute count, mean, min, max and std of a raster band for every geometry.
+
+    Geometries are transformed into the raster CRS instead of warping the raster.
+    Point geometries are sampled at the pixel that contains them, polygons are
+    rasterized into a label grid over the window they cover, and all zones
+    are reduced together with ``np.bincount``. NaN and nodata pixels are ignored.
+    Polygons that intersect each other are rasterized in separate label grids,
+    so every polygon keeps all of its pixels.
+
+    :param src: Open rasterio dataset.
+    :param geometries: GeoSeries of point and/or polygon geometries.
+    :param band: Band index to read.
+    :return: Dict of statistic name to numpy array, aligned with ``geometries``.
+    """
+    if geometries.crs is not None and src.crs is not None and geometries.crs != src.crs:
+        geometries = geometries.to_crs(src.crs)
+
+    geoms = np.asarray(geometries.values, dtype=object)
+    size = len(geoms)
+    valid = ~(shapely.is_missing(geoms) | shapely.is_empty(geoms))
+    if not valid.any():
+        return _reduce(np.empty(0, dtype=np.int64), np.empty(0), size)
+
+    window = bounds_window(src, shapely.total_bounds(geoms[valid]))
+    if window is None:
+        return _reduce(np.empty(0, dtype=np.int64), np.empty(0), size)
+
+    data = src.read(band, window=window, masked=True).astype(np.float64).filled(np.nan)
+    transform = src.window_transform(window)
+    zone_ids = np.arange(1, size + 1)
+    geom_types = shapely.get_type_id(geoms)
+    is_point = valid & np.isin(geom_types, POINT_TYPE_IDS)
+    is_area = valid & ~is_point
+
+    zones = []
+    values = []
+
+    if is_point.any():
+        coords, index = shapely.get_coordinates(geoms[is_point], return_index=True)
+        point_zones = zone_ids[is_point][index]
+        rows, cols = rowcol(transform, coords[:, 0], coords[:, 1])
+        rows = np.asarray(rows)
+        cols = np.asarray(cols)
+        inside = (rows >= 0) & (rows < data.shape[0]) & (cols >= 0) & (cols < data.shape[1])
+        zones.append(point_zones[inside])
+        values.append(data[rows[inside], cols[inside]])
+
+    if is_area.any():
+        area_geoms = geoms[is_area]
+        area_zones = zone_ids[is_area]
+        for group in _disjoint_groups(area_geoms):
+            labels = rasterize(
+                zip(area_geoms[group], area_zones[group].tolist()),
+                out_shape=data.shape,
+                transform=transform,
+                fill=0,
+                dtype="int32",
+            )
+            labelled = labels > 0
+            zones.append(labels[labelled].astype(np.int64))
+            values.append(data[labelled])
+
+    zones = np.concatenate(zones).astype(np.int64)
+    values = np.concatenate(values)
+    finite = np.isfinite(values)
+    return _reduce(zones[finite], values[finite], size)
+
+
+class _MergedStatistics:
+    """Running count, sums, min and max of per-geometry statistics of several rasters."""
+
+    def __init__(self, size):
+        self.size = size
+        self.count = np.zeros(size, dtype=np.int64)
+        self.total = np.zeros(size)
+        self.total_sq = np.zeros(size)
+        self.minimum = np.full(size, np.inf)
+        self.maximum = np.full(size, -np.inf)
+        self.rasters = np.zeros(size, dtype=np.int64)
+
+    def add(self, stats):
+        has_data = stats["count"] > 0
+        n = stats["count"][has_data]
+        mean = stats["mean"][has_data]
+        std = stats["std"][has_data]
+        self.count[has_data] += n
+        self.total[has_data] += n * mean
+        self.total_sq[has_data] += n * (std * std + mean * mean)
+        self.minimum[has_data] = np.minimum(self.minimum[has_data], stats["min"][has_data])
+        self.maximum[has_data] = np.maximum(self.maximum[has_data], stats["max"][has_data])
+        self.rasters[has_data] += 1
+
+    def result(self):
+        size = self.size
+        merged = {
+            "count": self.count,
+            "mean": np.full(size, np.nan),
+            "min": np.full(size, np.nan),
+            "max": np.full(size, np.nan),
+            "std": np.full(size, np.nan),
+            "rasters": self.rasters,
+        }
+        has_data = self.count > 0
+        count = self.count[has_data]
+        mean = self.total[has_data] / count
+        merged["mean"][has_data] = mean
+        merged["std"][has_data] = np.sqrt(
+            np.maximum(self.total_sq[has_data] / count - mean * mean, 0)
+        )
+        merged["min"][has_data] = self.minimum[has_data]
+        merged["max"][has_data] = self.maximum[has_data]
+        return merged
+
+
+def _add_rasters(merged, raster_paths, geometries, band):
+    """
+    Add the statistics of every raster to ``merged``.
+
+    :return: The extent of the rasters in the CRS of ``geometries``.
+    """
+    projected = {}
+    extents = []
+    for raster_path in raster_paths:
+        with rasterio.open(raster_path) as src:
+            key = src.crs.to_string() if src.crs else None
+            if key not in projected:
+                projected[key] = (
+                    geometries.to_crs(src.crs)
+                    if key and geometries.crs is not None else geometries
+                )
+            merged.add(zonal_statistics(src, projected[key], band=band))
+            bounds = src.bounds
+            if key and geometries.crs is not None:
+                bounds = transform_bounds(src.crs, geometries.crs, *bounds, densify_pts=21)
+            extents.append(shapely.box(*bounds))
+    return shapely.union_all(extents)
+
+
+def zonal_statistics_many(raster_paths, geometries, band=1):
+    """
+    Compute zonal statistics over several rasters, opening each raster once,
+    and merge them into one set of statistics per geometry.
+
+    Rasters typically cover the same month and index, e.g. one COG per water
+    body, and must not overlap; see :func:`zonal_statistics_layers` otherwise.
+
+    :param raster_paths: Iterable of raster file paths.
+    :param geometries: GeoSeries of point and/or polygon geometries.
+    :param band: Band index to read.
+    :return: Dict like :func:`zonal_statistics` plus ``rasters``, the number of
+        rasters that contributed valid pixels to each geometry.
+    """
+    merged = _MergedStatistics(len(geometries))
+    _add_rasters(merged, raster_paths, geometries, band)
+    return merged.result()
+
+
+def zonal_statistics_layers(layers, geometries, band=1):
+    """
+    Compute zonal statistics over layers of rasters that may overlap each
+    other, e.g. the outputs of several tasks over the same month.
+
+    Every part of a geometry is taken from the first layer whose footprint
+    covers it, so the pixels of overlapping layers are counted once. The
+    rasters of a layer must not overlap, as in :func:`zonal_statistics_many`.
+
+    :param layers: Iterable of ``(raster_paths, footprint)`` in order of
+        priority, the footprint being the area the layer covers as a shapely
+        geometry in the CRS of ``geometries``, or None for the extent of its
+        rasters.
+    :param geometries: GeoSeries of point and/or polygon geometries.
+    :param band: Band index to read.
+    :return: Dict like :func:`zonal_statistics_many`.
+    """
+    merged = _MergedStatistics(len(geometries))
+    remaining = geometries
+    for raster_paths, footprint in layers:
+        if footprint is None:
+            extent = _add_rasters(merged, raster_paths, remaining, band)
+        else:
+            _add_rasters(merged, raster_paths, remaining.intersection(footprint), band)
+            extent = footprint
+        remaining = remaining.difference(extent)
+    return merged.result()
@@ -0,0 +1,153 @@
+import json
+import math
+import os
+import tempfile
+
+import numpy as np
+import rasterio
+from affine import Affine
+from rasterio.enums import Resampling
+from rasterio.features import geometry_mask
+from rasterio.warp import transform_geom
+from shapely.geometry import box, mapping, shape
+
+from project.utils.calculations.zonal import bounds_window
+
+CLIP_FORMATS = {
+    'tif': 'image/tiff',
+    'nc': 'application/x-netcdf',
+}
+
+
+def geometry_from_params(params):
+    """
+    Return a GeoJSON geometry from request parameters.
+
+    ``geometry`` may be a GeoJSON geometry or Feature, as a dict or string;
+    ``bbox`` a ``minx,miny,maxx,maxy`` string or list.
+
+    :raises ValueError: When neither is given or the bbox is invalid.
+    """
+    geometry = params.get('geometry')
+    if geometry:
+        if isinstance(geometry, str):
+            geometry = json.loads(geometry)
+        if geometry.get('type') == 'Feature':
+            geometry = geometry.get('geometry')
+        return geometry
+    bbox = params.get('bbox')
+    if not bbox:
+        raise ValueError("bbox or geometry is required.")
+    if isinstance(bbox, str):
+        bbox = bbox.split(',')
+    minx, miny, maxx, maxy = [float(coord) for coord in bbox]
+    return {
+        'type': 'Polygon',
+        'coordinates': [[
+            [minx, miny], [maxx, miny], [maxx, maxy], [minx, maxy], [minx, miny]
+        ]],
+    }
+
+
+def clip_raster(src, geometry, resolution=None, band=1, max_pixels=None):
+    """
+    Read the part of ``src`` covered by ``geometry``.
+
+    Only the window of the raster that intersects the geometry is read. When
+    ``resolution`` (in raster CRS units) is coarser than the raster, the read
+    is decimated so it is served from the COG overviews. Pixels outside the
+    geometry are set to nodata.
+
+    :param src: Open rasterio dataset.
+    :param geometry: GeoJSON-like geometry in EPSG:4326.
+    :param resolution: Optional target pixel size.
+    :param max_pixels: Optional maximum number of pixels of the clip,
+        checked before anything is read.
+    :return: Tuple of (float32 array, transform, nodata).
+    :raises ValueError: When the geometry does not intersect the raster, or
+        the clip has more than ``max_pixels`` pixels.
+    """
+    geometry = transform_geom('EPSG:4326', src.crs, mapping(shape(geometry)))
+    window = bounds_window(src, shape(geometry).bounds)
+    if window is None:
+        raise ValueError("Geometry does not intersect the output.")
+
+    scale = 1
+    if resolution:
+        scale = max(resolution / abs(src.res[0]), 1)
+    out_shape = (
+        max(1, math.ceil(window.height / scale)),
+        max(1, math.ceil(window.width / scale)),
+    )
+    if max_pixels and out_shape[0] * out_shape[1] > max_pixels:
+        raise ValueError(
+            f"The clip of {out_shape[1]} x {out_shape[0]} pixels exceeds the limit of "
+            f"{max_pixels} pixels, use a smaller area or a coarser resolution."
+        )
+    nodata = src.nodata if src.nodata is not None else np.nan
+    data = src.read(
+        band, window=window, out_shape=out_shape, masked=True,
+        resampling=Resampling.nearest
+    ).astype(np.float32).filled(nodata)
+    transform = src.window_transform(window) * Affine.scale(
+        window.width / out_shape[1], window.height / out_shape[0]
+    )
+
+    # Keep the full window for rectangles, mask anything else
+    if not shape(geometry).equals(box(*shape(geometry).bounds)):
+        outside = geometry_mask([geometry], out_shape=data.shape, transform=transform)
+        data[outside] = nodata
+    return data, transform, nodata
+
+
+def write_geotiff(data, transform, crs, nodata, path):
+    """Write a single band array as a tiled, compressed GeoTIFF."""
+    profile = {
+        'driver': 'GTiff',
+        'height': data.shape[0],
+        'width': data.shape[1],
+        'count': 1,
+        'dtype': data.dtype,
+        'crs': crs,
+        'transform': transform,
+        'nodata': nodata,
+        'compress': 'deflate',
+        'predictor': 2,
+    }
+    if data.shape[0] >= 256 and data.shape[1] >= 256:
+        profile.update(tiled=True, blockxsize=256, blockysize=256)
+    with rasterio.open(path, 'w', **profile) as dst:
+        dst.write(data, 1)
+
+
+def write_netcdf(data, transform, crs, nodata, path, name='value'):
+    """Write a single band array as a CF NetCDF file."""
+    import rioxarray  # noqa
+    import xarray as xr
+    from project.utils.calculations.netcdf import write_data_array_netcdf
+
+    height, width = data.shape
+    x = transform.c + transform.a * (np.arange(width) + 0.5)
+    y = transform.f + transform.e * (np.arange(height) + 0.5)
+    data_array = xr.DataArray(data, coords={'y': y, 'x': x}, dims=('y', 'x'), name=name)
+    data_array = data_array.rio.write_crs(crs).rio.write_nodata(nodata, encoded=True)
+    write_data_array_netcdf(data_array, path)
+
+
+def clip_file(data, transform, crs, nodata, output_format='tif', name='value'):
+    """
+    Write a clip to a temporary file in ``output_format``.
+
+    :return: The file open for reading. It is already unlinked, so it is
+        removed when closed, e.g. by the ``FileResponse`` streaming it.
+    """
+    fd, path = tempfile.mkstemp(suffix=f'.{output_format}')
+    os.close(fd)
+    try:
+        if output_format == 'nc':
+            write_netcdf(data, transform, crs, nodata, path, name=name)
+        else:
+            write_geotiff(data, transform, crs, nodata, path)
+        return open(path, 'rb')
+    finally:
+        os.remove(path)
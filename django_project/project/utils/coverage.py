@@ -0,0 +1,147 @@
+import calendar
+from collections import defaultdict
+from datetime import date
+from django.contrib.gis.geos import Polygon
+from django.db.models import Q
+from project.models.monitor import TaskOutput
+
+# Fraction of the requested bbox that must be covered to reuse stored outputs
+COVERAGE_THRESHOLD = 0.99
+
+
+def _to_date(value):
+    """Return ``value`` as a date, parsing ISO strings."""
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def month_range(start_date, end_date):
+    """Return the first day of every month between two dates, inclusive."""
+    start = _to_date(start_date).replace(day=1)
+    end = _to_date(end_date)
+    months = []
+    while start <= end:
+        months.append(start)
+        start = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return months
+
+
+def month_end(month):
+    """Return the last day of the month of ``month``."""
+    return month.replace(day=calendar.monthrange(month.year, month.month)[1])
+
+
+def output_footprint(output):
+    """
+    Return the area analysed for an output.
+
+    A task analyses its whole bbox even when it only stores outputs for parts of
+    it, e.g. one AWEI COG per detected water body, so the task bbox is used when
+    it is known.
+    """
+    bbox = output.task.parameters.get('bbox') if output.task else None
+    if bbox and len(bbox) == 4:
+        return Polygon.from_bbox(bbox)
+    return output.bbox
+
+
+def coverage_index(bbox, start_date, end_date, calc_types, resolution):
+    """
+    Work out how much of ``bbox`` is covered by stored outputs at ``resolution``,
+    for every calc type and month between ``start_date`` and ``end_date``.
+    The resolution is the ``resolution`` of analysis tasks or the
+    ``spatial_resolution`` of water extent tasks.
+
+    :return: List of dicts with ``calc_type``, ``month``, ``coverage`` (0-1),
+        ``uncovered_bbox`` (envelope of the uncovered area, None when covered)
+        and ``output_ids``.
+    """
+    requested = Polygon.from_bbox(bbox)
+    requested.srid = 4326
+    months = month_range(start_date, end_date)
+
+    outputs = TaskOutput.objects.filter(
+        monitoring_type__name__in=calc_types,
+        bbox__intersects=requested,
+        observation_date__gte=months[0],
+        observation_date__lte=end_date,
+    ).filter(
+        Q(task__parameters__resolution=resolution) |
+        Q(task__parameters__spatial_resolution=resolution)
+    ).select_related('monitoring_type', 'task').order_by('id')
+
+    footprints = defaultdict(list)
+    output_ids = defaultdict(list)
+    for output in outputs:
+        key = (output.monitoring_type.name, output.observation_date.replace(day=1))
+        footprints[key].append(output_footprint(output))
+        output_ids[key].append(output.id)
+
+    index = []
+    for month in months:
+        for calc_type in calc_types:
+            key = (calc_type, month)
+            uncovered = requested
+            for footprint in footprints[key]:
+                uncovered = uncovered.difference(footprint)
+                if uncovered.empty:
+                    break
+            coverage = 1 - uncovered.area / requested.area if not uncovered.empty else 1.0
+            if coverage >= COVERAGE_THRESHOLD:
+                uncovered_bbox = None
+            elif not footprints[key]:
+                uncovered_bbox = list(bbox)
+            else:
+                uncovered_bbox = list(uncovered.extent)
+            index.append({
+                'calc_type': calc_type,
+                'month': month.strftime('%Y-%m'),
+                'coverage': round(coverage, 4),
+                'uncovered_bbox': uncovered_bbox,
+                'output_ids': output_ids[key],
+            })
+    return index
+
+
+def uncovered_requests(index, start_date, end_date):
+    """
+    Group the uncovered entries of a coverage index into analysis requests.
+
+    Entries with the same uncovered bbox and calc types over consecutive months
+    are merged into one request, clamped to ``start_date`` and ``end_date``.
+
+    :return: List of dicts with ``bbox``, ``calc_types``, ``start_date`` and
+        ``end_date``.
+    """
+    start = _to_date(start_date)
+    end = _to_date(end_date)
+
+    types_per_month = defaultdict(lambda: defaultdict(list))
+    for entry in index:
+        if entry['uncovered_bbox'] is None:
+            continue
+        month = _to_date(f"{entry['month']}-01")
+        types_per_month[month][tuple(entry['uncovered_bbox'])].append(entry['calc_type'])
+
+    groups = defaultdict(list)
+    for month in sorted(types_per_month):
+        for bbox, calc_types in types_per_month[month].items():
+            groups[(bbox, tuple(calc_types))].append(month)
+
+    requests = []
+    for (bbox, calc_types), months in groups.items():
+        run = [months[0]]
+        for month in months[1:] + [None]:
+            if month is not None and month_range(run[-1], month)[1:] == [month]:
+                run.append(month)
+                continue
+            requests.append({
+                'bbox': list(bbox),
+                'calc_types': list(calc_types),
+                'start_date': max(start, run[0]).isoformat(),
+                'end_date': min(end, month_end(run[-1])).isoformat(),
+            })
+            if month is not None:
+                run = [month]
+    return requests
@@ -0,0 +1,284 @@
+import math
+import os
+import time
+from contextlib import contextmanager
+from datetime import date
+
+import numpy as np
+from affine import Affine
+from django.core.cache import cache
+from rasterio.warp import transform, transform_bounds
+
+CUBE_CRS = 'EPSG:6933'
+# A chunk holds 20 years of a 64 x 64 pixel block, so the full history of a
+# pixel is one chunk read
+TIME_CHUNK = 240
+SPATIAL_CHUNK = 64
+# First month of the time axis per image type
+TIME_ORIGINS = {
+    'sentinel': date(2015, 1, 1),
+    'landsat': date(2013, 1, 1),
+}
+LOCK_TIMEOUT = 60 * 10
+LOCK_WAIT = 60 * 5
+
+
+def cube_grid(bbox, resolution):
+    """
+    Return ``(origin_x, origin_y, width, height)`` of the grid covering an
+    EPSG:4326 ``bbox``, snapped to multiples of ``resolution``.
+    """
+    left, bottom, right, top = transform_bounds('EPSG:4326', CUBE_CRS, *bbox, densify_pts=21)
+    left = math.floor(left / resolution) * resolution
+    top = math.ceil(top / resolution) * resolution
+    width = math.ceil((right - left) / resolution)
+    height = math.ceil((top - bottom) / resolution)
+    return left, top, width, height
+
+
+def month_index(cube, month):
+    """Return the time index of ``month`` in the cube."""
+    index = (month.year - cube.start_date.year) * 12 + month.month - cube.start_date.month
+    if index < 0:
+        raise ValueError(f"{month} is before the start of the data cube {cube.start_date}.")
+    return index
+
+
+def index_month(cube, index):
+    """Return the month of a time index of the cube."""
+    month_number = cube.start_date.year * 12 + cube.start_date.month - 1 + index
+    return date(month_number // 12, month_number % 12 + 1, 1)
+
+
+def cube_transform(cube):
+    return Affine(cube.resolution, 0, cube.origin_x, 0, -cube.resolution, cube.origin_y)
+
+
+@contextmanager
+def cube_lock(cube):
+    """
+    Hold a lock on the store while writing, as chunks span many water bodies
+    and months.
+    """
+    key = f'datacube-lock:{cube.pk}'
+    deadline = time.monotonic() + LOCK_WAIT
+    while not cache.add(key, 1, LOCK_TIMEOUT):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Timed out waiting for the lock of data cube {cube.pk}.")
+        time.sleep(0.5)
+    try:
+        yield
+    finally:
+        cache.delete(key)
+
+
+def open_store(cube, mode='r'):
+    """
+    Open the Zarr group of a cube, creating the coordinates on first write.
+
+    The layout follows the xarray Zarr conventions, so the store can also be
+    opened with ``xarray.open_zarr``.
+    """
+    import zarr
+
+    if mode == 'r':
+        return zarr.open_group(cube.path, mode='r')
+
+    root = zarr.open_group(cube.path, mode='a')
+    if 'x' not in root:
+        from rasterio.crs import CRS
+
+        x = cube.origin_x + cube.resolution * (np.arange(cube.width) + 0.5)
+        y = cube.origin_y - cube.resolution * (np.arange(cube.height) + 0.5)
+        root.array('x', x, chunks=(cube.width,)).attrs.update(
+            _ARRAY_DIMENSIONS=['x'], standard_name='projection_x_coordinate', units='m'
+        )
+        root.array('y', y, chunks=(cube.height,)).attrs.update(
+            _ARRAY_DIMENSIONS=['y'], standard_name='projection_y_coordinate', units='m'
+        )
+        root.zeros('time', shape=(0,), chunks=(TIME_CHUNK,), dtype='i8').attrs.update(
+            _ARRAY_DIMENSIONS=['time'],
+            units='days since 1970-01-01',
+            calendar='proleptic_gregorian',
+        )
+        crs = CRS.from_string(cube.crs)
+        root.zeros('spatial_ref', shape=(), dtype='i4').attrs.update(
+            _ARRAY_DIMENSIONS=[],
+            crs_wkt=crs.to_wkt(),
+            spatial_ref=crs.to_wkt(),
+            GeoTransform=' '.join(str(value) for value in cube_transform(cube).to_gdal()),
+        )
+    return root
+
+
+def _require_variable(root, cube, variable, length):
+    """Return the array of ``variable``, growing the time axis to ``length``."""
+    from numcodecs import Blosc
+
+    if variable not in root:
+        array = root.full(
+            variable,
+            fill_value=np.nan,
+            shape=(root['time'].shape[0], cube.height, cube.width),
+            chunks=(TIME_CHUNK, SPATIAL_CHUNK, SPATIAL_CHUNK),
+            dtype='f4',
+            compressor=Blosc(cname='zstd', clevel=3, shuffle=Blosc.BITSHUFFLE),
+            write_empty_chunks=False,
+        )
+        array.attrs.update(_ARRAY_DIMENSIONS=['time', 'y', 'x'], grid_mapping='spatial_ref')
+
+    times = root['time']
+    if times.shape[0] < length:
+        start = times.shape[0]
+        times.resize(length)
+        epoch = date(1970, 1, 1)
+        times[start:] = [
+            (index_month(cube, index) - epoch).days for index in range(start, length)
+        ]
+        for name, array in root.arrays():
+            if array.ndim == 3:
+                array.resize(length, cube.height, cube.width)
+    return root[variable]
+
+
+def write_month(cube, variable, month, data_array):
+    """
+    Write a month of an index into the cube.
+
+    ``data_array`` is a 2D georeferenced DataArray on the cube grid, e.g. a
+    water body cropped from the analysis. NaN pixels keep the stored values,
+    so water bodies of the same month can be written one by one.
+
+    :return: Bounds of the written block in the cube CRS.
+    """
+    x = data_array.x.values
+    y = data_array.y.values
+    values = np.asarray(data_array.values, dtype=np.float32)
+    if y.size > 1 and y[0] < y[-1]:
+        values = values[::-1]
+        y = y[::-1]
+    resolution = abs(x[1] - x[0]) if x.size > 1 else cube.resolution
+    if not math.isclose(resolution, cube.resolution, rel_tol=1e-6):
+        raise ValueError(
+            f"Resolution {resolution} does not match the data cube resolution {cube.resolution}."
+        )
+
+    col = int(round((x[0] - cube.resolution / 2 - cube.origin_x) / cube.resolution))
+    row = int(round((cube.origin_y - y[0] - cube.resolution / 2) / cube.resolution))
+    col_start, row_start = max(col, 0), max(row, 0)
+    col_stop = min(col + values.shape[1], cube.width)
+    row_stop = min(row + values.shape[0], cube.height)
+    if col_stop <= col_start or row_stop <= row_start:
+        raise ValueError("Data is outside of the data cube.")
+    values = values[row_start - row:row_stop - row, col_start - col:col_stop - col]
+
+    import zarr
+
+    index = month_index(cube, month)
+    with cube_lock(cube):
+        root = open_store(cube, mode='a')
+        array = _require_variable(root, cube, variable, index + 1)
+        region = (index, slice(row_start, row_stop), slice(col_start, col_stop))
+        stored = array[region]
+        array[region] = np.where(np.isfinite(values), values, stored)
+        # Consolidated metadata lets readers open the store with one request
+        zarr.consolidate_metadata(root.store)
+
+    left = cube.origin_x + col_start * cube.resolution
+    top = cube.origin_y - row_start * cube.resolution
+    return (
+        left,
+        top - (row_stop - row_start) * cube.resolution,
+        left + (col_stop - col_start) * cube.resolution,
+        top,
+    )
+
+
+def read_pixel_history(cube, variable, lon, lat):
+    """
+    Return the monthly values of the pixel at ``lon``/``lat``.
+
+    :return: List of ``(month, value)`` tuples, without empty months.
+    """
+    xs, ys = transform('EPSG:4326', cube.crs, [lon], [lat])
+    col, row = ~cube_transform(cube) * (xs[0], ys[0])
+    col, row = int(math.floor(col)), int(math.floor(row))
+    if not (0 <= col < cube.width and 0 <= row < cube.height):
+        raise ValueError("Location is outside of the data cube.")
+
+    root = open_store(cube)
+    if variable not in root:
+        return []
+    values = root[variable][:, row, col]
+    return [
+        (index_month(cube, index), float(value))
+        for index, value in enumerate(values) if np.isfinite(value)
+    ]
+
+
+def read_window(cube, variable, month, bbox):
+    """
+    Read the block of a month covering an EPSG:4326 ``bbox``.
+
+    :return: Tuple of (float32 array, transform), the array is empty when the
+        month or variable is not stored.
+    """
+    left, bottom, right, top = transform_bounds('EPSG:4326', cube.crs, *bbox, densify_pts=21)
+    col_start, row_start = ~cube_transform(cube) * (left, top)
+    col_stop, row_stop = ~cube_transform(cube) * (right, bottom)
+    col_start, row_start = max(int(math.floor(col_start)), 0), max(int(math.floor(row_start)), 0)
+    col_stop = min(int(math.ceil(col_stop)), cube.width)
+    row_stop = min(int(math.ceil(row_stop)), cube.height)
+    window_transform = cube_transform(cube) * Affine.translation(col_start, row_start)
+
+    shape = (max(row_stop - row_start, 0), max(col_stop - col_start, 0))
+    root = open_store(cube)
+    index = month_index(cube, month)
+    if variable not in root or index >= root[variable].shape[0] or 0 in shape:
+        return np.full(shape, np.nan, dtype=np.float32), window_transform
+    data = root[variable][index, row_start:row_stop, col_start:col_stop]
+    return np.asarray(data, dtype=np.float32), window_transform
+
+
+def write_window_geotiff(cube, variable, month, bbox, path, as_mask=False):
+    """
+    Export the block of a month covering ``bbox`` as a GeoTIFF, or as a uint8
+    mask of the stored pixels with ``as_mask``.
+    """
+    import rasterio
+
+    data, window_transform = read_window(cube, variable, month, bbox)
+    dtype, nodata = 'float32', np.nan
+    if as_mask:
+        data, dtype, nodata = np.isfinite(data).astype(np.uint8), 'uint8', 0
+    with rasterio.open(
+        path,
+        'w',
+        driver='GTiff',
+        height=data.shape[0],
+        width=data.shape[1],
+        count=1,
+        dtype=dtype,
+        crs=cube.crs,
+        transform=window_transform,
+        nodata=nodata,
+    ) as dst:
+        dst.write(data, 1)
+    return path
+
+
+def output_raster_path(output, bbox, directory):
+    """
+    Return the path of the raster of an output, exporting the part of a data
+    cube output within ``bbox`` to ``directory``.
+    """
+    if not output.datacube_id:
+        return output.file_path
+    extent = output.bbox.intersection(bbox).extent if output.bbox else bbox.extent
+    return write_window_geotiff(
+        output.datacube,
+        output.monitoring_type.name,
+        output.observation_date,
+        extent,
+        os.path.join(directory, f"{output.pk}.tif"),
+    )
@@ -0,0 +1,184 @@
+import resource
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# Upper bounds of the histogram buckets of the /metrics endpoint
+WALL_TIME_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600)
+PEAK_RSS_BUCKETS = tuple(2 ** power * 1024 ** 2 for power in range(7, 16))
+
+
+def read_bytes():
+    """
+    Return the bytes read by this process, from files and sockets.
+
+    :return: ``rchar`` of ``/proc/self/io``, or None where it is not available.
+    """
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                if line.startswith('rchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss():
+    """Reset the peak RSS of this process, where Linux allows it."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss():
+    """Return the peak resident set size of this process in bytes."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class DaskTaskCounter:
+    """Count the dask tasks executed by the local schedulers."""
+
+    def __init__(self):
+        from dask.callbacks import Callback
+
+        self.count = 0
+        self.callback = Callback(pretask=self.pretask)
+
+    def pretask(self, key, dask, state):
+        self.count += 1
+
+    def __enter__(self):
+        self.callback.__enter__()
+        return self
+
+    def __exit__(self, *args):
+        self.callback.__exit__(*args)
+
+
+class StageMetrics:
+    """
+    Wall time, bytes read, peak RSS and dask tasks of the stages of a job.
+
+    Stages entered more than once, e.g. an export per month, are
+    accumulated: times, bytes and tasks are added up, the peak RSS is the
+    highest of all calls. Stages may be nested, an outer stage includes
+    the inner ones. Dask is lazy, so the tasks of a stage that only builds
+    a graph run, and are counted, in the stage that computes it.
+
+    The peak RSS is reset when a stage is entered. The peak reached so far
+    is kept for the enclosing stages first, so their peak covers the parts
+    before their inner stages too.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        # Peak RSS of the open stages before the last reset, outermost first
+        self.open_peaks = []
+
+    @contextmanager
+    def stage(self, name):
+        current_peak = peak_rss()
+        self.open_peaks = [max(peak, current_peak) for peak in self.open_peaks]
+        self.open_peaks.append(0)
+        depth = len(self.open_peaks)
+        reset_peak_rss()
+        start_bytes = read_bytes()
+        start = time.perf_counter()
+        with DaskTaskCounter() as counter:
+            try:
+                yield
+            finally:
+                wall_time = time.perf_counter() - start
+                end_bytes = read_bytes()
+                stage_peak = max(self.open_peaks[depth - 1], peak_rss())
+                del self.open_peaks[depth - 1:]
+                self.add(
+                    name,
+                    wall_time=wall_time,
+                    read_bytes=(
+                        end_bytes - start_bytes if None not in (start_bytes, end_bytes) else 0
+                    ),
+                    peak_rss=stage_peak,
+                    dask_tasks=counter.count,
+                )
+
+    def add(self, name, wall_time=0.0, read_bytes=0, peak_rss=0, dask_tasks=0, calls=1):
+        entry = self.stages.setdefault(
+            name,
+            {'calls': 0, 'wall_time': 0.0, 'read_bytes': 0, 'peak_rss': 0, 'dask_tasks': 0}
+        )
+        entry['calls'] += calls
+        entry['wall_time'] = round(entry['wall_time'] + wall_time, 3)
+        entry['read_bytes'] += read_bytes
+        entry['peak_rss'] = max(entry['peak_rss'], peak_rss)
+        entry['dask_tasks'] += dask_tasks
+
+    def merge(self, data):
+        """Add the stages of a :meth:`to_dict` result, e.g. of an earlier run."""
+        for name, entry in data.get('stages', {}).items():
+            self.add(name, **entry)
+
+    def to_dict(self):
+        return {
+            'release': settings.RELEASE,
+            'stages': self.stages,
+        }
+
+
+def histogram_lines(name, label, values_by_label, buckets):
+    """Return Prometheus text lines of a histogram per label value."""
+    lines = [f'# TYPE {name} histogram']
+    for label_value, values in sorted(values_by_label.items()):
+        labels = ','.join(f'{key}="{value}"' for key, value in zip(label, label_value))
+        for bound in buckets:
+            count = sum(1 for value in values if value <= bound)
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {len(values)}')
+        lines.append(f'{name}_sum{{{labels}}} {sum(values)}')
+        lines.append(f'{name}_count{{{labels}}} {len(values)}')
+    return lines
+
+
+def metrics_text(stage_metrics):
+    """
+    Render the stage metrics of many tasks in the Prometheus text format,
+    as histograms of wall time and peak RSS per release and stage, and
+    totals of bytes read and dask tasks.
+    """
+    wall_times = {}
+    peak_rss_values = {}
+    totals = {'read_bytes': {}, 'dask_tasks': {}}
+    for metrics in stage_metrics:
+        release = metrics.get('release', '')
+        for stage, entry in metrics.get('stages', {}).items():
+            key = (release, stage)
+            wall_times.setdefault(key, []).append(entry['wall_time'])
+            peak_rss_values.setdefault(key, []).append(entry['peak_rss'])
+            for total, values in totals.items():
+                values[key] = values.get(key, 0) + entry[total]
+
+    label = ('release', 'stage')
+    lines = histogram_lines(
+        'analysis_stage_wall_time_seconds', label, wall_times, WALL_TIME_BUCKETS
+    )
+    lines += histogram_lines(
+        'analysis_stage_peak_rss_bytes', label, peak_rss_values, PEAK_RSS_BUCKETS
+    )
+    for total, values in totals.items():
+        name = f'analysis_stage_{total}_total'
+        lines.append(f'# TYPE {name} counter')
+        for (release, stage), value in sorted(values.items()):
+            lines.append(f'{name}{{release="{release}",stage="{stage}"}} {value}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,95 @@
+import json
+import os
+from collections import defaultdict
+
+# Sampling interval of the profiler in seconds
+PROFILE_INTERVAL = 0.005
+
+
+def dask_report(results):
+    """
+    Summarise the task timings of a :class:`dask.diagnostics.Profiler`
+    by task prefix, e.g. ``getitem`` or ``interpolate_na``.
+    """
+    from dask.utils import key_split
+
+    prefixes = defaultdict(lambda: {'count': 0, 'total_time': 0.0, 'max_time': 0.0})
+    for result in results:
+        duration = result.end_time - result.start_time
+        entry = prefixes[key_split(result.key)]
+        entry['count'] += 1
+        entry['total_time'] += duration
+        entry['max_time'] = max(entry['max_time'], duration)
+
+    start = min((result.start_time for result in results), default=0)
+    end = max((result.end_time for result in results), default=0)
+    return {
+        'tasks': len(results),
+        'workers': len({result.worker_id for result in results}),
+        'wall_time': round(end - start, 3),
+        'prefixes': [
+            {
+                'prefix': prefix,
+                'count': entry['count'],
+                'total_time': round(entry['total_time'], 3),
+                'max_time': round(entry['max_time'], 3),
+            }
+            for prefix, entry in sorted(
+                prefixes.items(), key=lambda item: -item[1]['total_time']
+            )
+        ],
+    }
+
+
+class RunProfiler:
+    """
+    Profile a block with the pyinstrument sampling profiler and the dask
+    task profiler.
+
+    pyinstrument samples the calling thread, the dask profiler times every
+    task of the local schedulers, whichever thread runs it. On exit the
+    profiles are written to ``directory`` and listed in :attr:`paths`, an
+    HTML call tree and a JSON report of the dask tasks.
+
+    Profiling can also span code that runs before the directory exists,
+    with :meth:`start`, :meth:`stop` and :meth:`write`.
+    """
+
+    def __init__(self, directory=None, name='profile'):
+        self.directory = directory
+        self.name = name
+        self.paths = []
+
+    def start(self):
+        from dask.diagnostics import Profiler
+        from pyinstrument import Profiler as SamplingProfiler
+
+        self.sampling_profiler = SamplingProfiler(interval=PROFILE_INTERVAL)
+        self.dask_profiler = Profiler()
+        self.dask_profiler.__enter__()
+        self.sampling_profiler.start()
+
+    def stop(self):
+        self.sampling_profiler.stop()
+        self.dask_profiler.__exit__(None, None, None)
+
+    def write(self, directory=None):
+        """Write the profiles to ``directory``, by default the one of the profiler."""
+        directory = directory or self.directory
+        html_path = os.path.join(directory, f'{self.name}.html')
+        with open(html_path, 'w') as f:
+            f.write(self.sampling_profiler.output_html())
+        dask_path = os.path.join(directory, f'{self.name}_dask.json')
+        with open(dask_path, 'w') as f:
+            json.dump(dask_report(self.dask_profiler.results), f, indent=2)
+        self.paths = [html_path, dask_path]
+        return self.paths
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        self.write()
+        return False
@@ -0,0 +1,279 @@
+import fcntl
+import logging
+import os
+import secrets
+import shutil
+import socket
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# File in every scratch directory holding the bytes reserved for the job
+RESERVATION_FILE = '.reserved'
+# Lock file of the scratch directories of a host
+LOCK_FILE = '.lock'
+
+
+class ScratchSpaceError(Exception):
+    """Raised when a scratch directory does not fit in the disk budget."""
+
+
+def directory_size(path):
+    """Return the size in bytes of the files under ``path``, bookkeeping files aside."""
+    total = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            if name in (RESERVATION_FILE, LOCK_FILE):
+                continue
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except FileNotFoundError:
+                continue
+    return total
+
+
+def reserved_size(path):
+    """
+    Return the bytes a scratch directory counts for in the budget: the
+    size reserved for its job, or what it holds if that is more.
+    """
+    try:
+        with open(os.path.join(path, RESERVATION_FILE)) as f:
+            reserved = int(f.read() or 0)
+    except (FileNotFoundError, ValueError):
+        reserved = 0
+    return max(reserved, directory_size(path))
+
+
+def latest_change(path):
+    """Return the latest modification time of ``path`` and everything under it."""
+    latest = os.lstat(path).st_mtime
+    for root, dirs, names in os.walk(path):
+        for name in dirs + names:
+            try:
+                latest = max(latest, os.lstat(os.path.join(root, name)).st_mtime)
+            except FileNotFoundError:
+                continue
+    return latest
+
+
+def host_root(root, hostname=None):
+    """Return the directory of the scratch directories of a host in ``root``."""
+    return os.path.join(root, hostname or socket.gethostname())
+
+
+def _owner(name):
+    """Return the ``(hostname, pid)`` encoded in a scratch directory name."""
+    hostname, _, rest = name.rpartition('_')
+    hostname, _, pid = hostname.rpartition('_')
+    if not hostname or not pid.isdigit() or not rest:
+        return None
+    return hostname, int(pid)
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def is_orphan(name):
+    """
+    Return whether the scratch directory ``name`` belongs to a process of
+    this host that is not running anymore.
+    """
+    owner = _owner(name)
+    if owner is None:
+        return False
+    hostname, pid = owner
+    return hostname == socket.gethostname() and not _is_alive(pid)
+
+
+def is_stale_host(path):
+    """
+    Return whether the scratch directories of another host at ``path`` are
+    left over, e.g. by a container that was recreated under a new host name:
+    nothing in them changed for ``SCRATCH_ORPHAN_AGE`` seconds.
+    """
+    if os.path.basename(path) == socket.gethostname():
+        return False
+    try:
+        return time.time() - latest_change(path) > settings.SCRATCH_ORPHAN_AGE
+    except FileNotFoundError:
+        return False
+
+
+def job_directories(path):
+    """Return the names of the scratch directories in a host directory."""
+    if not os.path.isdir(path):
+        return []
+    return [name for name in os.listdir(path) if os.path.isdir(os.path.join(path, name))]
+
+
+def scratch_roots():
+    """Return the scratch roots, the disk one first, then the tmpfs one if set."""
+    roots = [settings.SCRATCH_DIR]
+    if settings.SCRATCH_TMPFS_DIR:
+        roots.append(settings.SCRATCH_TMPFS_DIR)
+    return roots
+
+
+def reclaim_orphans():
+    """
+    Remove the scratch directories of processes of this host that are gone,
+    e.g. killed workers, and those of other hosts that are stale.
+
+    :return: List of removed directories.
+    """
+    removed = []
+    for root in scratch_roots():
+        if not os.path.isdir(root):
+            continue
+        own_root = host_root(root)
+        for name in job_directories(own_root):
+            path = os.path.join(own_root, name)
+            if is_orphan(name):
+                shutil.rmtree(path, ignore_errors=True)
+                removed.append(path)
+        for name in job_directories(root):
+            path = os.path.join(root, name)
+            if is_stale_host(path):
+                shutil.rmtree(path, ignore_errors=True)
+                removed.append(path)
+    if removed:
+        logger.info(f"Reclaimed {len(removed)} orphaned scratch directories")
+    return removed
+
+
+def scratch_usage():
+    """
+    Report the usage of every scratch root by this host.
+
+    :return: List of dicts with ``path``, ``directories``, ``orphans``, the
+        ``size`` of the directories of this host, ``reserved`` bytes counted
+        in its budget, ``free`` bytes on the volume, and ``budget`` bytes
+        (0 when unlimited).
+    """
+    budgets = {
+        settings.SCRATCH_DIR: settings.SCRATCH_MAX_SIZE,
+        settings.SCRATCH_TMPFS_DIR: settings.SCRATCH_TMPFS_MAX_SIZE,
+    }
+    usage = []
+    for root in scratch_roots():
+        own_root = host_root(root)
+        names = job_directories(own_root)
+        hosts = job_directories(root)
+        paths = [os.path.join(own_root, name) for name in names]
+        usage.append({
+            'path': root,
+            'directories': len(names),
+            'orphans': (
+                sum(1 for name in names if is_orphan(name)) +
+                sum(1 for host in hosts if is_stale_host(os.path.join(root, host)))
+            ),
+            'size': sum(directory_size(path) for path in paths),
+            'reserved': sum(reserved_size(path) for path in paths),
+            'free': shutil.disk_usage(root if os.path.isdir(root) else os.path.dirname(root)).free,
+            'budget': budgets[root],
+        })
+    return usage
+
+
+@contextmanager
+def host_lock(path):
+    """Hold an exclusive lock on the scratch directories of a host."""
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, LOCK_FILE), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class ScratchDirectory:
+    """
+    Working directory of a job, removed with :meth:`cleanup` or when used as
+    a context manager.
+
+    Jobs with an ``estimated_size`` of at most ``SCRATCH_TMPFS_JOB_SIZE``
+    bytes are placed on ``SCRATCH_TMPFS_DIR`` when it has room. Otherwise
+    the directory is created in ``SCRATCH_DIR``, unless the directories of
+    this host plus the estimate exceed the ``SCRATCH_MAX_SIZE`` budget.
+
+    Every host has its own directory in a root, so the budgets are per
+    worker on a shared volume. The estimate is reserved in the directory
+    under a lock of the host, so concurrent jobs cannot overrun the budget,
+    and counts until the job writes more. The directory name holds the host
+    name and process id, so directories of dead processes can be reclaimed
+    with :func:`reclaim_orphans`.
+    """
+
+    def __init__(self, estimated_size=0):
+        self.estimated_size = estimated_size
+        tmpfs_dir = settings.SCRATCH_TMPFS_DIR
+        self.path = None
+        if tmpfs_dir and 0 < estimated_size <= settings.SCRATCH_TMPFS_JOB_SIZE:
+            self.path = self.reserve(
+                tmpfs_dir, settings.SCRATCH_TMPFS_MAX_SIZE, estimated_size, check_free=True
+            )
+        if self.path is None:
+            self.path = self.reserve(
+                settings.SCRATCH_DIR, settings.SCRATCH_MAX_SIZE, estimated_size
+            )
+        if self.path is None:
+            raise ScratchSpaceError(
+                f"Scratch space is full: {estimated_size} bytes estimated, budget of "
+                f"{settings.SCRATCH_MAX_SIZE} bytes per worker."
+            )
+
+    @staticmethod
+    def reserve(root, budget, estimated_size, check_free=False):
+        """
+        Create a directory reserving ``estimated_size`` bytes in ``root``.
+
+        :return: The path, or None when the budget or the free space of
+            the volume is exceeded, even after reclaiming orphans.
+        """
+        own_root = host_root(root)
+        with host_lock(own_root):
+            def fits():
+                if check_free and shutil.disk_usage(own_root).free <= estimated_size:
+                    return False
+                if not budget:
+                    return True
+                used = sum(
+                    reserved_size(os.path.join(own_root, name))
+                    for name in job_directories(own_root)
+                )
+                return used + estimated_size <= budget
+
+            if not fits():
+                reclaim_orphans()
+                if not fits():
+                    return None
+
+            name = f"{socket.gethostname()}_{os.getpid()}_{secrets.token_hex(16)}"
+            path = os.path.join(own_root, name)
+            os.makedirs(path)
+            with open(os.path.join(path, RESERVATION_FILE), 'w') as f:
+                f.write(str(int(estimated_size)))
+        return path
+
+    def cleanup(self):
+        """Remove the directory and everything in it."""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cleanup()
+        return False
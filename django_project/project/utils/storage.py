@@ -0,0 +1,103 @@
+import os
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import default_storage
+
+
+def output_storage():
+    """
+    Return the storage of task output files.
+
+    Outputs are written to the S3-compatible bucket ``OUTPUT_STORAGE_BUCKET``
+    when it is set, e.g. on AWS S3 or MinIO, otherwise to the default
+    storage.
+    """
+    if not settings.OUTPUT_STORAGE_BUCKET:
+        return default_storage
+    from storages.backends.s3 import S3Storage
+
+    return S3Storage(
+        bucket_name=settings.OUTPUT_STORAGE_BUCKET,
+        endpoint_url=settings.OUTPUT_STORAGE_ENDPOINT_URL,
+        file_overwrite=False,
+        querystring_expire=settings.OUTPUT_STORAGE_URL_EXPIRE,
+    )
+
+
+def is_object_storage(storage):
+    """Return whether ``storage`` is an S3-compatible bucket."""
+    return getattr(storage, 'bucket_name', None) is not None
+
+
+def transfer_config():
+    """Return the boto3 transfer configuration of multipart uploads."""
+    from boto3.s3.transfer import TransferConfig
+
+    chunk_size = settings.OUTPUT_UPLOAD_CHUNK_SIZE
+    return TransferConfig(
+        multipart_threshold=chunk_size,
+        multipart_chunksize=chunk_size,
+        max_concurrency=settings.OUTPUT_UPLOAD_CONCURRENCY,
+        use_threads=True,
+    )
+
+
+def upload_file(storage, path, name):
+    """
+    Upload the file at ``path`` to the bucket of ``storage`` as ``name``.
+
+    The file is streamed from disk in parallel multipart chunks, so it is
+    never read into memory as a whole.
+
+    :return: The object key.
+    """
+    storage.bucket.upload_file(path, name, Config=transfer_config())
+    return name
+
+
+def store_file_as(storage, path, name):
+    """
+    Store the file at ``path`` in ``storage`` as ``name``, without making a
+    second local copy.
+
+    The file is uploaded to object storage or moved into the local storage,
+    and is gone from ``path`` afterwards.
+
+    :return: The stored file name.
+    """
+    if is_object_storage(storage):
+        upload_file(storage, path, name)
+        os.remove(path)
+    else:
+        full_path = storage.path(name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        file_move_safe(path, full_path, allow_overwrite=True)
+    return name
+
+
+def store_file(file_field, path):
+    """
+    Store the file at ``path`` as the content of ``file_field``, like
+    ``FieldFile.save`` but moving or uploading the file instead of copying it.
+    The instance is not saved.
+
+    :return: The stored file name.
+    """
+    name = file_field.field.generate_filename(file_field.instance, os.path.basename(path))
+    name = file_field.storage.get_available_name(name, max_length=file_field.field.max_length)
+    file_field.name = store_file_as(file_field.storage, path, name)
+    return file_field.name
+
+
+def gdal_path(file_field):
+    """
+    Return a path of ``file_field`` that GDAL can open.
+
+    Files on object storage are read through ``/vsis3/``; GDAL takes the
+    credentials and endpoint from the ``AWS_*`` environment variables.
+    """
+    storage = file_field.storage
+    if is_object_storage(storage):
+        return f"/vsis3/{storage.bucket_name}/{file_field.name}"
+    return file_field.path
@@ -0,0 +1,188 @@
+import re
+import time
+from datetime import date, timedelta
+from constance import config
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.utils import timezone
+
+TASK_LOG_PARTITIONS_AHEAD = 2
+PARTITION_NAME_PATTERN = re.compile(r'_p(\d{4})_(\d{2})$')
+
+
+class TaskLogBuffer:
+    """
+    Collect TaskLog entries of one object in memory and write them with
+    ``bulk_create``.
+
+    The buffer is flushed when it holds ``max_size`` entries, when
+    ``flush_interval`` seconds passed since the last flush, and on
+    :meth:`flush`. Entries below ``min_level`` are dropped. Each entry gets its
+    timestamp when it is added, strictly increasing, so logs keep their order
+    regardless of when they are written.
+    """
+
+    def __init__(self, content_object, max_size=None, flush_interval=None, min_level=None):
+        from project.models.logs import TaskLog
+
+        self.model = TaskLog
+        self.content_type = ContentType.objects.get_for_model(content_object)
+        self.object_id = str(content_object.pk)
+        self.max_size = config.TASK_LOG_BUFFER_SIZE if max_size is None else max_size
+        self.flush_interval = (
+            config.TASK_LOG_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        )
+        self.min_level = config.TASK_LOG_LEVEL if min_level is None else min_level
+        self.entries = []
+        self.last_flush = time.monotonic()
+        self.last_timestamp = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, log, level):
+        """Buffer a log entry, flushing when a threshold is reached."""
+        if level < self.min_level:
+            return
+        timestamp = timezone.now()
+        if self.last_timestamp and timestamp <= self.last_timestamp:
+            timestamp = self.last_timestamp + timedelta(microseconds=1)
+        self.last_timestamp = timestamp
+
+        self.entries.append(
+            self.model(
+                content_type=self.content_type,
+                object_id=self.object_id,
+                log=log,
+                level=level,
+                timestamp=timestamp,
+            )
+        )
+        if (
+            len(self.entries) >= self.max_size or
+            time.monotonic() - self.last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self):
+        """Write all buffered entries."""
+        if self.entries:
+            self.model.objects.bulk_create(self.entries)
+            self.entries = []
+        self.last_flush = time.monotonic()
+
+
+def month_start(value, months=0):
+    """Return the first day of the month of ``value``, shifted by ``months``."""
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def task_log_partition_name(month):
+    from project.models.logs import TaskLog
+
+    return f"{TaskLog._meta.db_table}_p{month.year}_{month.month:02d}"
+
+
+def get_task_log_partitions():
+    """Return the month partitions of the TaskLog table as ``{month: name}``."""
+    from project.models.logs import TaskLog
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [TaskLog._meta.db_table]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME_PATTERN.search(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def create_task_log_partition(month):
+    """
+    Create the TaskLog partition of ``month`` if it does not exist.
+
+    Rows of that month that ended up in the default partition are moved
+    into the new partition.
+    """
+    from project.models.logs import TaskLog
+
+    table = TaskLog._meta.db_table
+    name = task_log_partition_name(month)
+    start = month_start(month)
+    end = month_start(month, 1)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [name])
+        if cursor.fetchone()[0]:
+            return False
+        cursor.execute(
+            f'SELECT EXISTS (SELECT 1 FROM "{table}_default" '
+            f'WHERE "timestamp" >= %s AND "timestamp" < %s)',
+            [start, end]
+        )
+        if not cursor.fetchone()[0]:
+            cursor.execute(
+                f'CREATE TABLE "{name}" PARTITION OF "{table}" '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                [start, end]
+            )
+            return True
+
+        cursor.execute(f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{table}_default" '
+            f'WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved',
+            [start, end]
+        )
+        cursor.execute(
+            f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" '
+            f'FOR VALUES FROM (%s) TO (%s)',
+            [start, end]
+        )
+    return True
+
+
+def create_task_log_partitions(months_ahead=TASK_LOG_PARTITIONS_AHEAD):
+    """Create the partitions of the current month and ``months_ahead`` months."""
+    today = timezone.now().date()
+    created = []
+    for offset in range(months_ahead + 1):
+        month = month_start(today, offset)
+        if create_task_log_partition(month):
+            created.append(month)
+    return created
+
+
+def drop_expired_task_log_partitions(retention_months):
+    """
+    Drop the TaskLog partitions older than ``retention_months`` months,
+    and delete expired rows from the default partition.
+
+    :return: List of dropped partition names.
+    """
+    from project.models.logs import TaskLog
+
+    if not retention_months or retention_months <= 0:
+        return []
+
+    table = TaskLog._meta.db_table
+    cutoff = month_start(timezone.now().date(), -retention_months)
+    dropped = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for month, name in sorted(get_task_log_partitions().items()):
+            if month_start(month, 1) <= cutoff:
+                cursor.execute(f'DROP TABLE "{name}"')
+                dropped.append(name)
+        cursor.execute(f'DELETE FROM "{table}_default" WHERE "timestamp" < %s', [cutoff])
+    return dropped
@@ -0,0 +1,191 @@
+import math
+import os
+import uuid
+from io import BytesIO
+
+import numpy as np
+from affine import Affine
+from django.core.cache import cache
+from PIL import Image
+from rasterio.enums import Resampling
+from rasterio.transform import from_bounds
+from rasterio.warp import reproject, transform_bounds
+
+from project.utils.calculations.quicklook import COLORMAPS, colorize
+from project.utils.calculations.zonal import bounds_window
+
+TILE_SIZE = 256
+MAX_ZOOM = 22
+WEB_MERCATOR = 'EPSG:3857'
+WEB_MERCATOR_HALF_SIZE = 20037508.342789244
+TILE_FORMATS = {
+    'png': ('PNG', 'image/png'),
+    'webp': ('WEBP', 'image/webp'),
+}
+
+# Colormap name of quicklook.COLORMAPS and value range per index type
+DEFAULT_STYLE = ('BrBG', -1.0, 1.0)
+STYLES = {
+    'AWEI_MASK': ('Blues', 0.0, 1.0),
+    'CDOM': ('BrBG', -10.0, 10.0),
+}
+
+
+def get_style(monitoring_type):
+    """Return ``(colormap, vmin, vmax)`` for a monitoring type name."""
+    return STYLES.get(str(monitoring_type).upper(), DEFAULT_STYLE)
+
+
+def tile_bounds(z, x, y):
+    """Return the Web Mercator bounds of an XYZ tile."""
+    tile_size = 2 * WEB_MERCATOR_HALF_SIZE / (2 ** z)
+    left = -WEB_MERCATOR_HALF_SIZE + x * tile_size
+    top = WEB_MERCATOR_HALF_SIZE - y * tile_size
+    return left, top - tile_size, left + tile_size, top
+
+
+def read_tile(src, z, x, y, band=1, size=TILE_SIZE):
+    """
+    Read an XYZ tile of ``src`` as float32 in Web Mercator.
+
+    Only the window of the raster under the tile is read, decimated to about
+    the tile resolution so GDAL serves it from the COG overviews.
+
+    :return: ``size`` x ``size`` array with NaN outside the raster,
+        or None when the tile does not overlap the raster.
+    """
+    dst_bounds = tile_bounds(z, x, y)
+    src_bounds = transform_bounds(WEB_MERCATOR, src.crs, *dst_bounds, densify_pts=21)
+    window = bounds_window(src, src_bounds)
+    if window is None:
+        return None
+
+    scale = max(window.width / size, window.height / size, 1)
+    out_shape = (
+        max(1, math.ceil(window.height / scale)),
+        max(1, math.ceil(window.width / scale)),
+    )
+    data = src.read(
+        band, window=window, out_shape=out_shape, masked=True,
+        resampling=Resampling.nearest
+    ).astype(np.float32).filled(np.nan)
+    src_transform = src.window_transform(window) * Affine.scale(
+        window.width / out_shape[1], window.height / out_shape[0]
+    )
+
+    tile = np.full((size, size), np.nan, dtype=np.float32)
+    reproject(
+        data,
+        tile,
+        src_transform=src_transform,
+        src_crs=src.crs,
+        src_nodata=np.nan,
+        dst_transform=from_bounds(*dst_bounds, size, size),
+        dst_crs=WEB_MERCATOR,
+        dst_nodata=np.nan,
+        resampling=Resampling.nearest,
+    )
+    return tile
+
+
+def render_tile(src, z, x, y, colormap, vmin, vmax, image_format='png', size=TILE_SIZE):
+    """Render an XYZ tile of ``src`` as an encoded PNG or WebP image."""
+    data = read_tile(src, z, x, y, size=size)
+    if data is None:
+        rgba = np.zeros((size, size, 4), dtype=np.uint8)
+    else:
+        rgba = colorize(data, vmin, vmax, COLORMAPS[colormap])
+
+    buffer = BytesIO()
+    pil_format = TILE_FORMATS[image_format][0]
+    options = {'lossless': True} if pil_format == 'WEBP' else {'optimize': True}
+    Image.fromarray(rgba, 'RGBA').save(buffer, format=pil_format, **options)
+    return buffer.getvalue()
+
+
+class TileCache:
+    """
+    Disk cache of encoded tiles with least-recently-used eviction.
+
+    A hit touches the file, so the modification time tracks the last use.
+    When the files written since the last check exceed a tenth of
+    ``max_size`` bytes, the oldest files are removed until the cache is
+    below ``max_size``. The walk of the cache directory runs at most once
+    per ``evict_interval`` seconds across all processes, claimed through
+    the Django cache.
+    """
+    evict_key = 'tile-cache-evict'
+
+    def __init__(self, directory, max_size, evict_interval=0):
+        self.directory = directory
+        self.max_size = max_size
+        self.evict_interval = evict_interval
+        self.written = 0
+
+    def path(self, key):
+        return os.path.join(self.directory, *key)
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return content
+
+    def set(self, key, content):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+        self.written += len(content)
+        if self.written >= self.max_size / 10 and self.claim_eviction():
+            self.evict()
+
+    def claim_eviction(self):
+        """Return True when this process may walk the cache now."""
+        if not self.evict_interval:
+            return True
+        try:
+            return cache.add(
+                f'{self.evict_key}:{self.directory}', True, timeout=self.evict_interval
+            )
+        except Exception:
+            # Without a shared cache, fall back to the per-process threshold
+            return True
+
+    def evict(self):
+        """Remove the least recently used tiles above ``max_size``."""
+        self.written = 0
+        files = []
+        total = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        files.sort()
+        removed = 0
+        for _, file_size, path in files:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= file_size
+            removed += 1
+        return removed
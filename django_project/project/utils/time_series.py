@@ -0,0 +1,263 @@
+import hashlib
+import json
+import logging
+from collections import defaultdict
+
+import numpy as np
+import rasterio
+from constance import config
+from rasterio.crs import CRS
+from rasterio.features import geometry_mask
+from rasterio.warp import transform_geom
+from django.contrib.gis.geos import GEOSGeometry
+from django.core.cache import cache
+
+from project.models.monitor import TaskOutput
+from project.utils.calculations.summary import pixel_area_km2, summarize
+from project.utils.calculations.water_extent import is_water
+from project.utils.clip import clip_raster
+from project.utils.coverage import COVERAGE_THRESHOLD, month_range, output_footprint
+from project.utils.datacube import read_window
+
+logger = logging.getLogger(__name__)
+
+# Stored outputs do not change, so raster statistics can be cached for long
+TIME_SERIES_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+SUMMARY_FIELDS = (
+    'valid_count', 'valid_fraction', 'mean', 'std', 'min', 'max',
+    'p5', 'p50', 'p95', 'water_area_km2'
+)
+
+
+def geometry_hash(geometry):
+    """Return a short stable hash of a GEOS geometry."""
+    return hashlib.md5(geometry.wkb).hexdigest()
+
+
+def matches_footprint(output, geometry):
+    """
+    Return True when the output covers about the same area as ``geometry``,
+    so its stored summary describes the requested area.
+    """
+    if not output.bbox:
+        return False
+    difference = output.bbox.sym_difference(geometry).area
+    return difference <= (1 - COVERAGE_THRESHOLD) * geometry.area
+
+
+def read_output(output, geometry):
+    """
+    Read the pixels of a GeoTIFF or data cube output inside ``geometry`` with
+    a windowed read.
+
+    Pixels belong to the geometry when their centre is inside it, so the
+    parts of a geometry read from different outputs do not share pixels.
+
+    :return: Tuple of the values of the pixels inside the geometry, NaN for
+        nodata, the area of a pixel in km² or None, and whether the output is
+        a binary water mask.
+    """
+    if output.datacube_id:
+        cube = output.datacube
+        data, transform = read_window(
+            cube, output.monitoring_type.name, output.observation_date, geometry.extent
+        )
+        area = pixel_area_km2(CRS.from_string(cube.crs), (transform.a, transform.e))
+        if not data.size:
+            return data.ravel(), area, False
+        cube_geometry = transform_geom('EPSG:4326', cube.crs, json.loads(geometry.geojson))
+        inside = geometry_mask(
+            [cube_geometry], out_shape=data.shape, transform=transform, invert=True
+        )
+        return data[inside], area, False
+
+    with rasterio.open(output.file_path) as src:
+        data, transform, nodata = clip_raster(src, json.loads(geometry.geojson))
+        is_mask = src.dtypes[0] == 'uint8'
+        area = pixel_area_km2(src.crs, (transform.a, transform.e))
+        src_geometry = transform_geom('EPSG:4326', src.crs, json.loads(geometry.geojson))
+    if not np.isnan(nodata):
+        data[data == nodata] = np.nan
+    inside = geometry_mask([src_geometry], out_shape=data.shape, transform=transform, invert=True)
+    return data[inside], area, is_mask
+
+
+def raster_statistics(layers, geometry, water_threshold=None):
+    """
+    Compute summary statistics inside ``geometry`` from the outputs of one
+    calc type and month.
+
+    Outputs come in layers of one task each, in order of priority. Every part
+    of the geometry is read from the first layer whose footprint covers it, so
+    overlapping outputs are counted once. Binary water masks count their
+    non-zero pixels as water.
+
+    :param layers: List of ``(outputs, footprint)``, the footprint a GEOS
+        geometry in EPSG:4326.
+    """
+    values = []
+    water_area = None
+    remaining = geometry
+    for outputs, footprint in layers:
+        part = remaining.intersection(footprint)
+        remaining = remaining.difference(footprint)
+        if part.empty:
+            continue
+        for output in outputs:
+            try:
+                data, area, is_mask = read_output(output, part)
+            except ValueError:
+                # The output does not intersect this part
+                continue
+            values.append(data)
+            if water_threshold is not None and area:
+                water = data > 0 if is_mask else is_water(data, water_threshold)
+                water_area = (water_area or 0.0) + float(np.count_nonzero(water) * area)
+    summary = summarize(np.concatenate(values) if values else np.empty(0))
+    summary['water_area_km2'] = water_area
+    return summary
+
+
+def _select_outputs(outputs, geometry):
+    """
+    Pick the outputs of every (calc type, month).
+
+    An output whose stored summary matches the requested area wins. Otherwise
+    every GeoTIFF or data cube output is used, grouped per task, latest task
+    first. Other files are skipped.
+
+    :return: Dict of (calc type, month) to ``('summary', output)`` or
+        ``('raster', layers)``, with layers as :func:`raster_statistics` takes.
+    """
+    summaries = {}
+    rasters = defaultdict(dict)
+    for output in outputs:
+        key = (output.monitoring_type.name, output.observation_date.replace(day=1))
+        summary = getattr(output, 'summary', None)
+        if summary is not None and matches_footprint(output, geometry):
+            summaries.setdefault(key, output)
+        elif output.datacube_id or output.file.name.lower().endswith('.tif'):
+            rasters[key].setdefault(output.task_id, []).append(output)
+
+    selected = {key: ('summary', output) for key, output in summaries.items()}
+    for key, tasks in rasters.items():
+        if key in selected:
+            continue
+        selected[key] = ('raster', [
+            (task_outputs, footprint_union(task_outputs)) for task_outputs in tasks.values()
+        ])
+    return selected
+
+
+def footprint_union(outputs):
+    """Return the union of the footprints of outputs in EPSG:4326."""
+    footprint = None
+    for output in outputs:
+        output_area = output_footprint(output)
+        footprint = output_area if footprint is None else footprint.union(output_area)
+    footprint.srid = 4326
+    return footprint
+
+
+def raster_cache_key(layers, geometry_key):
+    """Return the cache key of the statistics of the outputs of ``layers``."""
+    output_ids = ','.join(str(output.pk) for outputs, _ in layers for output in outputs)
+    return f'time-series:{hashlib.md5(output_ids.encode()).hexdigest()}:{geometry_key}'
+
+
+def build_time_series(geometry, calc_types, start_date=None, end_date=None):
+    """
+    Assemble monthly statistics of ``geometry`` from stored TaskOutputs.
+
+    Stored summaries are used when the output covers the requested area,
+    otherwise the statistics are computed from a windowed read of the output
+    and cached. No analysis is started.
+
+    :param geometry: GEOS geometry in EPSG:4326.
+    :param calc_types: List of index names, e.g. ['AWEI', 'NDCI'].
+    :return: Dict with ``series`` per calc type, ordered by month, and
+        ``missing`` months per calc type when both dates are given.
+    """
+    outputs = TaskOutput.objects.filter(
+        monitoring_type__name__in=calc_types,
+        bbox__intersects=geometry,
+        observation_date__isnull=False,
+    ).select_related('monitoring_type', 'summary', 'datacube', 'task').order_by(
+        '-task__created_at', '-created_at'
+    )
+    if start_date:
+        outputs = outputs.filter(observation_date__gte=start_date)
+    if end_date:
+        outputs = outputs.filter(observation_date__lte=end_date)
+
+    selected = _select_outputs(outputs, geometry)
+
+    # Raster statistics, read from the cache in one round trip
+    geometry_key = geometry_hash(geometry)
+    cache_keys = {
+        key: raster_cache_key(layers, geometry_key)
+        for key, (source, layers) in selected.items() if source == 'raster'
+    }
+    try:
+        cached = cache.get_many(cache_keys.values())
+    except Exception as e:
+        logger.warning(f"Failed reading cached time series statistics: {e}")
+        cached = {}
+
+    computed = {}
+    series = defaultdict(list)
+    for key in sorted(selected, key=lambda item: (item[0], item[1])):
+        calc_type, month = key
+        source, selection = selected[key]
+        if source == 'summary':
+            output_ids = [selection.pk]
+            statistics = {field: getattr(selection.summary, field) for field in SUMMARY_FIELDS}
+        else:
+            output_ids = [output.pk for outputs, _ in selection for output in outputs]
+            statistics = cached.get(cache_keys[key])
+            if statistics is None:
+                water_threshold = config.AWEI_THRESHOLD if calc_type == 'AWEI' else None
+                try:
+                    statistics = raster_statistics(selection, geometry, water_threshold)
+                except OSError as e:
+                    logger.warning(f"Failed reading outputs {output_ids}: {e}")
+                    continue
+                if not statistics['pixel_count']:
+                    continue
+                statistics = {field: statistics[field] for field in SUMMARY_FIELDS}
+                computed[cache_keys[key]] = statistics
+        series[calc_type].append({
+            'date': month.strftime('%Y-%m'),
+            'output_id': output_ids[0],
+            'output_ids': output_ids,
+            'source': source,
+            **statistics,
+        })
+
+    if computed:
+        try:
+            cache.set_many(computed, TIME_SERIES_CACHE_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Failed caching time series statistics: {e}")
+
+    result = {'series': {calc_type: series[calc_type] for calc_type in calc_types}}
+    if start_date and end_date:
+        months = [month.strftime('%Y-%m') for month in month_range(start_date, end_date)]
+        result['missing'] = {
+            calc_type: sorted(
+                set(months) - {entry['date'] for entry in series[calc_type]}
+            )
+            for calc_type in calc_types
+        }
+    return result
+
+
+def water_body_geometry(output_id):
+    """Return the footprint of a water body, stored as an AWEI TaskOutput."""
+    output = TaskOutput.objects.filter(
+        pk=output_id, monitoring_type__name__iexact='AWEI'
+    ).only('bbox').first()
+    if output is None or not output.bbox:
+        return None
+    return GEOSGeometry(output.bbox.wkt, srid=4326)